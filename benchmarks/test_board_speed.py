@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import tracemalloc
+
+import gobychess
+
+FEN = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1"
+COPIES = 1000
+ROUNDS = 100
+
+
+def board_bytes(board):
+    """
+    average number of bytes allocated for one copy of board
+    """
+    tracemalloc.start()
+    copies = [board.board_copy() for _ in range(COPIES)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copies
+    return allocated / COPIES
+
+
+def make_unmake_all(board, moves):
+    for move in moves:
+        board.make_generated_move(move)
+        board.unmake_move()
+
+
+def test_board_copy(benchmark):
+    board = gobychess.Board()
+    board.from_fen(FEN)
+    benchmark.extra_info['bytes per board'] = board_bytes(board)
+    benchmark.pedantic(
+        board.board_copy,
+        rounds=ROUNDS,
+        iterations=100
+    )
+
+
+def test_make_unmake(benchmark):
+    board = gobychess.Board()
+    board.from_fen(FEN)
+    moves = list(board.gen_legal_moves())
+    benchmark.extra_info['moves'] = len(moves)
+    benchmark.pedantic(
+        make_unmake_all,
+        args=(board, moves),
+        rounds=ROUNDS,
+        iterations=1
+    )
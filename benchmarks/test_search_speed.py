@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import contextlib
+import io
+
+import pytest
+
+import gobychess
+from gobychess.evaluation import Evaluator
+from gobychess.search import Searcher
+
+FENS = ["r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"]
+DEPTH = 5
+MOVETIME = 3000
+ROUNDS = 3
+
+
+def search_positions(use_lmr, **limits):
+    """
+    iterative deepening search of all positions with a new searcher
+
+    Returns:
+        list: (depth of the last completed iteration, nodes) for every position
+    """
+    results = []
+    for fen in FENS:
+        board = gobychess.Board()
+        board.from_fen(fen)
+        searcher = Searcher(Evaluator())
+        searcher.use_lmr = use_lmr
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            searcher.search_iter(board, **limits)
+        depths = [int(line.split()[2]) for line in output.getvalue().splitlines()
+                  if line.startswith('info depth')]
+        results.append((max(depths, default=0), searcher.nodes))
+    return results
+
+
+@pytest.mark.parametrize('use_lmr', [True, False], ids=['lmr', 'no lmr'])
+def test_search_depth(benchmark, use_lmr):
+    results = benchmark.pedantic(
+        search_positions,
+        args=(use_lmr,),
+        kwargs={'depth': DEPTH},
+        rounds=ROUNDS,
+        iterations=1
+    )
+    benchmark.extra_info['nodes'] = sum(nodes for _, nodes in results)
+    benchmark.extra_info['depth per second'] = len(FENS) * DEPTH / benchmark.stats.stats.mean
+
+
+@pytest.mark.parametrize('use_lmr', [True, False], ids=['lmr', 'no lmr'])
+def test_search_movetime(benchmark, use_lmr):
+    results = benchmark.pedantic(
+        search_positions,
+        args=(use_lmr,),
+        kwargs={'movetime': MOVETIME},
+        rounds=1,
+        iterations=1
+    )
+    benchmark.extra_info['depths'] = [depth for depth, _ in results]
+    benchmark.extra_info['depth per second'] = (sum(depth for depth, _ in results)
+                                                / (len(FENS) * MOVETIME / 1000))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import contextlib
+import io
+
+import pytest
+
+import gobychess
+from gobychess.evaluation import Evaluator
+from gobychess.smp import ParallelSearcher
+
+FENS = ["r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"]
+DEPTH = 5
+ROUNDS = 3
+
+
+@pytest.fixture(params=[1, 2, 4, 8], ids=lambda threads: f'{threads} workers')
+def searcher(request):
+    # the workers are started outside of the measurement
+    searcher = ParallelSearcher(Evaluator(), threads=request.param)
+    yield searcher
+    searcher.close()
+
+
+def search_positions(searcher, **limits):
+    """
+    search all positions to DEPTH with an empty transposition table
+
+    Returns:
+        int: nodes of all workers
+    """
+    nodes = 0
+    for fen in FENS:
+        board = gobychess.Board()
+        board.from_fen(fen)
+        searcher.ttable.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            searcher.search_iter(board, depth=DEPTH, **limits)
+        nodes += searcher.nodes
+    return nodes
+
+
+def test_time_to_depth(benchmark, searcher):
+    # without infinite a depth limit is searched by root splitting
+    nodes = benchmark.pedantic(search_positions, args=(searcher,), kwargs={'infinite': True},
+                               rounds=ROUNDS, iterations=1)
+    benchmark.extra_info['workers'] = len(searcher.workers)
+    benchmark.extra_info['nodes'] = nodes
+    benchmark.extra_info['nodes per second'] = int(nodes / benchmark.stats.stats.mean)
+
+
+def test_root_split_time_to_depth(benchmark, searcher):
+    nodes = benchmark.pedantic(search_positions, args=(searcher,), rounds=ROUNDS, iterations=1)
+    benchmark.extra_info['workers'] = len(searcher.workers)
+    benchmark.extra_info['nodes'] = nodes
+    benchmark.extra_info['nodes per second'] = int(nodes / benchmark.stats.stats.mean)
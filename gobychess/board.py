@@ -3,11 +3,28 @@
 ## TODO/FIXME/NOTE/DEPRECATED/HACK/REVIEW
 
 import copy
-import itertools
 
 from . import movegen as mvg
-from .utils import (bitboard_of_index, bitboard_of_square, get_bit,
-                    print_bitboard, set_bit, unset_bit, forward_bit_scan)
+from . import psqt
+from . import zobrist
+from .utils import (BLACK_KINGSIDE, BLACK_QUEENSIDE, DOUBLE_PAWN_PUSH,
+                    EN_PASSANT, KING_CASTLE, NO_MOVE, PROMOTION, QUEEN_CASTLE,
+                    WHITE_KINGSIDE, WHITE_QUEENSIDE, bitboard_of_index,
+                    bitboard_of_square, get_bit, print_bitboard, san_from_move,
+                    set_bit, unset_bit, forward_bit_scan, reverse_bit_scan)
+
+
+CASTLING_NAMES = {'white kingside': WHITE_KINGSIDE, 'white queenside': WHITE_QUEENSIDE,
+                  'black kingside': BLACK_KINGSIDE, 'black queenside': BLACK_QUEENSIDE}
+
+# castling rights that survive a move from or to a square
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[0] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASK[4] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[7] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASK[56] = 15 & ~BLACK_QUEENSIDE
+CASTLING_MASK[60] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[63] = 15 & ~BLACK_KINGSIDE
 
 
 class Board:
@@ -15,20 +32,38 @@ class Board:
     Class representing the state of a chess game
 
     Attributes:
-        pieces (2x6 array of int): array containing piece bitboard for both colors
+        bitboards (array of 12 int): piece bitboards indexed by 6 * color + piecetype
+        mailbox (array of 64): index into bitboards of the piece on each square, None if empty
         to_move(int): 0 if black to move 1 if white to move
-        castling_rights (dict): 1 if allowed to castle, 0 otherwise
+        castling (int): bitmask of the castling rights (see WHITE_KINGSIDE, ...)
         en_passant (int): bitboard of the en passant square
         halfmove_clock (int): counter of halfmoves
         fullmove_clock (int): counter of full moves
+        hash (int): zobrist hash of the position, updated incrementally
+        pawn_hash (int): zobrist hash of the pawns only, updated incrementally
+        score (int): midgame material and piece square score from white's
+                     view, updated incrementally (see psqt)
+        eg_score (int): endgame material and piece square score
+        phase (int): game phase from the pieces on the board, psqt.MAX_PHASE
+                     for all pieces and 0 for pawns and kings only
+        undo_stack (list): one record per made move to restore the position
+        hash_history (list): hash of the position before every made move,
+                             used to find repetitions
+        null_moves (list): length of hash_history at every null move on the
+                           undo stack, repetitions can not reach back over them
     """
 
+    __slots__ = ('bitboards', 'mailbox', 'to_move', 'castling', 'en_passant',
+                 'halfmove_clock', 'fullmove_counter', 'all_pieces_color',
+                 'all_pieces', 'hash', 'pawn_hash', 'score', 'eg_score',
+                 'phase', 'undo_stack', 'hash_history', 'null_moves')
+
     def __init__(self):
-        self.pieces = [[0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0]]
+        self.bitboards = [0] * 12
+        self.mailbox = [None] * 64
 
         self.to_move = 1
-        self.castling_rights = {'white kingside': 1, 'white queenside': 1,
-                                'black kingside': 1, 'black queenside': 1}
+        self.castling = 15
 
         self.en_passant = 0
         self.halfmove_clock = 0
@@ -37,6 +72,29 @@ class Board:
         self.all_pieces_color = [0, 0]
         self.all_pieces = 0
 
+        self.hash = 0
+        self.pawn_hash = 0
+        self.score = 0
+        self.eg_score = 0
+        self.phase = 0
+        self.undo_stack = []
+        self.hash_history = []
+        self.null_moves = []
+
+    @property
+    def pieces(self):
+        """
+        Read-only view of the bitboards as 2x6 array indexed by [color][piecetype]
+        """
+        return [self.bitboards[:6], self.bitboards[6:]]
+
+    @property
+    def castling_rights(self):
+        """
+        Read-only view of the castling rights as dict, 1 if allowed to castle, 0 otherwise
+        """
+        return {name: int(bool(self.castling & bit)) for name, bit in CASTLING_NAMES.items()}
+
     def from_fen(self, fen):
         """
         Set board to fen position
@@ -44,7 +102,8 @@ class Board:
         Args:
             fen (string): string containing the fen position
         """
-        self.pieces = [[0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0]]
+        self.bitboards = [0] * 12
+        self.mailbox = [None] * 64
 
         words = fen.split()
 
@@ -53,25 +112,11 @@ class Board:
         else:
             self.to_move = 0
 
-        if 'K' in words[2]:
-            self.castling_rights['white kingside'] = 1
-        else:
-            self.castling_rights['white kingside'] = 0
-
-        if 'Q' in words[2]:
-            self.castling_rights['white queenside'] = 1
-        else:
-            self.castling_rights['white queenside'] = 0
-
-        if 'k' in words[2]:
-            self.castling_rights['black kingside'] = 1
-        else:
-            self.castling_rights['black kingside'] = 0
-
-        if 'q' in words[2]:
-            self.castling_rights['black queenside'] = 1
-        else:
-            self.castling_rights['black queenside'] = 0
+        self.castling = 0
+        for char, bit in zip('KQkq', (WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                                      BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+            if char in words[2]:
+                self.castling |= bit
 
         if words[3] == '-':
             self.en_passant = 0
@@ -87,25 +132,61 @@ class Board:
         for row in rows[::-1]:
             for char in row:
                 if char.isdigit():
-                    for _ in range(int(char)):
-                        for piecetype in range(6):
-                            self.pieces[0][piecetype] = unset_bit(self.pieces[0][piecetype], index)
-                            self.pieces[1][piecetype] = unset_bit(self.pieces[1][piecetype], index)
-                        index += 1
+                    index += int(char)
                 else:
                     color = 0
                     if char.isupper():
                         color = 1
                         char = char.lower()
-                    for piecetype in range(6):
-                        if piecetype == piece_strings[char]:
-                            self.pieces[color][piecetype] = set_bit(self.pieces[color][piecetype], index)
-                        else:
-                            self.pieces[0][piecetype] = unset_bit(self.pieces[0][piecetype], index)
-                            self.pieces[1][piecetype] = unset_bit(self.pieces[1][piecetype], index)
+                    piece = 6 * color + piece_strings[char]
+                    self.bitboards[piece] = set_bit(self.bitboards[piece], index)
+                    self.mailbox[index] = piece
                     index += 1
 
         self.update_all_pieces()
+        self.hash = zobrist.zobrist_hash(self)
+        self.pawn_hash = zobrist.pawn_hash(self)
+        self.score, self.eg_score, self.phase = psqt.psqt_score(self)
+        self.undo_stack = []
+        self.hash_history = []
+        self.null_moves = []
+
+    def to_fen(self):
+        """
+        Fen string of the current position
+
+        Returns:
+            string: fen of the position
+        """
+        rows = []
+        for rank in range(7, -1, -1):
+            row = ""
+            empty = 0
+            for square in range(8 * rank, 8 * rank + 8):
+                piece = self.mailbox[square]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                char = 'pnbrqk'[piece % 6]
+                row += char.upper() if piece >= 6 else char
+            if empty:
+                row += str(empty)
+            rows.append(row)
+
+        castling = "".join(char for char, bit in zip('KQkq', (WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                                                              BLACK_KINGSIDE, BLACK_QUEENSIDE))
+                           if self.castling & bit) or '-'
+        if self.en_passant:
+            square = reverse_bit_scan(self.en_passant)
+            en_passant = chr(ord('a') + square % 8) + str(square // 8 + 1)
+        else:
+            en_passant = '-'
+
+        return (f"{'/'.join(rows)} {'w' if self.to_move else 'b'} {castling} "
+                f"{en_passant} {self.halfmove_clock} {self.fullmove_counter}")
 
     def __str__(self):
         """
@@ -124,7 +205,7 @@ class Board:
                     piece = piece.upper()
 
                 for square in range(64):
-                    if get_bit(self.pieces[i][j], square):
+                    if get_bit(self.bitboards[6 * i + j], square):
                         board_str[square] = piece
 
         board_str = "".join(board_str)[::-1]
@@ -146,13 +227,12 @@ class Board:
         Apply move to board, check if move is valid
 
         Args:
-            move (tuple): Tuple containing (square from, square to, promotion)
+            move (int): packed move
         """
-        # check if indices in bound
-        square_from, square_to, promotion = move
-        piece_to_move = self.piece_on(square_from)
-        if not 0 <= square_from <= 63 or not 0 <= square_to <= 63:
+        # check if move fits into 16 bits
+        if not 0 <= move <= 0xFFFF:
             raise IndexError("Square outside the Board")
+        square_from = move & 63
 
         # check if a piece is on square from
         if not get_bit(self.all_pieces, square_from):
@@ -160,125 +240,206 @@ class Board:
 
         # check if piece can go to square to
         if not mvg.check_piece_move(move, self):
-            raise ValueError("Move {} is not possible".format(move))
+            raise ValueError("Move {} is not possible".format(san_from_move(move)))
 
         # check if color to move afterwards in check
         if self.in_check_after_move(move):
             raise ValueError("You are in Check!")
 
-        # update bbs for moving piece
-        self.update_piece(self.to_move, piece_to_move, square_from, square_to)
-
-        # check if move is capture:
-        if get_bit(self.all_pieces_color[1 - self.to_move], square_to):
-            self.pieces[1 - self.to_move] = [unset_bit(piece, square_to) for piece in self.pieces[1 - self.to_move]]
-            self.all_pieces_color[1 - self.to_move] = unset_bit(self.all_pieces_color[1 - self.to_move], square_to)
-
-        # set square of captured pawn
-        if self.to_move:
-            pawn_square = square_to - 8
-        else:
-            pawn_square = square_to + 8
-
-        # if move is an en passant capture remove pawn
-        if piece_to_move == 0 and get_bit(self.en_passant, square_to):
-            self.pieces[1 - self.to_move][0] = unset_bit(self.pieces[1 - self.to_move][0], pawn_square)
-            self.all_pieces_color[1 - self.to_move] = unset_bit(self.all_pieces_color[1 - self.to_move], pawn_square)
-            self.all_pieces = unset_bit(self.all_pieces, pawn_square)
-
-        # if pawn double move set en passent square
-        if piece_to_move == 0 and abs(square_from - square_to) == 16:
-            self.en_passant = bitboard_of_index(pawn_square)
-        else:
-            self.en_passant = 0
-
-        # if castles update rook
-        if piece_to_move == 5:
-            if move == (4, 6, None):
-                self.update_piece(1, 3, 7, 5)
-            elif move == (4, 2, None):
-                self.update_piece(1, 3, 0, 3)
-            elif move == (60, 62, None):
-                self.update_piece(0, 3, 63, 61)
-            elif move == (60, 58, None):
-                self.update_piece(0, 3, 56, 59)
-
-        # update castling rights
-        self.update_castling_rights(move, piece_to_move)
-
-        # if move is promotion set new piece and remove pawn
-        if promotion:
-            # REVIEW rather without update of square_to
-            self.update_piece(self.to_move, promotion, square_from, square_to)
-            self.pieces[self.to_move][0] = unset_bit(self.pieces[self.to_move][0], square_to)
-
-        self.to_move = 1 - self.to_move
-
-        return self
+        return self.make_generated_move(move)
 
     def make_generated_move(self, move):
         """
         Apply generated move to board (no check for validity of the move)
 
         Args:
-            move (tuple): Tuple containing (square from, square to, pomotion)
-        """
-        square_from, square_to, promotion = move
-        piece_to_move = self.piece_on(square_from)
-        opponent = 1 - self.to_move
+            move (int): packed move
+        """
+        square_from = move & 63
+        square_to = move >> 6 & 63
+        flags = move >> 12
+        color = self.to_move
+        opponent = 1 - color
+        piece_to_move = self.mailbox[square_from] - 6 * color
+        captured_piece = self.mailbox[square_to]
+
+        self.undo_stack.append((move, piece_to_move, captured_piece,
+                                self.castling, self.en_passant,
+                                self.halfmove_clock, self.hash, self.pawn_hash,
+                                self.score, self.eg_score, self.phase))
+        self.hash_history.append(self.hash)
+
+        # if move is capture remove the captured piece
+        if captured_piece is not None:
+            self.bitboards[captured_piece] = unset_bit(self.bitboards[captured_piece], square_to)
+            self.all_pieces_color[opponent] = unset_bit(self.all_pieces_color[opponent], square_to)
+            self.hash ^= zobrist.piece_keys[captured_piece][square_to]
+            self.pawn_hash ^= zobrist.pawn_keys[captured_piece][square_to]
+            self.score -= psqt.score_table[captured_piece][square_to]
+            self.eg_score -= psqt.eg_score_table[captured_piece][square_to]
+            self.phase -= psqt.phase_table[captured_piece]
 
         # update bbs for moving piece
-        self.update_piece(self.to_move, piece_to_move, square_from, square_to)
-
-        # check if move is capture:
-        if get_bit(self.all_pieces_color[opponent], square_to):
-            self.pieces[opponent] = [unset_bit(piece, square_to) for piece in self.pieces[opponent]]
-            self.all_pieces_color[opponent] = unset_bit(self.all_pieces_color[opponent], square_to)
+        self.update_piece(color, piece_to_move, square_from, square_to)
 
         # set square of captured pawn
-        if self.to_move:
+        if color:
             pawn_square = square_to - 8
         else:
             pawn_square = square_to + 8
 
         # if move is an en passant capture remove pawn
-        if piece_to_move == 0 and get_bit(self.en_passant, square_to):
-            self.pieces[opponent][0] = unset_bit(self.pieces[opponent][0], pawn_square)
+        if flags == EN_PASSANT:
+            pawn_index = 6 * opponent
+            self.bitboards[pawn_index] = unset_bit(self.bitboards[pawn_index], pawn_square)
             self.all_pieces_color[opponent] = unset_bit(self.all_pieces_color[opponent], pawn_square)
             self.all_pieces = unset_bit(self.all_pieces, pawn_square)
+            self.mailbox[pawn_square] = None
+            self.hash ^= zobrist.piece_keys[pawn_index][pawn_square]
+            self.pawn_hash ^= zobrist.pawn_keys[pawn_index][pawn_square]
+            self.score -= psqt.score_table[pawn_index][pawn_square]
+            self.eg_score -= psqt.eg_score_table[pawn_index][pawn_square]
+
+        if self.en_passant:
+            self.hash ^= zobrist.en_passant_keys[reverse_bit_scan(self.en_passant)]
 
         # if pawn double move set en passent square
-        if piece_to_move == 0 and abs(square_from - square_to) == 16:
+        if flags == DOUBLE_PAWN_PUSH:
             self.en_passant = bitboard_of_index(pawn_square)
+            self.hash ^= zobrist.en_passant_keys[pawn_square]
         else:
             self.en_passant = 0
 
         # if castles update rook
-        if piece_to_move == 5:
-            if move == (4, 6, None):
-                self.update_piece(1, 3, 7, 5)
-            elif move == (4, 2, None):
-                self.update_piece(1, 3, 0, 3)
-            elif move == (60, 62, None):
-                self.update_piece(0, 3, 63, 61)
-            elif move == (60, 58, None):
-                self.update_piece(0, 3, 56, 59)
+        if flags == KING_CASTLE:
+            self.update_piece(color, 3, square_from + 3, square_from + 1)
+        elif flags == QUEEN_CASTLE:
+            self.update_piece(color, 3, square_from - 4, square_from - 1)
 
         # update castling rights
         self.update_castling_rights(move, piece_to_move)
 
         # if move is promotion set new piece and remove pawn
-        if promotion:
-            self.update_piece(self.to_move, promotion, square_from, square_to)
-            self.pieces[self.to_move][0] = unset_bit(self.pieces[self.to_move][0], square_to)
+        if flags & PROMOTION:
+            promotion = (flags & 3) + 1
+            pawn_index = 6 * color
+            self.bitboards[pawn_index] = unset_bit(self.bitboards[pawn_index], square_to)
+            self.bitboards[pawn_index + promotion] = set_bit(self.bitboards[pawn_index + promotion], square_to)
+            self.mailbox[square_to] = pawn_index + promotion
+            self.hash ^= zobrist.piece_keys[pawn_index][square_to]
+            self.hash ^= zobrist.piece_keys[pawn_index + promotion][square_to]
+            self.pawn_hash ^= zobrist.pawn_keys[pawn_index][square_to]
+            self.score += (psqt.score_table[pawn_index + promotion][square_to]
+                           - psqt.score_table[pawn_index][square_to])
+            self.eg_score += (psqt.eg_score_table[pawn_index + promotion][square_to]
+                              - psqt.eg_score_table[pawn_index][square_to])
+            self.phase += psqt.phase_table[promotion]
+
+        # reset fifty move counter on irreversible moves
+        if piece_to_move == 0 or captured_piece is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
 
-        if not self.to_move:
+        if not color:
             self.fullmove_counter += 1
 
         self.to_move = opponent
+        self.hash ^= zobrist.to_move_key
 
         return self
 
+    def unmake_move(self):
+        """
+        Take back the last move made with make_generated_move
+        """
+        (move, piece_moved, captured_piece, castling,
+         en_passant, halfmove_clock, key, pawn_key, score, eg_score, phase) = self.undo_stack.pop()
+        self.hash_history.pop()
+        square_from = move & 63
+        square_to = move >> 6 & 63
+        flags = move >> 12
+
+        color = 1 - self.to_move
+        opponent = self.to_move
+        self.to_move = color
+
+        if not color:
+            self.fullmove_counter -= 1
+
+        # turn promoted piece back into a pawn
+        if flags & PROMOTION:
+            promotion = (flags & 3) + 1
+            pawn_index = 6 * color
+            self.bitboards[pawn_index + promotion] = unset_bit(self.bitboards[pawn_index + promotion], square_to)
+            self.bitboards[pawn_index] = set_bit(self.bitboards[pawn_index], square_to)
+            self.mailbox[square_to] = pawn_index
+
+        self.restore_piece(color, piece_moved, square_to, square_from)
+
+        # put castling rook back
+        if flags == KING_CASTLE:
+            self.restore_piece(color, 3, square_from + 1, square_from + 3)
+        elif flags == QUEEN_CASTLE:
+            self.restore_piece(color, 3, square_from - 1, square_from - 4)
+
+        # restore captured piece
+        if captured_piece is not None:
+            self.bitboards[captured_piece] = set_bit(self.bitboards[captured_piece], square_to)
+            self.all_pieces_color[opponent] = set_bit(self.all_pieces_color[opponent], square_to)
+            self.all_pieces = set_bit(self.all_pieces, square_to)
+            self.mailbox[square_to] = captured_piece
+        elif flags == EN_PASSANT:
+            if color:
+                pawn_square = square_to - 8
+            else:
+                pawn_square = square_to + 8
+            pawn_index = 6 * opponent
+            self.bitboards[pawn_index] = set_bit(self.bitboards[pawn_index], pawn_square)
+            self.all_pieces_color[opponent] = set_bit(self.all_pieces_color[opponent], pawn_square)
+            self.all_pieces = set_bit(self.all_pieces, pawn_square)
+            self.mailbox[pawn_square] = pawn_index
+
+        self.castling = castling
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+        self.hash = key
+        self.pawn_hash = pawn_key
+        self.score = score
+        self.eg_score = eg_score
+        self.phase = phase
+
+    def make_null_move(self):
+        """
+        Pass the turn to the opponent, used by null move pruning
+
+        The position must not be in check. The null move is recorded as
+        NO_MOVE on the undo stack and taken back with unmake_null_move.
+        """
+        self.undo_stack.append((NO_MOVE, None, None, self.castling, self.en_passant,
+                                self.halfmove_clock, self.hash, self.pawn_hash,
+                                self.score, self.eg_score, self.phase))
+        self.null_moves.append(len(self.hash_history))
+        self.hash_history.append(self.hash)
+        if self.en_passant:
+            self.hash ^= zobrist.en_passant_keys[reverse_bit_scan(self.en_passant)]
+            self.en_passant = 0
+        self.halfmove_clock += 1
+        self.to_move = 1 - self.to_move
+        self.hash ^= zobrist.to_move_key
+
+    def unmake_null_move(self):
+        """
+        Take back the last move made with make_null_move
+        """
+        (_, _, _, _, en_passant, halfmove_clock, key, *_) = self.undo_stack.pop()
+        self.hash_history.pop()
+        self.null_moves.pop()
+        self.to_move = 1 - self.to_move
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+        self.hash = key
+
     def gen_legal_moves(self):
         """
         Generates all legal moves for the color to move in the current position
@@ -286,8 +447,7 @@ class Board:
         Returns:
             iterable of the legal moves
         """
-        return itertools.filterfalse(self.in_check_after_move,
-                                     mvg.generate_moves(self))
+        return mvg.generate_legal_moves(self)
 
     def gen_quiet_moves(self):
         """
@@ -296,8 +456,7 @@ class Board:
         Returns:
             iterable of the legal moves
         """
-        return itertools.filterfalse(self.in_check_after_move,
-                                     mvg.generate_quiet_moves(self))
+        return mvg.generate_legal_moves(self, quiets=False)
 
     def update_all_pieces(self):
         """
@@ -307,8 +466,8 @@ class Board:
         self.all_pieces_color = [0, 0]
 
         for i in range(6):
-            self.all_pieces_color[1] |= self.pieces[1][i]
-            self.all_pieces_color[0] |= self.pieces[0][i]
+            self.all_pieces_color[1] |= self.bitboards[6 + i]
+            self.all_pieces_color[0] |= self.bitboards[i]
 
         self.all_pieces |= self.all_pieces_color[0]
         self.all_pieces |= self.all_pieces_color[1]
@@ -323,10 +482,12 @@ class Board:
         Returns:
             piece (int): type of the piece on the square
         """
-        iterator = (p for p in range(6) if get_bit(self.pieces[self.to_move][p],
-                                                   square))
-        piece = next(iterator, None)
-        return piece
+        piece = self.mailbox[square]
+        if piece is not None:
+            piece -= 6 * self.to_move
+            if 0 <= piece < 6:
+                return piece
+        return None
 
     def piece_opponent_on(self, square):
         """
@@ -338,10 +499,12 @@ class Board:
         Returns:
             piece (int): type of the piece on the square
         """
-        iterator = (p for p in range(6) if get_bit(self.pieces[1 - self.to_move][p],
-                                                   square))
-        piece = next(iterator, None)
-        return piece
+        piece = self.mailbox[square]
+        if piece is not None:
+            piece -= 6 - 6 * self.to_move
+            if 0 <= piece < 6:
+                return piece
+        return None
 
     def board_copy(self):
         """
@@ -350,14 +513,24 @@ class Board:
         Returns:
             Board: Copy of the current board state
         """
-        new_board = Board()
-        new_board.pieces = [row[:] for row in self.pieces]
+        new_board = Board.__new__(Board)
+        new_board.bitboards = self.bitboards[:]
+        new_board.mailbox = self.mailbox[:]
         new_board.to_move = self.to_move
         new_board.en_passant = self.en_passant
-        new_board.castling_rights = self.castling_rights.copy()
+        new_board.castling = self.castling
         new_board.all_pieces = self.all_pieces
-        new_board.all_pieces_color = self.all_pieces_color.copy()
+        new_board.all_pieces_color = self.all_pieces_color[:]
+        new_board.halfmove_clock = self.halfmove_clock
         new_board.fullmove_counter = self.fullmove_counter
+        new_board.hash = self.hash
+        new_board.pawn_hash = self.pawn_hash
+        new_board.score = self.score
+        new_board.eg_score = self.eg_score
+        new_board.phase = self.phase
+        new_board.undo_stack = []
+        new_board.hash_history = self.hash_history[:]
+        new_board.null_moves = self.null_moves[:]
         return new_board
 
     def in_check(self):
@@ -374,42 +547,48 @@ class Board:
         Apllies a move to check if the color to move is in check afterwards
 
         Args:
-            move (tuple): move given in the form (square_from, square_to, promotion)
+            move (int): packed move
 
         Returns:
             bool: True if check after move, False otherwise
         """
-        square_from, square_to, _ = move
-        piece_to_move = self.piece_on(square_from)
-        tmp_board = self.board_copy()
-        opponent = 1 - tmp_board.to_move
-
-
-
-        tmp_board.update_piece(tmp_board.to_move, piece_to_move, square_from, square_to)
+        square_from = move & 63
+        square_to = move >> 6 & 63
+        color = self.to_move
+        bitboards = self.bitboards
+        piece_to_move = self.mailbox[square_from]
+
+        captured_piece = self.mailbox[square_to]
+        captured_square = square_to
+        if move >> 12 == EN_PASSANT:
+            captured_piece = 6 - 6 * color
+            if color:
+                captured_square = square_to - 8
+            else:
+                captured_square = square_to + 8
 
-        # check if capture:
-        if get_bit(tmp_board.all_pieces_color[opponent], square_to):
-            tmp_board.pieces[opponent] = [unset_bit(piece, square_to)
-                                          for piece in self.pieces[opponent]]
-            tmp_board.all_pieces_color[opponent] = unset_bit(tmp_board.all_pieces_color[opponent], square_to)
+        # move the piece in place and restore the bitboards after the test
+        old_moving = bitboards[piece_to_move]
+        old_all_pieces = self.all_pieces
+        bitboards[piece_to_move] = set_bit(unset_bit(old_moving, square_from), square_to)
+        self.all_pieces = set_bit(unset_bit(unset_bit(old_all_pieces, square_from),
+                                            captured_square), square_to)
+        if captured_piece is not None:
+            old_captured = bitboards[captured_piece]
+            bitboards[captured_piece] = unset_bit(old_captured, captured_square)
 
-        # if en passant
-        if piece_to_move == 0 and get_bit(tmp_board.en_passant, square_to):
-            if tmp_board.to_move:
-                pawn_square = square_to - 8
-            else:
-                pawn_square = square_to + 8
+        in_check = mvg.color_in_check(self, color)
 
-            tmp_board.pieces[opponent][0] = unset_bit(tmp_board.pieces[opponent][0], pawn_square)
-            tmp_board.all_pieces_color[opponent] = unset_bit(tmp_board.all_pieces_color[opponent], pawn_square)
-            tmp_board.all_pieces = unset_bit(tmp_board.all_pieces, pawn_square)
+        bitboards[piece_to_move] = old_moving
+        self.all_pieces = old_all_pieces
+        if captured_piece is not None:
+            bitboards[captured_piece] = old_captured
 
-        return tmp_board.in_check()
+        return in_check
 
     def update_piece(self, color, piece, square_from, square_to):
         """
-        update position of a piece by setting pieces, all pieces and all pieces color
+        update position of a piece by setting pieces, mailbox, all pieces and all pieces color
 
         Args:
             color (int): color of the piece to update
@@ -417,8 +596,10 @@ class Board:
             square_from (int): index of the square the piece is coming from
             square_to (int): index of the square the piece is going to
         """
-        self.pieces[color][piece] = unset_bit(self.pieces[color][piece], square_from)
-        self.pieces[color][piece] = set_bit(self.pieces[color][piece], square_to)
+        index = 6 * color + piece
+        self.bitboards[index] = set_bit(unset_bit(self.bitboards[index], square_from), square_to)
+        self.mailbox[square_from] = None
+        self.mailbox[square_to] = index
 
         self.all_pieces = unset_bit(self.all_pieces, square_from)
         self.all_pieces = set_bit(self.all_pieces, square_to)
@@ -426,6 +607,40 @@ class Board:
         self.all_pieces_color[color] = unset_bit(self.all_pieces_color[color], square_from)
         self.all_pieces_color[color] = set_bit(self.all_pieces_color[color], square_to)
 
+        self.hash ^= zobrist.piece_keys[index][square_from] ^ zobrist.piece_keys[index][square_to]
+        self.pawn_hash ^= zobrist.pawn_keys[index][square_from] ^ zobrist.pawn_keys[index][square_to]
+        self.score += psqt.score_table[index][square_to] - psqt.score_table[index][square_from]
+        self.eg_score += psqt.eg_score_table[index][square_to] - psqt.eg_score_table[index][square_from]
+
+    def restore_piece(self, color, piece, square_from, square_to):
+        """
+        move a piece back to an empty square in unmake_move, hash and scores
+        are restored from the undo stack instead
+
+        Args:
+            color (int): color of the piece to move
+            piece (int): piecetype of the piece to move
+            square_from (int): index of the square the piece is on
+            square_to (int): index of the empty square the piece is going to
+        """
+        index = 6 * color + piece
+        squares = (1 << square_from) | (1 << square_to)
+        self.bitboards[index] ^= squares
+        self.mailbox[square_from] = None
+        self.mailbox[square_to] = index
+        self.all_pieces ^= squares
+        self.all_pieces_color[color] ^= squares
+
+    def has_any_legal_move(self):
+        """
+        Check if the color to move has a legal move, stops at the first
+        move found, king moves are tried first
+
+        Returns:
+            bool: True if there is a legal move, False otherwise
+        """
+        return next(mvg.generate_legal_moves(self), NO_MOVE) != NO_MOVE
+
     def is_checkmate(self):
         """
         Check if color to move is checkmate
@@ -433,9 +648,7 @@ class Board:
         Returns:
             bool: True if it is Checkmate, False otherwise
         """
-        if self.in_check() and not next(self.gen_legal_moves(), False):
-            return True
-        return False
+        return self.in_check() and not self.has_any_legal_move()
 
     def is_stalemate(self):
         """
@@ -444,9 +657,7 @@ class Board:
         Returns:
             bool: True if stalemate, False otherwise
         """
-        if not self.in_check() and not next(self.gen_legal_moves(), False):
-            return True
-        return False
+        return not self.in_check() and not self.has_any_legal_move()
 
     def is_check_or_stalemate(self):
         """
@@ -455,38 +666,59 @@ class Board:
         Returns:
             bool: True if no legal moves, False otherwise
         """
-        if not next(self.gen_legal_moves(), False):
-            return True
+        return not self.has_any_legal_move()
+
+    def is_repetition(self):
+        """
+        Check if the position occurred before since the last irreversible move
+
+        Only every other earlier position has the same color to move, and
+        positions before the last pawn move, capture or null move can not
+        repeat, so the scan stops after halfmove_clock entries or at the
+        last null move.
+
+        Returns:
+            bool: True if the position is a repetition, False otherwise
+        """
+        history = self.hash_history
+        key = self.hash
+        reach = min(self.halfmove_clock, len(history))
+        if self.null_moves:
+            reach = min(reach, len(history) - self.null_moves[-1] - 1)
+        for distance in range(4, reach + 1, 2):
+            if history[-distance] == key:
+                return True
         return False
 
+    def is_draw(self):
+        """
+        Check for a draw by repetition or by the fifty move rule
+
+        A checkmate on the last move before the fifty move limit still wins.
+
+        Returns:
+            bool: True if the position is a draw, False otherwise
+        """
+        if self.halfmove_clock >= 100:
+            return not self.in_check() or self.has_any_legal_move()
+        return self.is_repetition()
+
     def update_castling_rights(self, move, piece_to_move):
         """
         update castling rights for a given move
 
         Args:
-            move (tuple): Move in the form (square_from, square_to, promotion)
+            move (int): packed move
             piece_to_move (int): The piece to move
         """
-        square_from, square_to, _ = move
+        square_from = move & 63
+        square_to = move >> 6 & 63
 
-        # if king moves update castling rights
-        if piece_to_move == 5:
-            if self.to_move:
-                self.castling_rights['white kingside'] = 0
-                self.castling_rights['white queenside'] = 0
-            else:
-                self.castling_rights['black kingside'] = 0
-                self.castling_rights['black queenside'] = 0
-
-        # if rook moves or is captured update castling rights
-        if square_from == 0 or square_to == 0:
-            self.castling_rights['white queenside'] = 0
-        if square_from == 7 or square_to == 7:
-            self.castling_rights['white kingside'] = 0
-        if square_from == 56 or square_to == 56:
-            self.castling_rights['black queenside'] = 0
-        if square_from == 63 or square_to == 63:
-            self.castling_rights['black kingside'] = 0
+        # king or rook moves and rook captures lose the respective rights
+        castling = self.castling & CASTLING_MASK[square_from] & CASTLING_MASK[square_to]
+        if castling != self.castling:
+            self.hash ^= zobrist.castling_keys[self.castling] ^ zobrist.castling_keys[castling]
+            self.castling = castling
 
     def reset_board(self):
         """
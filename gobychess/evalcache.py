@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+"""
+Fixed size cache of static evaluations
+"""
+
+from array import array
+
+# bytes per entry: key 8, score 4
+ENTRY_SIZE = 12
+
+
+class EvalCache:
+    """
+    Hash table from zobrist keys to static scores with a fixed size in MB
+
+    Every key has one slot given by its lower bits, a new entry always
+    replaces the old one. Hits and misses are counted to judge the size.
+    """
+
+    def __init__(self, size_mb=4):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """
+        Allocate a new empty cache
+
+        Args:
+            size_mb (int): size of the cache in MB
+        """
+        self.size_mb = size_mb
+        entries = max(1, size_mb * 1024 * 1024 // ENTRY_SIZE)
+        # round number of entries down to a power of two
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self.clear()
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters
+        """
+        self.keys = array('Q', [0]) * self.size
+        self.scores = array('i', [0]) * self.size
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        """
+        Look up the score of a position
+
+        Args:
+            key (int): zobrist hash of the position
+
+        Returns:
+            int: cached score or None
+        """
+        index = key & self.mask
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.scores[index]
+        self.misses += 1
+        return None
+
+    def store(self, key, score):
+        """
+        Store the score of a position
+
+        Args:
+            key (int): zobrist hash of the position
+            score (int): static score of the position
+        """
+        index = key & self.mask
+        self.keys[index] = key
+        self.scores[index] = score
+
+    def hit_rate(self):
+        """
+        Returns:
+            float: share of probes that found an entry
+        """
+        return self.hits / max(self.hits + self.misses, 1)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+"""
+Magic bitboard attack tables for sliding pieces
+
+The relevant blockers of a slider (mask) are multiplied with a magic number,
+the upper bits of the product give the index into a flat attack table:
+
+    attacks = table[offset[square] + (((occupancy & mask[square]) * magic[square]
+                                       & FULL_BOARD) >> shift[square])]
+
+The tables are built from the magic numbers below and cached on disk,
+so importing the module only has to read the cache.
+"""
+
+import marshal
+import os
+import random
+
+FULL_BOARD = 0xFFFFFFFFFFFFFFFF
+
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+# found with find_magics(ROOK_DIRECTIONS, 1) and find_magics(BISHOP_DIRECTIONS, 1)
+ROOK_MAGICS = [
+    0x128012C0008000E0, 0x0240002000401001, 0x4100200041001008,
+    0x8280100008018004, 0x2080080002040080, 0x1300010004008208,
+    0x04000208A9101408, 0x020000204A018F04, 0x1080800040008020,
+    0x0000C01000402001, 0x0080808010002000, 0x0408800800801000,
+    0x0010800801040080, 0x4804800400804200, 0x0304800D00800200,
+    0x010200040081006A, 0x8280044020084000, 0x042000C010004021,
+    0x2010002004080020, 0x0040210010000900, 0x0008004004020041,
+    0x0004008080040200, 0x1C20040070610208, 0x1020A20000508104,
+    0x0100C00380008120, 0x4001200280400080, 0x0200100080200080,
+    0x0000401200082200, 0xC02C080080040080, 0x0840040080020080,
+    0x2102004040800100, 0x0042079A00004104, 0x0000400424800280,
+    0x4820100020400040, 0x5010002000801880, 0x9061080081801002,
+    0x208A050011000800, 0x000200080E003094, 0xA010018204003008,
+    0x2000288042001401, 0x400181C000228000, 0x0200402010004000,
+    0x8388928600420021, 0x400021001001000A, 0x2100080011010004,
+    0x1002020004008080, 0x0802000804020001, 0x88004410408A0001,
+    0x010508C030800100, 0x4000400080310100, 0x0030200010048080,
+    0x2000800800100080, 0x0100040008008080, 0x0022000204008080,
+    0x0108020170284400, 0x1001010084004200, 0x0004890141902202,
+    0x0100881100220042, 0x0100102001000841, 0x4408050020081001,
+    0x0002008884201002, 0x2002000490410802, 0x0020014800900204,
+    0x0100082081044402]
+
+BISHOP_MAGICS = [
+    0x4140421084010140, 0x0020821081011004, 0x22900501D1128046,
+    0x1208084100200406, 0x04011041800A0000, 0x0032080208180000,
+    0x01020090080A0420, 0x4000154804042040, 0x0420400244440091,
+    0x0204101002004051, 0x2B000800A1020044, 0x0000880861040400,
+    0x0000011041606002, 0x0082082838080442, 0x0040140088041020,
+    0x0010020602014498, 0x1426441084080820, 0x0010002001220080,
+    0x1402004044004080, 0x008080C802084000, 0x00C2000402A20280,
+    0x2006402608200422, 0x40040404A6011002, 0xC082210884980804,
+    0x0420200404091208, 0x1010284E24080080, 0x8804100002082142,
+    0x1004010020200880, 0x000100108D004008, 0x8000920005012081,
+    0x04010521144C1000, 0xA016052040809800, 0x0004300400410494,
+    0x00040108002022C0, 0x8101024121080800, 0x400B020080480080,
+    0x0040004100081100, 0x8201010200040A00, 0x4004808200140100,
+    0x0801020082002420, 0x0211100804202000, 0x40004208C4006000,
+    0x0002001048020420, 0x0010802011021808, 0x0800020202008410,
+    0x411010300C409020, 0x082008010050C108, 0x060208A122000301,
+    0x4202080208041000, 0x4800290808041000, 0xA800004208040422,
+    0x0000200020880040, 0xE090001202020A00, 0x000010602101080C,
+    0x4808B04448044000, 0x00901220C1020880, 0x4011018804210C80,
+    0x001C01040201050A, 0x180800004044106C, 0x202E001001048800,
+    0x0048080071020220, 0x0800608590041840, 0x0000089004008400,
+    0xA004300A00640080]
+
+CACHE_VERSION = 1
+CACHE_PATH = os.path.join(os.environ.get('GOBYCHESS_CACHE',
+                                         os.path.join(os.path.expanduser('~'), '.cache', 'gobychess')),
+                          f'magic-v{CACHE_VERSION}.marshal')
+
+
+def slow_attacks(square, occupancy, directions):
+    """
+    Calculate sliding attacks by stepping along all directions
+
+    Args:
+        square (int): index of the square of the slider
+        occupancy (int): bitboard of all blocking pieces
+        directions (tuple): (file, rank) steps of the slider
+
+    Returns:
+        int: bitboard of attacked squares
+    """
+    attacks = 0
+    for file_step, rank_step in directions:
+        file, rank = square % 8 + file_step, square // 8 + rank_step
+        while 0 <= file < 8 and 0 <= rank < 8:
+            attacks |= 1 << (8 * rank + file)
+            if occupancy & (1 << (8 * rank + file)):
+                break
+            file, rank = file + file_step, rank + rank_step
+    return attacks
+
+
+def relevant_mask(square, directions):
+    """
+    Bitboard of squares whose occupancy changes the attacks of a slider,
+    the last square of each ray is never relevant
+
+    Args:
+        square (int): index of the square of the slider
+        directions (tuple): (file, rank) steps of the slider
+
+    Returns:
+        int: bitboard of relevant blocker squares
+    """
+    mask = 0
+    for file_step, rank_step in directions:
+        file, rank = square % 8 + file_step, square // 8 + rank_step
+        while 0 <= file + file_step < 8 and 0 <= rank + rank_step < 8:
+            mask |= 1 << (8 * rank + file)
+            file, rank = file + file_step, rank + rank_step
+    return mask
+
+
+def subsets(mask):
+    """
+    Generator for all subsets of the bits of a bitboard
+    """
+    subset = 0
+    while True:
+        yield subset
+        subset = (subset - mask) & mask
+        if not subset:
+            break
+
+
+def find_magic(square, directions, generator):
+    """
+    Search a magic number without destructive collisions for a square
+
+    Args:
+        square (int): index of the square of the slider
+        directions (tuple): (file, rank) steps of the slider
+        generator (random.Random): source of random numbers
+
+    Returns:
+        int: magic number
+    """
+    mask = relevant_mask(square, directions)
+    bits = bin(mask).count("1")
+    shift = 64 - bits
+    occupancies = list(subsets(mask))
+    attacks = [slow_attacks(square, occupancy, directions) for occupancy in occupancies]
+
+    while True:
+        magic = generator.getrandbits(64) & generator.getrandbits(64) & generator.getrandbits(64)
+        if bin((mask * magic) & 0xFF00000000000000).count("1") < 6:
+            continue
+        used = [None] * (1 << bits)
+        for occupancy, attack in zip(occupancies, attacks):
+            index = ((occupancy * magic) & FULL_BOARD) >> shift
+            if used[index] is None:
+                used[index] = attack
+            elif used[index] != attack:
+                break
+        else:
+            return magic
+
+
+def find_magics(directions, seed):
+    """
+    Search magic numbers for all squares
+
+    Args:
+        directions (tuple): (file, rank) steps of the slider
+        seed (int): seed of the random number generator
+
+    Returns:
+        list: magic number for each square
+    """
+    generator = random.Random(seed)
+    return [find_magic(square, directions, generator) for square in range(64)]
+
+
+def build_table(directions, magics):
+    """
+    Build the flat attack table of a slider for given magic numbers
+
+    Args:
+        directions (tuple): (file, rank) steps of the slider
+        magics (list): magic number for each square
+
+    Returns:
+        masks (list): relevant blocker mask for each square
+        shifts (list): shift of the product for each square
+        offsets (list): start of the attacks of each square in attacks
+        attacks (list): flat list of attack bitboards
+    """
+    masks, shifts, offsets, attacks = [], [], [], []
+    for square in range(64):
+        mask = relevant_mask(square, directions)
+        bits = bin(mask).count("1")
+        masks.append(mask)
+        shifts.append(64 - bits)
+        offsets.append(len(attacks))
+        square_attacks = [0] * (1 << bits)
+        for occupancy in subsets(mask):
+            index = ((occupancy * magics[square]) & FULL_BOARD) >> (64 - bits)
+            square_attacks[index] = slow_attacks(square, occupancy, directions)
+        attacks.extend(square_attacks)
+    return masks, shifts, offsets, attacks
+
+
+def load_tables(path=CACHE_PATH):
+    """
+    Load rook and bishop tables from the cache or build and cache them
+
+    Args:
+        path (string): path of the cache file
+
+    Returns:
+        tuple: (masks, shifts, offsets, attacks) for rook and bishop
+    """
+    try:
+        with open(path, 'rb') as cache:
+            magics, rook, bishop = marshal.load(cache)
+        if magics == (ROOK_MAGICS, BISHOP_MAGICS):
+            return rook, bishop
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    rook = build_table(ROOK_DIRECTIONS, ROOK_MAGICS)
+    bishop = build_table(BISHOP_DIRECTIONS, BISHOP_MAGICS)
+
+    # a missing or read only cache directory only costs the rebuild
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as cache:
+            marshal.dump(((ROOK_MAGICS, BISHOP_MAGICS), rook, bishop), cache)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+    return rook, bishop
+
+
+((rook_masks, rook_shifts, rook_offsets, rook_attacks),
+ (bishop_masks, bishop_shifts, bishop_offsets, bishop_attacks)) = load_tables()
+
+
+def rook_sliding(square, blockers):
+    """
+    Generates bitboard of all attack squares for the rook with given blockers
+
+    Args:
+        square (int): Index of the square of the rook
+        blockers (int): Bitboard of all other pieces on the board
+
+    Returns:
+        int: bitboard of attacked squares
+    """
+    return rook_attacks[rook_offsets[square]
+                        + (((blockers & rook_masks[square]) * ROOK_MAGICS[square]
+                            & FULL_BOARD) >> rook_shifts[square])]
+
+
+def bishop_sliding(square, blockers):
+    """
+    Generates bitboard of all attack squares for the bishop with given blockers
+
+    Args:
+        square (int): Index of the square of the bishop
+        blockers (int): Bitboard of all other pieces on the board
+
+    Returns:
+        int: bitboard of attacked squares
+    """
+    return bishop_attacks[bishop_offsets[square]
+                          + (((blockers & bishop_masks[square]) * BISHOP_MAGICS[square]
+                              & FULL_BOARD) >> bishop_shifts[square])]
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
-from .utils import (bitboard_of_index, forward_bit_scan, invert_bitboard,
-                    print_bitboard, reverse_bit_scan, set_bit, unset_bit,
-                    get_bit, gen_ones)
+from .magic import bishop_sliding, rook_sliding
+from .utils import (BLACK_KINGSIDE, BLACK_QUEENSIDE, CAPTURE,
+                    DOUBLE_PAWN_PUSH, EN_PASSANT, KING_CASTLE, PROMOTION,
+                    QUEEN_CASTLE, QUIET, WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                    bitboard_of_index, encode_move, forward_bit_scan,
+                    invert_bitboard, print_bitboard, reverse_bit_scan, set_bit,
+                    unset_bit, get_bit, gen_ones)
 
 
 def generate_non_sliding():
@@ -244,13 +248,46 @@ def generate_direction(direction):
     return directions
 
 
+def generate_lines():
+    """
+    Generate tables of squares between and on a line through two squares
+
+    Returns:
+        between (64x64 array of int): bitboard of squares strictly between
+                                      two aligned squares, 0 otherwise
+        line (64x64 array of int): bitboard of the full board line through
+                                   two aligned squares, 0 otherwise
+    """
+    opposite = {'east': 'west', 'west': 'east', 'north': 'south', 'south': 'north',
+                'north east': 'south west', 'south west': 'north east',
+                'north west': 'south east', 'south east': 'north west'}
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for square in range(64):
+        for direction, ray in table.items():
+            full_line = ray[square] | table[opposite[direction]][square] | bitboard_of_index(square)
+            targets = ray[square]
+            while targets:
+                target = forward_bit_scan(targets)
+                between[square][target] = ray[square] & ~ray[target] & ~bitboard_of_index(target)
+                line[square][target] = full_line
+                targets = unset_bit(targets, target)
+    return between, line
+
+
 table = generate_table()
 non_sliding = generate_non_sliding()
+between, line = generate_lines()
+rook_rays = [table['east'][i] | table['north'][i] | table['west'][i] | table['south'][i]
+             for i in range(64)]
+bishop_rays = [table['north east'][i] | table['north west'][i]
+               | table['south east'][i] | table['south west'][i] for i in range(64)]
 
 
-def rook_sliding(square, blockers):
+def rook_sliding_rays(square, blockers):
     """
     Generates bitboard of all attack squares for the rook with given blockers
+    from the direction rays (reference for the magic lookup rook_sliding)
 
     Args:
         square (int): Index of the square of the rook
@@ -287,9 +324,10 @@ def rook_sliding(square, blockers):
     return attacks
 
 
-def bishop_sliding(square, blockers):
+def bishop_sliding_rays(square, blockers):
     """
     Generates bitboard of all attack squares for the bishop with given blockers
+    from the direction rays (reference for the magic lookup bishop_sliding)
 
     Args:
         square (int): Index of the square of the rook
@@ -340,24 +378,44 @@ def queen_sliding(square, blockers):
     attacks = rook_sliding(square, blockers) | bishop_sliding(square, blockers)
     return attacks
 
-def yield_moveset(square, moveset):
+# castling moves, the king moves two squares
+WHITE_KINGSIDE_CASTLE = encode_move(4, 6, KING_CASTLE)
+WHITE_QUEENSIDE_CASTLE = encode_move(4, 2, QUEEN_CASTLE)
+BLACK_KINGSIDE_CASTLE = encode_move(60, 62, KING_CASTLE)
+BLACK_QUEENSIDE_CASTLE = encode_move(60, 58, QUEEN_CASTLE)
+
+
+def yield_moveset(square, moveset, flags=QUIET):
     """
     yield all moves of a piece from one square to all squares on a bitboard
     """
+    move = square | flags << 12
     while moveset:
         index_to = reverse_bit_scan(moveset)
-        yield (square, index_to, None)
+        yield move | index_to << 6
         moveset = unset_bit(moveset, index_to)
 
 
-def yield_promotion_moveset(square, moveset):
+def yield_promotion_moveset(square, moveset, flags=QUIET):
     """
-    yield all moves of a piece from one square to all squares on a bitboard
+    yield all promotions of a pawn from one square to all squares on a bitboard
     """
+    move = square | (flags | PROMOTION) << 12
     while moveset:
         index_to = reverse_bit_scan(moveset)
-        for i in [1, 2, 3, 4]:
-            yield (square, index_to, i)
+        for piecetype in [1, 2, 3, 4]:
+            yield move | index_to << 6 | (piecetype - 1) << 12
+        moveset = unset_bit(moveset, index_to)
+
+
+def yield_captures_and_quiets(square, moveset, opponent_pieces):
+    """
+    yield all moves of a piece to a bitboard, moves onto opponent pieces are captures
+    """
+    while moveset:
+        index_to = reverse_bit_scan(moveset)
+        # the capture flag is bit 14 of the move
+        yield square | index_to << 6 | (opponent_pieces >> index_to & 1) << 14
         moveset = unset_bit(moveset, index_to)
 
 
@@ -370,14 +428,14 @@ def gen_bishop_moves(bishop_bitboard, all_pieces, own_pieces):
         all_pieces (int): Bitboard of all other pieces on the board
 
     Returns:
-        generator for all bishop moves gives 3 tuples (from, to, promote)
+        generator for all bishop moves gives packed moves
     """
     while bishop_bitboard:
         bishop_square = reverse_bit_scan(bishop_bitboard)
         attack_bitboard = bishop_sliding(bishop_square, all_pieces)
         bishop_bitboard = unset_bit(bishop_bitboard, bishop_square)
         moveset = attack_bitboard & invert_bitboard(own_pieces)
-        yield from yield_moveset(bishop_square, moveset)
+        yield from yield_captures_and_quiets(bishop_square, moveset, all_pieces)
 
 
 def gen_rook_moves(rook_bitboard, all_pieces, own_pieces):
@@ -389,14 +447,14 @@ def gen_rook_moves(rook_bitboard, all_pieces, own_pieces):
         all_pieces (int): Bitboard of all other pieces on the board
 
     Returns:
-        generator for all rook moves gives 3 tuples (from, to, promote)
+        generator for all rook moves gives packed moves
     """
     while rook_bitboard:
         rook_square = reverse_bit_scan(rook_bitboard)
         attack_bitboard = rook_sliding(rook_square, all_pieces)
         rook_bitboard = unset_bit(rook_bitboard, rook_square)
         moveset = attack_bitboard & invert_bitboard(own_pieces)
-        yield from yield_moveset(rook_square, moveset)
+        yield from yield_captures_and_quiets(rook_square, moveset, all_pieces)
 
 
 def gen_queen_moves(queen_bitboard, all_pieces, own_pieces):
@@ -408,14 +466,14 @@ def gen_queen_moves(queen_bitboard, all_pieces, own_pieces):
         all_pieces (int): Bitboard of all other pieces on the board
 
     Returns:
-        generator for all queen moves gives 3 tuples (from, to, promote)
+        generator for all queen moves gives packed moves
     """
     while queen_bitboard:
         queen_square = reverse_bit_scan(queen_bitboard)
         attack_bitboard = queen_sliding(queen_square, all_pieces)
         queen_bitboard = unset_bit(queen_bitboard, queen_square)
         moveset = attack_bitboard & invert_bitboard(own_pieces)
-        yield from yield_moveset(queen_square, moveset)
+        yield from yield_captures_and_quiets(queen_square, moveset, all_pieces)
 
 
 def gen_pawn_moves_white(pawn_bitboard, board):
@@ -427,19 +485,26 @@ def gen_pawn_moves_white(pawn_bitboard, board):
         board (int): board object
 
     Returns:
-        generator for all pawn moves gives 3 tuples (from, to, promote)
+        generator for all pawn moves gives packed moves
     """
     seventhrow = 0b0000000011111111000000000000000000000000000000000000000000000000
     pawns = pawn_bitboard & invert_bitboard(seventhrow)
     while pawns:
         pawn_square = reverse_bit_scan(pawns)
         if not get_bit(board.all_pieces, pawn_square + 8):
+            moveset = (non_sliding['pawn white move'][pawn_square]
+                       & invert_bitboard(board.all_pieces))
             yield from yield_moveset(pawn_square,
-                                     non_sliding['pawn white move'][pawn_square]
-                                     & invert_bitboard(board.all_pieces))
+                                     moveset & bitboard_of_index(pawn_square + 8))
+            yield from yield_moveset(pawn_square,
+                                     moveset & bitboard_of_index(pawn_square + 16),
+                                     DOUBLE_PAWN_PUSH)
         yield from yield_moveset(pawn_square,
                                  non_sliding['pawn white capture'][pawn_square]
-                                 & (board.all_pieces_color[0] | board.en_passant))
+                                 & board.all_pieces_color[0], CAPTURE)
+        yield from yield_moveset(pawn_square,
+                                 non_sliding['pawn white capture'][pawn_square]
+                                 & board.en_passant, EN_PASSANT)
         pawns = unset_bit(pawns, pawn_square)
 
     pawns_seventh = pawn_bitboard & seventhrow
@@ -450,7 +515,7 @@ def gen_pawn_moves_white(pawn_bitboard, board):
                                            & invert_bitboard(board.all_pieces))
         yield from yield_promotion_moveset(pawn_square,
                                            non_sliding['pawn white capture'][pawn_square]
-                                           & board.all_pieces_color[0])
+                                           & board.all_pieces_color[0], CAPTURE)
         pawns_seventh = unset_bit(pawns_seventh, pawn_square)
 
 
@@ -463,19 +528,26 @@ def gen_pawn_moves_black(pawn_bitboard, board):
         board (int): board object
 
     Returns:
-        generator for all pawn moves gives 3 tuples (from, to, promote)
+        generator for all pawn moves gives packed moves
     """
     secondrow = 0b0000000000000000000000000000000000000000000000001111111100000000
     pawns = pawn_bitboard & invert_bitboard(secondrow)
     while pawns:
         pawn_square = reverse_bit_scan(pawns)
         if not get_bit(board.all_pieces, pawn_square - 8):
+            moveset = (non_sliding['pawn black move'][pawn_square]
+                       & invert_bitboard(board.all_pieces))
+            yield from yield_moveset(pawn_square,
+                                     moveset & bitboard_of_index(pawn_square - 8))
             yield from yield_moveset(pawn_square,
-                                     non_sliding['pawn black move'][pawn_square]
-                                     & invert_bitboard(board.all_pieces))
+                                     moveset & bitboard_of_index(pawn_square - 16),
+                                     DOUBLE_PAWN_PUSH)
+        yield from yield_moveset(pawn_square,
+                                 non_sliding['pawn black capture'][pawn_square]
+                                 & board.all_pieces_color[1], CAPTURE)
         yield from yield_moveset(pawn_square,
                                  non_sliding['pawn black capture'][pawn_square]
-                                 & (board.all_pieces_color[1] | board.en_passant))
+                                 & board.en_passant, EN_PASSANT)
         pawns = unset_bit(pawns, pawn_square)
 
     pawns_second = pawn_bitboard & secondrow
@@ -486,79 +558,83 @@ def gen_pawn_moves_black(pawn_bitboard, board):
                                            & invert_bitboard(board.all_pieces))
         yield from yield_promotion_moveset(pawn_square,
                                            non_sliding['pawn black capture'][pawn_square]
-                                           & board.all_pieces_color[1])
+                                           & board.all_pieces_color[1], CAPTURE)
         pawns_second = unset_bit(pawns_second, pawn_square)
 
 
-def gen_knight_moves(knight_bitboard, own_pieces):
+def gen_knight_moves(knight_bitboard, own_pieces, opponent_pieces):
     """
     generate knight moves
 
     Args:
         knight_bitboard (int): Bitboard of positions of knight
-        all_pieces (int): Bitboard of own pieces on the board
+        own_pieces (int): Bitboard of own pieces on the board
+        opponent_pieces (int): Bitboard of opponent pieces on the board
 
     Returns:
-        generator for all knight moves gives 3 tuples (from, to, None)
+        generator for all knight moves gives packed moves
     """
     while knight_bitboard:
         knight_square = reverse_bit_scan(knight_bitboard)
         attack_bitboard = non_sliding['knight'][knight_square]
         knight_bitboard = unset_bit(knight_bitboard, knight_square)
         moveset = attack_bitboard & invert_bitboard(own_pieces)
-        yield from yield_moveset(knight_square, moveset)
+        yield from yield_captures_and_quiets(knight_square, moveset, opponent_pieces)
 
 
-def gen_king_moves(king_bitboard, own_pieces):
+def gen_king_moves(king_bitboard, own_pieces, opponent_pieces):
     """
     generate king moves
 
     Args:
         king_bitboard (int): Bitboard of position of the king
-        all_pieces (int): Bitboard of own pieces on the board
+        own_pieces (int): Bitboard of own pieces on the board
+        opponent_pieces (int): Bitboard of opponent pieces on the board
 
     Returns:
-        generator for all knight moves gives 3 tuples (from, to, None)
+        generator for all knight moves gives packed moves
     """
     while king_bitboard:
         king_square = reverse_bit_scan(king_bitboard)
         attack_bitboard = non_sliding['king'][king_square]
         king_bitboard = unset_bit(king_bitboard ,king_square)
         moveset = attack_bitboard & invert_bitboard(own_pieces)
-        yield from yield_moveset(king_square, moveset)
+        yield from yield_captures_and_quiets(king_square, moveset, opponent_pieces)
 
 def generate_moves(board):
     """
     Generates all pseudo legal moves for the color to move
 
     yields:
-        moves (tuple): all moves in the form (square_from, square_to, promotion)
+        moves (int): all moves packed into 16 bit ints
     """
     if board.to_move:
-        yield from gen_pawn_moves_white(board.pieces[board.to_move][0], board)
+        yield from gen_pawn_moves_white(board.bitboards[6 * board.to_move + 0], board)
         if check_white_castle_kingside(board):
-            yield 4, 6, None
+            yield WHITE_KINGSIDE_CASTLE
         if check_white_castle_queenside(board):
-            yield 4, 2, None
+            yield WHITE_QUEENSIDE_CASTLE
     else:
-        yield from gen_pawn_moves_black(board.pieces[board.to_move][0], board)
+        yield from gen_pawn_moves_black(board.bitboards[6 * board.to_move + 0], board)
         if check_black_castle_kingside(board):
-            yield 60, 62, None
+            yield BLACK_KINGSIDE_CASTLE
         if check_black_castle_queenside(board):
-            yield 60, 58, None
-    yield from gen_knight_moves(board.pieces[board.to_move][1],
-                                board.all_pieces_color[board.to_move])
-    yield from gen_bishop_moves(board.pieces[board.to_move][2],
+            yield BLACK_QUEENSIDE_CASTLE
+    yield from gen_knight_moves(board.bitboards[6 * board.to_move + 1],
+                                board.all_pieces_color[board.to_move],
+                                board.all_pieces_color[1 - board.to_move])
+    yield from gen_bishop_moves(board.bitboards[6 * board.to_move + 2],
                                 board.all_pieces,
                                 board.all_pieces_color[board.to_move])
-    yield from gen_rook_moves(board.pieces[board.to_move][3],
+    yield from gen_rook_moves(board.bitboards[6 * board.to_move + 3],
                               board.all_pieces,
                               board.all_pieces_color[board.to_move])
-    yield from gen_queen_moves(board.pieces[board.to_move][4],
+    yield from gen_queen_moves(board.bitboards[6 * board.to_move + 4],
                                board.all_pieces,
                                board.all_pieces_color[board.to_move])
-    yield from gen_king_moves(board.pieces[board.to_move][5],
-                              board.all_pieces_color[board.to_move])
+    yield from gen_king_moves(board.bitboards[6 * board.to_move + 5],
+                              board.all_pieces_color[board.to_move],
+                              board.all_pieces_color[1 - board.to_move])
 
 def rook_sliding_quiet(square, blockers):
     """
@@ -654,14 +730,14 @@ def gen_bishop_moves_quiet(bishop_bitboard, opponents_pieces, blockers):
         all_pieces (int): Bitboard of all other pieces on the board
 
     Returns:
-        generator for all capturing bishop moves gives 3-tuples (from, to, promote)
+        generator for all capturing bishop moves gives packed moves
     """
     while bishop_bitboard:
         bishop_square = forward_bit_scan(bishop_bitboard)
         attack_bitboard = bishop_sliding_quiet(bishop_square, blockers)
         bishop_bitboard = unset_bit(bishop_bitboard, bishop_square)
         attack_bitboard &= opponents_pieces
-        yield from yield_moveset(bishop_square, attack_bitboard)
+        yield from yield_moveset(bishop_square, attack_bitboard, CAPTURE)
 
 
 def gen_rook_moves_quiet(rook_bitboard, opponents_pieces, blockers):
@@ -673,14 +749,14 @@ def gen_rook_moves_quiet(rook_bitboard, opponents_pieces, blockers):
         all_pieces (int): Bitboard of all other pieces on the board
 
     Returns:
-        generator for all capturing rook moves gives 3-tuples (from, to, promote)
+        generator for all capturing rook moves gives packed moves
     """
     while rook_bitboard:
         rook_square = forward_bit_scan(rook_bitboard)
         attack_bitboard = rook_sliding_quiet(rook_square, blockers)
         rook_bitboard = unset_bit(rook_bitboard, rook_square)
         attack_bitboard &= opponents_pieces
-        yield from yield_moveset(rook_square, attack_bitboard)
+        yield from yield_moveset(rook_square, attack_bitboard, CAPTURE)
 
 
 def gen_queen_moves_quiet(queen_bitboard, opponents_pieces, blockers):
@@ -692,14 +768,14 @@ def gen_queen_moves_quiet(queen_bitboard, opponents_pieces, blockers):
         all_pieces (int): Bitboard of all other pieces on the board
 
     Returns:
-        generator for all capturing queen moves gives 3-tuples (from, to, promote)
+        generator for all capturing queen moves gives packed moves
     """
     while queen_bitboard:
         queen_square = forward_bit_scan(queen_bitboard)
         attack_bitboard = queen_sliding_quiet(queen_square, blockers)
         queen_bitboard = unset_bit(queen_bitboard, queen_square)
         attack_bitboard &= opponents_pieces
-        yield from yield_moveset(queen_square, attack_bitboard)
+        yield from yield_moveset(queen_square, attack_bitboard, CAPTURE)
 
 
 
@@ -712,7 +788,7 @@ def gen_pawn_moves_white_quiet(pawn_bitboard, board):
         board (int): board object
 
     Returns:
-        generator for all capturing pawn moves gives 3-tuples (from, to, promote)
+        generator for all capturing pawn moves gives packed moves
     """
     seventhrow = 0b0000000011111111000000000000000000000000000000000000000000000000
     pawns = pawn_bitboard & invert_bitboard(seventhrow)
@@ -720,7 +796,10 @@ def gen_pawn_moves_white_quiet(pawn_bitboard, board):
         pawn_square = forward_bit_scan(pawns)
         yield from yield_moveset(pawn_square,
                                  non_sliding['pawn white capture'][pawn_square]
-                                 & (board.all_pieces_color[0] | board.en_passant))
+                                 & board.all_pieces_color[0], CAPTURE)
+        yield from yield_moveset(pawn_square,
+                                 non_sliding['pawn white capture'][pawn_square]
+                                 & board.en_passant, EN_PASSANT)
         pawns = unset_bit(pawns, pawn_square)
 
     pawns_seventh = pawn_bitboard & seventhrow
@@ -728,7 +807,7 @@ def gen_pawn_moves_white_quiet(pawn_bitboard, board):
         pawn_square = forward_bit_scan(pawns_seventh)
         yield from yield_promotion_moveset(pawn_square,
                                            non_sliding['pawn white capture'][pawn_square]
-                                           & board.all_pieces_color[0])
+                                           & board.all_pieces_color[0], CAPTURE)
         pawns_seventh = unset_bit(pawns_seventh, pawn_square)
 
 
@@ -741,7 +820,7 @@ def gen_pawn_moves_black_quiet(pawn_bitboard, board):
         board (int): board object
 
     Returns:
-        generator for all capturing pawn moves gives 3-tuples (from, to, promote)
+        generator for all capturing pawn moves gives packed moves
     """
     secondrow = 0b0000000000000000000000000000000000000000000000001111111100000000
     pawns = pawn_bitboard & invert_bitboard(secondrow)
@@ -749,7 +828,10 @@ def gen_pawn_moves_black_quiet(pawn_bitboard, board):
         pawn_square = forward_bit_scan(pawns)
         yield from yield_moveset(pawn_square,
                                  non_sliding['pawn black capture'][pawn_square]
-                                 & (board.all_pieces_color[1] | board.en_passant))
+                                 & board.all_pieces_color[1], CAPTURE)
+        yield from yield_moveset(pawn_square,
+                                 non_sliding['pawn black capture'][pawn_square]
+                                 & board.en_passant, EN_PASSANT)
         pawns = unset_bit(pawns, pawn_square)
 
     pawns_second = pawn_bitboard & secondrow
@@ -757,7 +839,7 @@ def gen_pawn_moves_black_quiet(pawn_bitboard, board):
         pawn_square = forward_bit_scan(pawns_second)
         yield from yield_promotion_moveset(pawn_square,
                                            non_sliding['pawn black capture'][pawn_square]
-                                           & board.all_pieces_color[1])
+                                           & board.all_pieces_color[1], CAPTURE)
         pawns_second = unset_bit(pawns_second, pawn_square)
 
 
@@ -770,13 +852,13 @@ def gen_knight_moves_quiet(knight_bitboard, opponent_pieces):
         all_pieces (int): Bitboard of own pieces on the board
 
     Returns:
-        generator for all capturing knight moves gives 3-tuples (from, to, None)
+        generator for all capturing knight moves gives packed moves
     """
     while knight_bitboard:
         knight_square = forward_bit_scan(knight_bitboard)
         attack_bitboard = non_sliding['knight'][knight_square] & opponent_pieces
         knight_bitboard = unset_bit(knight_bitboard, knight_square)
-        yield from yield_moveset(knight_square, attack_bitboard)
+        yield from yield_moveset(knight_square, attack_bitboard, CAPTURE)
 
 
 def gen_king_moves_quiet(king_bitboard, opponent_pieces):
@@ -788,13 +870,13 @@ def gen_king_moves_quiet(king_bitboard, opponent_pieces):
         all_pieces (int): Bitboard of own pieces on the board
 
     Returns:
-        generator for all capturing knight moves gives 3-tuples (from, to, None)
+        generator for all capturing knight moves gives packed moves
     """
     while king_bitboard:
         king_square = forward_bit_scan(king_bitboard)
         attack_bitboard = non_sliding['king'][king_square] & opponent_pieces
         king_bitboard = unset_bit(king_bitboard, king_square)
-        yield from yield_moveset(king_square, attack_bitboard)
+        yield from yield_moveset(king_square, attack_bitboard, CAPTURE)
 
 
 def generate_quiet_moves(board):
@@ -802,27 +884,376 @@ def generate_quiet_moves(board):
     Generates all pseudo legal capturing moves for the color to move
 
     yields:
-        moves (tuple): all moves in the form (square_from, square_to, promotion)
+        moves (int): all moves packed into 16 bit ints
     """
     if board.to_move:
-        yield from gen_pawn_moves_white_quiet(board.pieces[board.to_move][0], board)
+        yield from gen_pawn_moves_white_quiet(board.bitboards[6 * board.to_move + 0], board)
     else:
-        yield from gen_pawn_moves_black_quiet(board.pieces[board.to_move][0], board)
-    yield from gen_knight_moves_quiet(board.pieces[board.to_move][1],
+        yield from gen_pawn_moves_black_quiet(board.bitboards[6 * board.to_move + 0], board)
+    yield from gen_knight_moves_quiet(board.bitboards[6 * board.to_move + 1],
                                       board.all_pieces_color[1 - board.to_move])
-    yield from gen_bishop_moves_quiet(board.pieces[board.to_move][2],
+    yield from gen_bishop_moves_quiet(board.bitboards[6 * board.to_move + 2],
                                       board.all_pieces_color[1 - board.to_move],
                                       board.all_pieces)
-    yield from gen_rook_moves_quiet(board.pieces[board.to_move][3],
+    yield from gen_rook_moves_quiet(board.bitboards[6 * board.to_move + 3],
                                     board.all_pieces_color[1 - board.to_move],
                                     board.all_pieces)
-    yield from gen_queen_moves_quiet(board.pieces[board.to_move][4],
+    yield from gen_queen_moves_quiet(board.bitboards[6 * board.to_move + 4],
                                      board.all_pieces_color[1 - board.to_move],
                                      board.all_pieces)
-    yield from gen_king_moves_quiet(board.pieces[board.to_move][5],
+    yield from gen_king_moves_quiet(board.bitboards[6 * board.to_move + 5],
                                     board.all_pieces_color[1 - board.to_move])
 
 
+def attackers_to(board, square, color, occupancy):
+    """
+    Bitboard of pieces of the opponent of color attacking a square
+
+    Args:
+        board (Board): current board
+        square (int): index of the attacked square
+        color (int): color that gets attacked
+        occupancy (int): bitboard of blockers for sliding pieces
+
+    Returns:
+        int: bitboard of attacking pieces
+    """
+    bitboards = board.bitboards
+    offset = 6 - 6 * color
+    queens = bitboards[offset + 4]
+    if color:
+        pawn_attacks = non_sliding['pawn white capture'][square]
+    else:
+        pawn_attacks = non_sliding['pawn black capture'][square]
+    return ((non_sliding['knight'][square] & bitboards[offset + 1])
+            | (pawn_attacks & bitboards[offset])
+            | (non_sliding['king'][square] & bitboards[offset + 5])
+            | (bishop_sliding(square, occupancy) & (bitboards[offset + 2] | queens))
+            | (rook_sliding(square, occupancy) & (bitboards[offset + 3] | queens)))
+
+
+# piece values for the static exchange evaluation
+SEE_VALUES = (100, 320, 330, 500, 900, 20000)
+
+
+def see(board, move, values=SEE_VALUES):
+    """
+    Static exchange evaluation of a capture
+
+    Resolves the sequence of captures on the target square, each side
+    recapturing with its least valuable attacker and stopping when that
+    loses material. Sliders behind the capturing pieces are added as
+    the pieces leave the square (x-rays).
+
+    Args:
+        board (Board): current board
+        move (int): packed capturing move of the color to move
+        values (tuple): value of each piecetype
+
+    Returns:
+        int: material won by the color to move, negative if the capture loses
+    """
+    square_from = move & 63
+    square_to = move >> 6 & 63
+    flags = move >> 12
+    bitboards = board.bitboards
+    attacker = board.mailbox[square_from] % 6
+    occupancy = board.all_pieces ^ (1 << square_from)
+
+    if flags == EN_PASSANT:
+        gain = values[0]
+        occupancy ^= 1 << (square_to - 8 if board.to_move else square_to + 8)
+    else:
+        captured = board.mailbox[square_to]
+        gain = values[captured % 6] if captured is not None else 0
+    if flags & PROMOTION:
+        attacker = (flags & 3) + 1
+        gain += values[attacker] - values[0]
+
+    bishops = bitboards[2] | bitboards[8] | bitboards[4] | bitboards[10]
+    rooks = bitboards[3] | bitboards[9] | bitboards[4] | bitboards[10]
+    attackers = ((attackers_to(board, square_to, 0, occupancy)
+                  | attackers_to(board, square_to, 1, occupancy)) & occupancy)
+
+    gains = [gain]
+    on_square = values[attacker]
+    side = 1 - board.to_move
+    while True:
+        side_attackers = attackers & board.all_pieces_color[side]
+        if not side_attackers:
+            break
+        for piece in range(6):
+            candidates = side_attackers & bitboards[6 * side + piece]
+            if candidates:
+                break
+        # the king can not capture a defended piece
+        if piece == 5 and attackers & board.all_pieces_color[1 - side]:
+            break
+        gains.append(on_square - gains[-1])
+        on_square = values[piece]
+        occupancy ^= candidates & -candidates
+        if piece in (0, 2, 4):
+            attackers |= bishop_sliding(square_to, occupancy) & bishops
+        if piece in (3, 4):
+            attackers |= rook_sliding(square_to, occupancy) & rooks
+        attackers &= occupancy
+        side = 1 - side
+
+    # every side may stop capturing when it would lose
+    for depth in range(len(gains) - 1, 0, -1):
+        gains[depth - 1] = -max(-gains[depth - 1], gains[depth])
+    return gains[0]
+
+
+def pinned_pieces(board, king_square, color):
+    """
+    Bitboard of pieces of color pinned to their king
+
+    Args:
+        board (Board): current board
+        king_square (int): index of the square of the king of color
+        color (int): color of the pinned pieces
+
+    Returns:
+        int: bitboard of pinned pieces
+    """
+    bitboards = board.bitboards
+    offset = 6 - 6 * color
+    queens = bitboards[offset + 4]
+    snipers = ((rook_rays[king_square] & (bitboards[offset + 3] | queens))
+               | (bishop_rays[king_square] & (bitboards[offset + 2] | queens)))
+    pinned = 0
+    while snipers:
+        sniper = forward_bit_scan(snipers)
+        blockers = between[king_square][sniper] & board.all_pieces
+        if blockers and not blockers & (blockers - 1):
+            pinned |= blockers & board.all_pieces_color[color]
+        snipers = unset_bit(snipers, sniper)
+    return pinned
+
+
+def generate_legal_moves(board, captures=True, quiets=True):
+    """
+    Generates all legal moves for the color to move.
+
+    Checking pieces, the squares resolving a check and pinned pieces are
+    calculated once, so no move has to be made to test for legality.
+
+    Args:
+        board (Board): current board
+        captures (bool): yield capturing moves (including en passant)
+        quiets (bool): yield non capturing moves (including castling
+                       and promotions without capture)
+
+    yields:
+        moves (int): all moves packed into 16 bit ints
+    """
+    color = board.to_move
+    bitboards = board.bitboards
+    offset = 6 * color
+    own_pieces = board.all_pieces_color[color]
+    opponent_pieces = board.all_pieces_color[1 - color]
+    occupancy = board.all_pieces
+    king_square = forward_bit_scan(bitboards[offset + 5])
+
+    mode_mask = 0
+    if captures:
+        mode_mask |= opponent_pieces
+    if quiets:
+        mode_mask |= ~occupancy & 0xFFFFFFFFFFFFFFFF
+
+    checkers = attackers_to(board, king_square, color, occupancy)
+
+    # king moves, the king itself must not block attacks on its new square
+    king_targets = non_sliding['king'][king_square] & mode_mask
+    occupancy_without_king = unset_bit(occupancy, king_square)
+    while king_targets:
+        square_to = forward_bit_scan(king_targets)
+        if not attackers_to(board, square_to, color, occupancy_without_king):
+            yield king_square | square_to << 6 | (opponent_pieces >> square_to & 1) << 14
+        king_targets = unset_bit(king_targets, square_to)
+
+    # in double check only the king can move
+    if checkers & (checkers - 1):
+        return
+
+    if checkers:
+        check_mask = checkers | between[king_square][forward_bit_scan(checkers)]
+    else:
+        check_mask = 0xFFFFFFFFFFFFFFFF
+        if quiets:
+            if color:
+                if check_white_castle_kingside(board):
+                    yield WHITE_KINGSIDE_CASTLE
+                if check_white_castle_queenside(board):
+                    yield WHITE_QUEENSIDE_CASTLE
+            else:
+                if check_black_castle_kingside(board):
+                    yield BLACK_KINGSIDE_CASTLE
+                if check_black_castle_queenside(board):
+                    yield BLACK_QUEENSIDE_CASTLE
+
+    pinned = pinned_pieces(board, king_square, color)
+    target_mask = mode_mask & check_mask
+
+    # pawns
+    if color:
+        push = 8
+        pawn_capture = non_sliding['pawn white capture']
+        promotion_rank = 0xFF00000000000000
+        double_rank = 0x000000000000FF00
+    else:
+        push = -8
+        pawn_capture = non_sliding['pawn black capture']
+        promotion_rank = 0x00000000000000FF
+        double_rank = 0x00FF000000000000
+
+    pawns = bitboards[offset]
+    while pawns:
+        square_from = forward_bit_scan(pawns)
+        pawns = unset_bit(pawns, square_from)
+        allowed = check_mask
+        if pinned & bitboard_of_index(square_from):
+            allowed &= line[king_square][square_from]
+
+        if captures:
+            targets = pawn_capture[square_from] & opponent_pieces & allowed
+            if targets & promotion_rank:
+                yield from yield_promotion_moveset(square_from, targets, CAPTURE)
+            else:
+                yield from yield_moveset(square_from, targets, CAPTURE)
+
+        square_to = square_from + push
+        if quiets and not get_bit(occupancy, square_to):
+            if get_bit(allowed, square_to):
+                if get_bit(promotion_rank, square_to):
+                    yield from yield_promotion_moveset(square_from, bitboard_of_index(square_to))
+                else:
+                    yield square_from | square_to << 6
+            if (get_bit(double_rank, square_from) and get_bit(allowed, square_to + push)
+                    and not get_bit(occupancy, square_to + push)):
+                yield square_from | (square_to + push) << 6 | DOUBLE_PAWN_PUSH << 12
+
+        # en passant, test the position with both pawns removed
+        if captures and pawn_capture[square_from] & board.en_passant:
+            square_to = forward_bit_scan(board.en_passant)
+            captured_square = square_to - push
+            ep_occupancy = set_bit(unset_bit(unset_bit(occupancy, square_from),
+                                             captured_square), square_to)
+            ep_bitboards = bitboards[6 - offset]
+            bitboards[6 - offset] = unset_bit(ep_bitboards, captured_square)
+            legal = not attackers_to(board, king_square, color, ep_occupancy)
+            bitboards[6 - offset] = ep_bitboards
+            if legal:
+                yield square_from | square_to << 6 | EN_PASSANT << 12
+
+    # knights, a pinned knight can never move
+    knights = bitboards[offset + 1] & ~pinned
+    while knights:
+        square_from = forward_bit_scan(knights)
+        yield from yield_captures_and_quiets(square_from,
+                                             non_sliding['knight'][square_from] & target_mask,
+                                             opponent_pieces)
+        knights = unset_bit(knights, square_from)
+
+    # sliding pieces
+    for piece, sliding in ((2, bishop_sliding), (3, rook_sliding), (4, queen_sliding)):
+        sliders = bitboards[offset + piece]
+        while sliders:
+            square_from = forward_bit_scan(sliders)
+            targets = sliding(square_from, occupancy) & target_mask
+            if pinned & bitboard_of_index(square_from):
+                targets &= line[king_square][square_from]
+            yield from yield_captures_and_quiets(square_from, targets, opponent_pieces)
+            sliders = unset_bit(sliders, square_from)
+
+
+def is_legal_move(board, move):
+    """
+    Check if a packed move is legal in the current position without
+    generating moves, e.g. for moves from the transposition table or killers
+
+    Args:
+        board (Board): current board
+        move (int): packed move
+
+    Returns:
+        bool: True if the move is legal, False otherwise
+    """
+    color = board.to_move
+    square_from = move & 63
+    square_to = move >> 6 & 63
+    flags = move >> 12
+    piece = board.mailbox[square_from]
+    if piece is None or piece // 6 != color or square_from == square_to:
+        return False
+    piece -= 6 * color
+    target = board.mailbox[square_to]
+    to_bitboard = bitboard_of_index(square_to)
+
+    if color:
+        push = 8
+        pawn_capture = non_sliding['pawn white capture']
+        promotion_rank = 0xFF00000000000000
+        double_rank = 0x000000000000FF00
+    else:
+        push = -8
+        pawn_capture = non_sliding['pawn black capture']
+        promotion_rank = 0x00000000000000FF
+        double_rank = 0x00FF000000000000
+
+    # castling checks all squares of the king itself
+    if flags == KING_CASTLE or flags == QUEEN_CASTLE:
+        if color:
+            return ((move == WHITE_KINGSIDE_CASTLE and check_white_castle_kingside(board))
+                    or (move == WHITE_QUEENSIDE_CASTLE and check_white_castle_queenside(board)))
+        return ((move == BLACK_KINGSIDE_CASTLE and check_black_castle_kingside(board))
+                or (move == BLACK_QUEENSIDE_CASTLE and check_black_castle_queenside(board)))
+
+    if flags == EN_PASSANT:
+        if piece != 0 or not board.en_passant & to_bitboard & pawn_capture[square_from]:
+            return False
+        return not board.in_check_after_move(move)
+
+    if flags & CAPTURE:
+        if target is None or target // 6 == color:
+            return False
+    elif target is not None:
+        return False
+
+    if piece == 0:
+        if flags & PROMOTION:
+            if not to_bitboard & promotion_rank:
+                return False
+        elif to_bitboard & promotion_rank or flags & 3 and flags != DOUBLE_PAWN_PUSH:
+            return False
+        if flags & CAPTURE:
+            possible = pawn_capture[square_from] & to_bitboard
+        elif flags == DOUBLE_PAWN_PUSH:
+            possible = (get_bit(double_rank, square_from) and square_to == square_from + 2 * push
+                        and board.mailbox[square_from + push] is None)
+        else:
+            possible = square_to == square_from + push
+    else:
+        if flags & ~CAPTURE:
+            return False
+        if piece == 1:
+            attacks = non_sliding['knight'][square_from]
+        elif piece == 2:
+            attacks = bishop_sliding(square_from, board.all_pieces)
+        elif piece == 3:
+            attacks = rook_sliding(square_from, board.all_pieces)
+        elif piece == 4:
+            attacks = queen_sliding(square_from, board.all_pieces)
+        else:
+            attacks = non_sliding['king'][square_from]
+        possible = attacks & to_bitboard
+
+    if not possible:
+        return False
+    return not board.in_check_after_move(move)
+
+
 def check_piece_move(move, board):
     """
     Check if move for piece is valid
@@ -841,32 +1272,51 @@ def check_piece_move(move, board):
     return False
 
 
-def color_in_check(board):
+def color_in_check(board, color=None):
     """
     checks if color to move is in check.
 
+    Args:
+        board (Board): current board
+        color (int): color to check, defaults to the color to move
+
     Returns:
         bool: True if color to move is in check, False otherwise
     """
-    king_square = forward_bit_scan(board.pieces[board.to_move][5])
+    if color is None:
+        color = board.to_move
+    king_square = forward_bit_scan(board.bitboards[6 * color + 5])
+    return square_attacked(board, king_square, color)
 
-    opponent_color = 1 - board.to_move
 
-    if non_sliding['king'][king_square] & board.pieces[opponent_color][5]:
-        return True
-    if non_sliding['knight'][king_square] & board.pieces[opponent_color][1]:
+def square_attacked(board, square, color):
+    """
+    checks if a square is attacked by the opponent of color
+
+    Args:
+        board (Board): current board
+        square (int): index of the square to check
+        color (int): color that gets attacked
+
+    Returns:
+        bool: True if an opponent piece attacks the square, False otherwise
+    """
+    bitboards = board.bitboards
+    offset = 6 - 6 * color
+
+    if non_sliding['king'][square] & bitboards[offset + 5]:
         return True
-    if bishop_sliding(king_square, board.all_pieces) & board.pieces[opponent_color][2]:
+    if non_sliding['knight'][square] & bitboards[offset + 1]:
         return True
-    if rook_sliding(king_square, board.all_pieces) & board.pieces[opponent_color][3]:
+    if bishop_sliding(square, board.all_pieces) & (bitboards[offset + 2] | bitboards[offset + 4]):
         return True
-    if queen_sliding(king_square, board.all_pieces) & board.pieces[opponent_color][4]:
+    if rook_sliding(square, board.all_pieces) & (bitboards[offset + 3] | bitboards[offset + 4]):
         return True
-    if board.to_move:
-        if non_sliding['pawn white capture'][king_square] & board.pieces[opponent_color][0]:
+    if color:
+        if non_sliding['pawn white capture'][square] & bitboards[offset]:
             return True
     else:
-        if non_sliding['pawn black capture'][king_square] & board.pieces[opponent_color][0]:
+        if non_sliding['pawn black capture'][square] & bitboards[offset]:
             return True
     return False
 
@@ -882,29 +1332,14 @@ def check_white_castle_kingside(board):
         bool: if castling is possible
     """
 
-    if not board.castling_rights['white kingside']:
+    if not board.castling & WHITE_KINGSIDE:
         return False
 
     if get_bit(board.all_pieces, 5) == 1 or get_bit(board.all_pieces, 6) == 1:
         return False
 
-    if board.in_check():
-        return False
-
-    tmp_board = board.board_copy()
-
-    for i in [5, 6]:
-
-        tmp_board.pieces[1][5] = unset_bit(tmp_board.pieces[1][5], i-1)
-        tmp_board.pieces[1][5] = set_bit(tmp_board.pieces[1][5], i)
-
-        tmp_board.all_pieces = unset_bit(tmp_board.all_pieces, i-1)
-        tmp_board.all_pieces = set_bit(tmp_board.all_pieces, i)
-
-        tmp_board.all_pieces_color[1] = unset_bit(tmp_board.all_pieces_color[1], i-1)
-        tmp_board.all_pieces_color[1] = set_bit(tmp_board.all_pieces_color[1], i)
-
-        if tmp_board.in_check():
+    for i in [4, 5, 6]:
+        if square_attacked(board, i, 1):
             return False
 
     return True
@@ -921,28 +1356,14 @@ def check_white_castle_queenside(board):
         bool: if castling is possible
     """
 
-    if not board.castling_rights['white queenside']:
+    if not board.castling & WHITE_QUEENSIDE:
         return False
 
     if get_bit(board.all_pieces, 3) == 1 or get_bit(board.all_pieces, 2) == 1 or get_bit(board.all_pieces, 1) == 1:
         return False
 
-    if board.in_check():
-        return False
-
-    tmp_board = board.board_copy()
-
-    for i in [3, 2]:
-        tmp_board.pieces[1][5] = unset_bit(tmp_board.pieces[1][5], i+1)
-        tmp_board.pieces[1][5] = set_bit(tmp_board.pieces[1][5], i)
-
-        tmp_board.all_pieces = unset_bit(tmp_board.all_pieces, i+1)
-        tmp_board.all_pieces = set_bit(tmp_board.all_pieces, i)
-
-        tmp_board.all_pieces_color[1] = unset_bit(tmp_board.all_pieces_color[1], i+1)
-        tmp_board.all_pieces_color[1] = set_bit(tmp_board.all_pieces_color[1], i)
-
-        if tmp_board.in_check():
+    for i in [4, 3, 2]:
+        if square_attacked(board, i, 1):
             return False
 
     return True
@@ -958,29 +1379,14 @@ def check_black_castle_kingside(board):
     Returns:
         bool: if castling is possible
     """
-    if not board.castling_rights['black kingside']:
+    if not board.castling & BLACK_KINGSIDE:
         return False
 
     if get_bit(board.all_pieces, 61) == 1 or get_bit(board.all_pieces, 62) == 1:
         return False
 
-    if board.in_check():
-        return False
-
-    tmp_board = board.board_copy()
-
-    for i in [61, 62]:
-
-        tmp_board.pieces[0][5] = unset_bit(tmp_board.pieces[0][5], i-1)
-        tmp_board.pieces[0][5] = set_bit(tmp_board.pieces[0][5], i)
-
-        tmp_board.all_pieces = unset_bit(tmp_board.all_pieces, i-1)
-        tmp_board.all_pieces = set_bit(tmp_board.all_pieces, i)
-
-        tmp_board.all_pieces_color[0] = unset_bit(tmp_board.all_pieces_color[0], i-1)
-        tmp_board.all_pieces_color[0] = set_bit(tmp_board.all_pieces_color[0], i)
-
-        if tmp_board.in_check():
+    for i in [60, 61, 62]:
+        if square_attacked(board, i, 0):
             return False
 
     return True
@@ -996,29 +1402,14 @@ def check_black_castle_queenside(board):
     Returns:
         bool: if castling is possible
     """
-    if not board.castling_rights['black queenside']:
+    if not board.castling & BLACK_QUEENSIDE:
         return False
 
     if get_bit(board.all_pieces, 59) == 1 or get_bit(board.all_pieces, 58) == 1 or get_bit(board.all_pieces, 57) == 1:
         return False
 
-    if board.in_check():
-        return False
-
-    tmp_board = board.board_copy()
-
-    for i in [59, 58]:
-
-        tmp_board.pieces[0][5] = unset_bit(tmp_board.pieces[0][5], i+1)
-        tmp_board.pieces[0][5] = set_bit(tmp_board.pieces[0][5], i)
-
-        tmp_board.all_pieces = unset_bit(tmp_board.all_pieces, i+1)
-        tmp_board.all_pieces = set_bit(tmp_board.all_pieces, i)
-
-        tmp_board.all_pieces_color[0] = unset_bit(tmp_board.all_pieces_color[0], i+1)
-        tmp_board.all_pieces_color[0] = set_bit(tmp_board.all_pieces_color[0], i)
-
-        if tmp_board.in_check():
+    for i in [60, 59, 58]:
+        if square_attacked(board, i, 0):
             return False
 
     return True
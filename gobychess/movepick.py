@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""
+Staged move ordering for the search
+"""
+
+from . import movegen as mvg
+from .utils import EN_PASSANT, NO_MOVE
+
+
+class MovePicker:
+    """
+    Yields the legal moves of a position in the order
+
+        1. move from the transposition table
+        2. captures that do not lose material, ordered by most valuable
+           victim / least valuable attacker
+        3. killer moves
+        4. remaining quiet moves ordered by the history heuristic
+        5. captures losing material by static exchange evaluation
+
+    Every stage is only generated when the moves before did not cut off,
+    the hash move and killers are checked for legality instead.
+    """
+
+    def __init__(self, board, tt_move=NO_MOVE, killers=(), quiets=True, history=None,
+                 losing_captures=True):
+        """
+        Args:
+            board (Board): position to pick moves for
+            tt_move (int): best move from the transposition table
+            killers (list): quiet moves that caused a cutoff at the same ply
+            quiets (bool): also yield non capturing moves
+            history (list): history scores of the color to move indexed by
+                            from and to square of a move (move & 4095)
+            losing_captures (bool): also yield captures with negative exchange
+        """
+        self.board = board
+        self.tt_move = tt_move
+        self.killers = killers
+        self.quiets = quiets
+        self.history = history
+        self.losing_captures = losing_captures
+
+    def __iter__(self):
+        board = self.board
+        tt_move = self.tt_move
+
+        if tt_move and (self.quiets or tt_move >> 14 & 1) and mvg.is_legal_move(board, tt_move):
+            yield tt_move
+
+        captures = []
+        losing = []
+        for move in mvg.generate_legal_moves(board, quiets=False):
+            if move == tt_move:
+                continue
+            exchange = self.exchange(move)
+            if exchange < 0:
+                losing.append((exchange, move))
+            else:
+                captures.append(move)
+        # SEE only splits off the losing captures. The others stay in MVV-LVA
+        # order: exchange() skips the swap when the attacker is worth at most
+        # the victim, so their SEE is mostly unknown, and a full SEE of every
+        # capture costs more than it improves the order
+        captures.sort(key=self.mvv_lva, reverse=True)
+        yield from captures
+
+        if not self.quiets:
+            if self.losing_captures:
+                losing.sort(reverse=True)
+                yield from (move for _, move in losing)
+            return
+
+        killers = []
+        for killer in self.killers:
+            if killer and killer != tt_move and mvg.is_legal_move(board, killer):
+                killers.append(killer)
+                yield killer
+
+        quiets = [move for move in mvg.generate_legal_moves(board, captures=False)
+                  if move != tt_move and move not in killers]
+        if self.history is not None:
+            history = self.history
+            quiets.sort(key=lambda move: history[move & 4095], reverse=True)
+        yield from quiets
+
+        if self.losing_captures:
+            losing.sort(reverse=True)
+            yield from (move for _, move in losing)
+
+    def exchange(self, move):
+        """
+        static exchange evaluation of a capture, only calculated if the
+        attacker is worth more than the victim, otherwise 0
+
+        Args:
+            move (int): packed capturing move
+
+        Returns:
+            int: material won, negative for losing captures
+        """
+        mailbox = self.board.mailbox
+        attacker = mailbox[move & 63] % 6
+        captured = mailbox[move >> 6 & 63]
+        victim = captured % 6 if captured is not None else 0
+        if attacker == 5 or (mvg.SEE_VALUES[attacker] <= mvg.SEE_VALUES[victim] and not move >> 15):
+            return 0
+        return mvg.see(self.board, move)
+
+    def mvv_lva(self, move):
+        """
+        score of a capture, higher for more valuable victims and
+        less valuable attackers
+
+        Args:
+            move (int): packed capturing move
+
+        Returns:
+            int: ordering score
+        """
+        if move >> 12 == EN_PASSANT:
+            victim = 0
+        else:
+            victim = self.board.mailbox[move >> 6 & 63] % 6
+        attacker = self.board.mailbox[move & 63] % 6
+        return 8 * victim - attacker
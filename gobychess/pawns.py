@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+"""
+Pawn structure evaluation with a hash table keyed by the pawn zobrist key
+
+Doubled, isolated, backward and passed pawns are found with masks of
+files, adjacent files and the squares in front of a pawn. The result only
+depends on the pawns, so it is cached by Board.pawn_hash.
+"""
+
+from array import array
+
+from .utils import gen_ones
+
+# (midgame, endgame) penalties per pawn
+DOUBLED = (-10, -20)
+ISOLATED = (-10, -15)
+BACKWARD = (-8, -10)
+# bonus for passed pawns by rank seen from the pawn's color
+PASSED = ((0, 0), (5, 10), (10, 20), (15, 35), (25, 60), (40, 100), (70, 150), (0, 0))
+
+FILES = [0x0101010101010101 << file for file in range(8)]
+ADJACENT_FILES = [(FILES[file - 1] if file > 0 else 0) | (FILES[file + 1] if file < 7 else 0)
+                  for file in range(8)]
+
+
+def generate_spans():
+    """
+    Generate masks of the ranks in front of and behind every square
+
+    Returns:
+        front (list): front[color][square] squares on the same file in front
+        passed (list): passed[color][square] squares on the same and adjacent
+                       files in front, no enemy pawn there means a passed pawn
+        support (list): support[color][square] squares on adjacent files on the
+                        same rank or behind, where own pawns can defend the pawn
+    """
+    front = [[0] * 64, [0] * 64]
+    passed = [[0] * 64, [0] * 64]
+    support = [[0] * 64, [0] * 64]
+    for square in range(64):
+        file, rank = square % 8, square // 8
+        # ranks below for black and above for white
+        ahead = [sum(0xFF << (8 * r) for r in range(rank)),
+                 sum(0xFF << (8 * r) for r in range(rank + 1, 8))]
+        for color in range(2):
+            front[color][square] = ahead[color] & FILES[file]
+            passed[color][square] = ahead[color] & (FILES[file] | ADJACENT_FILES[file])
+            support[color][square] = ~ahead[color] & ADJACENT_FILES[file] & 0xFFFFFFFFFFFFFFFF
+    return front, passed, support
+
+
+front_spans, passed_spans, support_spans = generate_spans()
+
+
+def pawn_attacks(pawns, color):
+    """
+    Bitboard of squares attacked by pawns of color
+    """
+    if color:
+        return ((pawns & ~FILES[0]) << 7 | (pawns & ~FILES[7]) << 9) & 0xFFFFFFFFFFFFFFFF
+    return (pawns & ~FILES[0]) >> 9 | (pawns & ~FILES[7]) >> 7
+
+
+def pawn_structure(white_pawns, black_pawns):
+    """
+    Evaluate the pawn structure
+
+    Args:
+        white_pawns (int): bitboard of white pawns
+        black_pawns (int): bitboard of black pawns
+
+    Returns:
+        tuple: (midgame, endgame) score from white's view
+    """
+    score = [0, 0]
+    pawns = (black_pawns, white_pawns)
+    for color in range(2):
+        own, enemy = pawns[color], pawns[1 - color]
+        enemy_attacks = pawn_attacks(enemy, 1 - color)
+        sign = 1 if color else -1
+        for square in gen_ones(own):
+            file = square % 8
+            terms = []
+            if front_spans[color][square] & own:
+                terms.append(DOUBLED)
+            if not ADJACENT_FILES[file] & own:
+                terms.append(ISOLATED)
+            elif not support_spans[color][square] & own:
+                stop = square + 8 if color else square - 8
+                if enemy_attacks >> stop & 1:
+                    terms.append(BACKWARD)
+            # the rear pawn of doubled pawns is not passed
+            if not passed_spans[color][square] & enemy and not front_spans[color][square] & own:
+                terms.append(PASSED[square // 8 if color else 7 - square // 8])
+            for midgame, endgame in terms:
+                score[0] += sign * midgame
+                score[1] += sign * endgame
+    return score[0], score[1]
+
+
+# bytes per entry: key 8, midgame and endgame score 4 each
+ENTRY_SIZE = 16
+
+
+class PawnTable:
+    """
+    Cache of pawn structure scores with a fixed size in MB
+
+    Every pawn key has one slot given by its lower bits, new entries
+    always replace old ones. Hits and misses are counted.
+    """
+
+    def __init__(self, size_mb=1):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """
+        Allocate a new empty table
+
+        Args:
+            size_mb (int): size of the table in MB
+        """
+        entries = max(1, size_mb * 1024 * 1024 // ENTRY_SIZE)
+        # round number of entries down to a power of two
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self.clear()
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters
+        """
+        # key 0 has no pawns, which scores 0
+        self.keys = array('Q', [0]) * self.size
+        self.scores = array('i', [0]) * self.size
+        self.eg_scores = array('i', [0]) * self.size
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, board):
+        """
+        Pawn structure score of a position, calculated on a miss
+
+        Args:
+            board (Board): board with position to evaluate
+
+        Returns:
+            tuple: (midgame, endgame) score from white's view
+        """
+        key = board.pawn_hash
+        index = key & self.mask
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.scores[index], self.eg_scores[index]
+        self.misses += 1
+        score, eg_score = pawn_structure(board.bitboards[6], board.bitboards[0])
+        self.keys[index] = key
+        self.scores[index] = score
+        self.eg_scores[index] = eg_score
+        return score, eg_score
+
+    def hit_rate(self):
+        """
+        Returns:
+            float: share of probes that found an entry
+        """
+        return self.hits / max(self.hits + self.misses, 1)
@@ -2,7 +2,7 @@
 
 from .board import Board
 from .search import Searcher
-from .utils import index_of_square, san_from_move
+from .utils import move_from_san, san_from_move
 
 
 def play_game():
@@ -19,12 +19,7 @@ def play_game():
         print("You are white, lets go!")
         move_input = input("Enter move (from to promotion): ")
         move_input = move_input.split()
-        print(int(index_of_square(move_input[0])), type(int(index_of_square(move_input[0]))))
-        print(int(index_of_square(move_input[1])), type(int(index_of_square(move_input[1]))))
-
-        move = (int(index_of_square(move_input[0])),
-                int(index_of_square(move_input[1])),
-                None)
+        move = move_from_san("".join(move_input), board)
 
         board.make_move(move)
     else:
@@ -53,12 +48,7 @@ def play_game():
 
         move_input = input("Enter move (from to promotion): ")
         move_input = move_input.split()
-        print(int(index_of_square(move_input[0])), type(int(index_of_square(move_input[0]))))
-        print(int(index_of_square(move_input[1])), type(int(index_of_square(move_input[1]))))
-
-        move = (int(index_of_square(move_input[0])),
-                int(index_of_square(move_input[1])),
-                None)
+        move = move_from_san("".join(move_input), board)
 
         board.make_move(move)
 
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+"""
+Root splitting: the moves of a fixed depth search in a process pool
+
+The first root move is searched in the main process to get a bound. All
+other root moves are searched in parallel with a null window around it,
+the moves that fail high are searched again with an open window. Every
+search starts from a cleared searcher, so unlike Lazy SMP the result does
+not depend on the timing of the processes.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .board import Board
+from .evaluation import Evaluator
+from .movegen import is_legal_move
+from .movepick import MovePicker
+from .search import INFINITY, SearchAborted, Searcher
+from .utils import NO_MOVE
+
+# seconds between two checks of the stop flag while waiting for the pool
+POLL_INTERVAL = 0.005
+
+# searcher of a pool process, created by init_worker
+worker_searcher = None
+
+
+def encode_board(board):
+    """
+    Compact encoding of a position for the pool processes
+
+    Only the hashes since the last irreversible move are needed to find
+    repetitions.
+
+    Returns:
+        tuple: (fen, hashes of the earlier positions)
+    """
+    return board.to_fen(), board.hash_history[len(board.hash_history) - board.halfmove_clock:]
+
+
+def decode_board(encoding):
+    """
+    Board of a position encoded with encode_board
+    """
+    fen, hash_history = encoding
+    board = Board()
+    board.from_fen(fen)
+    board.hash_history = list(hash_history)
+    return board
+
+
+def init_worker():
+    """
+    Create the searcher of a pool process
+    """
+    global worker_searcher
+    worker_searcher = Searcher(Evaluator(), manage_time=False, hash_size=1)
+
+
+def search_root_move(encoding, move, depth, alpha, beta, settings, hash_size):
+    """
+    Search one root move in a pool process
+
+    Args:
+        encoding (tuple): root position from encode_board
+        move (int): root move to search
+        depth (int): depth of the root
+        alpha, beta (int): window at the root
+        settings (tuple): settings of the evaluator from Evaluator.settings
+        hash_size (int): size of the transposition table in MB
+
+    Returns:
+        tuple: (score of the move for the color to move at the root, nodes)
+    """
+    searcher = worker_searcher
+    searcher.evaluator.load_settings(settings)
+    if searcher.ttable.size_mb != hash_size:
+        searcher.ttable.resize(hash_size)
+
+    board = decode_board(encoding)
+    board.make_generated_move(move)
+    searcher.clear()
+    searcher.nodes = 0
+    score = -searcher.s__negascout_tt(board, depth - 1, -beta, -alpha, False, 1)
+    return score, searcher.nodes
+
+
+class RootSplitter:
+    """
+    Fixed depth search that splits the root moves between processes
+
+    The search in the main process uses the given searcher, for example
+    with its aim_depth. The root moves are ordered by a serial iterative
+    deepening search two plies shallower. A stop aborts the search in the
+    main process, pool processes finish their running searches. The pool
+    processes use the evaluator settings and the hash size of the searcher.
+    """
+
+    def __init__(self, searcher, workers=2):
+        """
+        Args:
+            searcher (Searcher): searcher of the main process
+            workers (int): number of pool processes
+        """
+        self.searcher = searcher
+        self.workers = workers
+        # futures of the running search
+        self.futures = []
+        self.pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=init_worker)
+
+    def close(self):
+        """
+        Shut down the pool processes, searches not started yet are dropped
+        """
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in self.futures:
+            future.cancel()
+        self.pool.shutdown()
+
+    def search(self, board, depth):
+        """
+        Search the position to a fixed depth
+
+        Args:
+            board (Board): root position
+            depth (int): depth of the search
+
+        Returns:
+            int: score of the root for the color to move
+        """
+        start_time = time.time()
+        searcher = self.searcher
+        searcher.clear()
+        searcher.ttable.new_search()
+        searcher.next_check = 0
+        searcher.best_move = NO_MOVE
+        searcher.evaluation = 0
+        root_depth = len(board.undo_stack)
+        self.futures = []
+        try:
+            score = self.split(board, depth, self.futures)
+        except SearchAborted:
+            searcher.take_back(board, root_depth)
+            for future in self.futures:
+                future.cancel()
+            score = searcher.evaluation
+            if not is_legal_move(board, searcher.best_move):
+                searcher.best_move = next(board.gen_legal_moves(), NO_MOVE)
+        searcher.report_iteration(board, depth, score, time.time() - start_time)
+        return score
+
+    def split(self, board, depth, futures):
+        """
+        Search the first root move in this process and the others in the pool
+
+        Args:
+            board (Board): root position
+            depth (int): depth of the search
+            futures (list): gets the futures of the pool searches
+
+        Returns:
+            int: score of the root for the color to move
+        """
+        searcher = self.searcher
+        searcher.nodes = 0
+        nodes = 0
+        for iteration in range(1, depth - 1):
+            searcher.s__negascout_tt(board, iteration, -INFINITY, INFINITY)
+        nodes += searcher.nodes
+        tt_lookup = searcher.ttable.probe(board.hash)
+        moves = list(MovePicker(board, tt_lookup[3] if tt_lookup else NO_MOVE,
+                                history=searcher.history[board.to_move]))
+        if not moves:
+            searcher.best_move = NO_MOVE
+            searcher.evaluation = searcher.terminal_score(board, 0)
+            return searcher.evaluation
+
+        # the first move gives the bound for the others
+        searcher.nodes = 0
+        board.make_generated_move(moves[0])
+        alpha = -searcher.s__negascout_tt(board, depth - 1, -INFINITY, INFINITY, False, 1)
+        board.unmake_move()
+        nodes += searcher.nodes
+        searcher.best_move = moves[0]
+        searcher.evaluation = alpha
+
+        encoding = encode_board(board)
+        settings = searcher.evaluator.settings()
+        hash_size = searcher.ttable.size_mb
+        bound = alpha
+        futures += [self.pool.submit(search_root_move, encoding, move, depth, bound, bound + 1,
+                                     settings, hash_size)
+                    for move in moves[1:]]
+
+        # results are used in move order to be independent of the timing
+        for move, future in zip(moves[1:], futures):
+            while not future.done():
+                if searcher.stop_event.wait(POLL_INTERVAL):
+                    raise SearchAborted
+            score, move_nodes = future.result()
+            nodes += move_nodes
+            if score <= bound:
+                continue
+            # fail high, only a lower bound of the score is known
+            searcher.nodes = 0
+            board.make_generated_move(move)
+            score = -searcher.s__negascout_tt(board, depth - 1, -INFINITY, -alpha, False, 1)
+            board.unmake_move()
+            nodes += searcher.nodes
+            if score > alpha:
+                alpha = score
+                searcher.best_move = move
+                searcher.evaluation = alpha
+
+        searcher.nodes = nodes
+        return alpha
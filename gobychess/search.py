@@ -1,10 +1,96 @@
 #!/usr/bin/env python3
 
 from .evaluation import Evaluator
-from .utils import move_from_san, san_from_move
-from .ttable import ttable, board_entry
+from .movegen import is_legal_move
+from .movepick import MovePicker
+from .utils import NO_MOVE, move_from_san, san_from_move
+from .ttable import EXACT, LOWER, UPPER, TranspositionTable
+import math
+import threading
 import time
 
+MAX_PLY = 128
+MAX_DEPTH = 40
+INFINITY = 100000000
+
+# score of being mated at the root, mate in n plies scores MATE_SCORE - n
+MATE_SCORE = 50000
+MATE_BOUND = MATE_SCORE - MAX_PLY
+
+# half width of the first aspiration window, doubled after every fail
+ASPIRATION_WINDOW = 50
+
+# null move pruning searches depth - 1 - R after passing the turn,
+# R grows by one above NULL_MOVE_DEEP and the cutoff is verified
+# with a normal search from NULL_MOVE_VERIFY on
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_DEEP = 6
+NULL_MOVE_VERIFY = 8
+
+# late quiet moves are searched with reduced depth from LMR_MIN_DEPTH on,
+# the first LMR_FULL_MOVES moves of a node are always searched fully
+LMR_MIN_DEPTH = 3
+LMR_FULL_MOVES = 3
+# reduction indexed by depth and move number
+LMR_TABLE = [[0] + [int(0.5 + math.log(depth) * math.log(number) / 2) if depth else 0
+                    for number in range(1, 64)]
+             for depth in range(MAX_DEPTH + 1)]
+
+# history scores saturate at this value
+HISTORY_MAX = 16384
+
+# nodes between two checks of the clock
+CHECK_INTERVAL = 1024
+# time in ms kept back for the communication with the gui
+MOVE_OVERHEAD = 30
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside the search when a time or node limit is reached
+    """
+
+
+def score_to_tt(score, ply):
+    """
+    mate scores are stored relative to the position instead of the root
+    """
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    """
+    convert a stored mate score back to the distance from the root
+    """
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def uci_score(score):
+    """
+    score for the uci info line, mates are given in moves
+
+    Args:
+        score (int): score of the color to move at the root
+
+    Returns:
+        string: 'cp <centipawns>' or 'mate <moves>', negative if getting mated
+    """
+    if score >= MATE_BOUND:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"mate {-((MATE_SCORE + score) // 2)}"
+    return f"cp {int(score)}"
+
+
 class Searcher:
     """
     Searcher Object can execute different searches with given settings
@@ -17,17 +103,32 @@ class Searcher:
     and maximize it otherwise.
     """
 
-    def __init__(self, evaluator, aim_depth=0, manage_time=True):
+    def __init__(self, evaluator, aim_depth=0, manage_time=True, hash_size=16):
         self.evaluator = evaluator
+        self.ttable = TranspositionTable(hash_size)
         self.manage_time = manage_time
-        self.best_move = (None, None, None)
+        self.best_move = NO_MOVE
         self.evaluation = 0
-        self.past_positions = set()
         self.aim_depth = aim_depth
         self.wtime = 60000
         self.btime = 60000
         self.winc = 0
         self.binc = 0
+        self.killers = [[NO_MOVE, NO_MOVE] for _ in range(MAX_PLY)]
+        # history[color][from + 64 * to] of quiet moves
+        self.history = [[0] * 4096, [0] * 4096]
+        self.nodes = 0
+        self.next_check = CHECK_INTERVAL
+        self.fail_lows = 0
+        self.fail_highs = 0
+        self.node_limit = None
+        self.soft_deadline = None
+        self.hard_deadline = None
+        # set from another thread to stop the search
+        self.stop_event = threading.Event()
+        self.pondering = False
+        self.ponder_limits = ()
+        self.use_lmr = True
 
     def update_depth(self, to_move, moves_played):
         """
@@ -48,10 +149,89 @@ class Searcher:
             else:
                 self.aim_depth = 3
 
-    def quiescence(self, board, alpha, beta):
+    def store_killer(self, move, ply):
+        """
+        remember a quiet move that caused a beta cutoff at ply
+        """
+        if move >> 14 & 1:
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+    def update_history(self, board, move, depth, quiets_tried=()):
+        """
+        reward a quiet move that caused a beta cutoff and punish the quiet
+        moves searched before it, deeper cutoffs count more
+
+        Args:
+            board (Board): position of the cutoff
+            move (int): move that caused the cutoff
+            depth (int): remaining depth of the cutoff
+            quiets_tried (list): quiet moves searched before without cutoff
+        """
+        if move >> 14 & 1:
+            return
+        history = self.history[board.to_move]
+        bonus = depth * depth
+        # the gravity term keeps the scores within +-HISTORY_MAX
+        index = move & 4095
+        history[index] += bonus - history[index] * bonus // HISTORY_MAX
+        for quiet in quiets_tried:
+            index = quiet & 4095
+            history[index] -= bonus + history[index] * bonus // HISTORY_MAX
+
+    def age_history(self):
+        """
+        halve the history scores and clear the killers before a new search
+        """
+        for history in self.history:
+            history[:] = [score // 2 for score in history]
+        for killers in self.killers:
+            killers[0] = killers[1] = NO_MOVE
+
+    def clear(self):
+        """
+        forget everything learned in earlier searches, afterwards a search
+        gives the same result as with a new searcher
+        """
+        self.ttable.clear()
+        for history in self.history:
+            history[:] = [0] * 4096
+        for killers in self.killers:
+            killers[0] = killers[1] = NO_MOVE
+
+    def quiescence(self, board, alpha, beta, ply=0):
         """
         Quiecent search
+
+        In check all evasions are searched instead of standing pat,
+        without any evasion the color to move is mated. Checks answered
+        by checks end at a repetition or at MAX_PLY.
         """
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+
+        if ply < MAX_PLY and board.in_check():
+            if board.is_repetition():
+                return 0
+            mated = True
+            for move in MovePicker(board):
+                mated = False
+                board.make_generated_move(move)
+                score = -self.quiescence(board, -beta, -alpha, ply + 1)
+                board.unmake_move()
+
+                if score >= beta:
+                    return beta
+                if score > alpha:
+                    alpha = score
+            if mated:
+                return max(alpha, -MATE_SCORE + ply)
+            return alpha
+
         stand_pat = (-1)**(1 - board.to_move) * self.evaluator.weighted_piece_scores(board)
 
         if(stand_pat >= beta):
@@ -64,10 +244,11 @@ class Searcher:
         if(alpha < stand_pat):
             alpha = stand_pat
 
-        for move in sorted(board.gen_quiet_moves(), key=lambda move: self.evaluator.eval_move(board, move)):
-            new_board = board.board_copy()
-            new_board = new_board.make_generated_move(move)
-            score = -self.quiescence(new_board, -beta, -alpha)
+        # captures losing material are pruned
+        for move in MovePicker(board, quiets=False, losing_captures=False):
+            board.make_generated_move(move)
+            score = -self.quiescence(board, -beta, -alpha, ply + 1)
+            board.unmake_move()
 
             if(score >= beta):
                 return beta
@@ -77,122 +258,444 @@ class Searcher:
         return alpha
 
 
-    def search_iter(self, board):
-        MAXDEPTH = 40
-        depth = 1
+    def late_move_reduction(self, board, depth, move, move_number, in_check):
+        """
+        depth reduction of a move, called after the move was made
+
+        Only quiet moves that come late in the ordering, are not made in
+        check and do not give check get reduced. At least one ply is left.
+
+        Args:
+            board (Board): position after the move
+            depth (int): remaining depth before the move
+            move (int): the move
+            move_number (int): position of the move in the move ordering, from 1
+            in_check (bool): if the color that made the move was in check
+
+        Returns:
+            int: plies to reduce the search of the move
+        """
+        if (not self.use_lmr or depth < LMR_MIN_DEPTH or move_number <= LMR_FULL_MOVES
+                or move >> 14 or in_check or board.in_check()):
+            return 0
+        return min(LMR_TABLE[min(depth, MAX_DEPTH)][min(move_number, 63)], depth - 2)
+
+    def null_move_allowed(self, board, depth, ply, allow_null):
+        """
+        check if null move pruning is safe at a node
+
+        Not at the root, right after another null move, in check, or if the
+        color to move has only pawns left, where zugzwang is common.
+        """
+        if not allow_null or not ply or depth < NULL_MOVE_MIN_DEPTH:
+            return False
+        color = board.to_move
+        pieces = board.all_pieces_color[color] & ~(board.bitboards[6 * color]
+                                                   | board.bitboards[6 * color + 5])
+        return bool(pieces) and not board.in_check()
+
+    def null_move_cutoff(self, board, depth, beta, ply, search):
+        """
+        pass the turn and search with reduced depth, if the position is
+        still good enough for a cutoff, a real move will be as well
+
+        Args:
+            board (Board): position of the node
+            depth (int): remaining depth of the node
+            beta (int): upper bound of the node
+            ply (int): distance to the root
+            search (method): search to use, called like s__negascout_tt
+
+        Returns:
+            bool: True if the node fails high
+        """
+        reduction = NULL_MOVE_REDUCTION + (depth > NULL_MOVE_DEEP)
+        board.make_null_move()
+        score = -search(board, max(depth - 1 - reduction, 0), -beta, -beta + 1, False, ply + 1, False)
+        board.unmake_null_move()
+        if score < beta:
+            return False
+        if depth >= NULL_MOVE_VERIFY:
+            # verification search without null moves against zugzwang
+            return search(board, depth - reduction, beta - 1, beta, False, ply, False) >= beta
+        return True
+
+    def check_limits(self):
+        """
+        abort the search if it was stopped or the node limit or the hard deadline is reached
+        """
+        if self.stop_event.is_set():
+            raise SearchAborted
+        if self.node_limit and self.nodes >= self.node_limit:
+            raise SearchAborted
+        if self.hard_deadline and time.time() >= self.hard_deadline:
+            raise SearchAborted
+        self.next_check = self.nodes + CHECK_INTERVAL
+        if self.node_limit:
+            self.next_check = min(self.next_check, self.node_limit)
+
+    def set_deadlines(self, board, movetime=None, wtime=None, btime=None,
+                      winc=0, binc=0, movestogo=None):
+        """
+        set soft and hard deadline of the search
+
+        no new iteration is started after the soft deadline,
+        the running iteration is aborted at the hard deadline.
+
+        Args:
+            board (Board): root position
+            movetime (int): exact time for the move in ms
+            wtime, btime (int): remaining time of white and black in ms
+            winc, binc (int): increments in ms
+            movestogo (int): moves until the next time control
+        """
+        start = time.time()
+        if movetime is not None:
+            self.soft_deadline = self.hard_deadline = start + max(movetime - MOVE_OVERHEAD, 1) / 1000
+            return
+
+        time_left = wtime if board.to_move else btime
+        increment = winc if board.to_move else binc
+        if time_left is None:
+            self.soft_deadline = self.hard_deadline = None
+            return
+
+        if not movestogo:
+            movestogo = max(30 - board.fullmove_counter, 10)
+        # never use more than half of the remaining time
+        budget = max(time_left - MOVE_OVERHEAD, 1) / 1000
+        target = min(budget / movestogo + (increment or 0) / 1000, budget / 2)
+        self.soft_deadline = start + target / 2
+        self.hard_deadline = start + min(3 * target, budget / 2)
+
+    def search_iter(self, board, depth=None, movetime=None, wtime=None, btime=None,
+                    winc=0, binc=0, movestogo=None, nodes=None, infinite=False, ponder=False):
+        """
+        Iterative deepening search with time, node and depth limits
+
+        Every iteration orders its moves by the transposition table of the
+        iterations before. If a limit aborts an iteration, the best move of
+        the last completed iteration is kept.
+
+        Args:
+            board (Board): position to search
+            depth (int): maximal depth
+            movetime, wtime, btime, winc, binc, movestogo: see set_deadlines
+            nodes (int): maximal number of nodes
+            infinite (bool): search until the maximal depth, ignoring all clocks
+            ponder (bool): search on the time of the opponent, the clocks
+                           are only used after ponderhit
+
+        Returns:
+            int: score of the last completed iteration for the color to move
+        """
         start_time = time.time()
-        round_time = time.time()
-        if board.to_move == 1:
-            movetime = self.wtime / 1000 / max(30 - board.fullmove_counter, 10) + self.winc / 1000
-        elif board.to_move == 0:
-            movetime = self.btime / 1000 / max(30 - board.fullmove_counter, 10) + self.binc / 1000
+        self.pondering = ponder
+        if infinite or ponder:
+            self.soft_deadline = self.hard_deadline = None
+            self.ponder_limits = (board.board_copy(), movetime, wtime, btime, winc, binc, movestogo)
+        else:
+            self.set_deadlines(board, movetime, wtime, btime, winc, binc, movestogo)
+        self.node_limit = nodes
+        self.nodes = 0
+        self.fail_lows = 0
+        self.fail_highs = 0
+        self.next_check = 0
+        self.ttable.new_search()
+        self.age_history()
+        self.best_move = NO_MOVE
+
+        # without legal moves the first iteration already gives the exact score
+        max_depth = depth or MAX_DEPTH
+        if not board.has_any_legal_move():
+            max_depth = 1
+        root_depth = len(board.undo_stack)
+        best_move = NO_MOVE
+        score = 0
+
+        for iteration in range(1, max_depth + 1):
+            self.aim_depth = iteration
+            try:
+                score = self.aspiration_search(board, iteration, score)
+            except SearchAborted:
+                self.take_back(board, root_depth)
+                break
+            best_move = self.best_move
+            self.report_iteration(board, iteration, score, time.time() - start_time)
 
-        while depth <= MAXDEPTH and round_time - start_time < movetime / 2:
-            self.aim_depth = depth
-            self.s__negascout_tt(board, depth, -100000000, 100000000)
-            print(f"info depth {depth}")
-            depth += 1
-            round_time = time.time()
+            if self.soft_deadline and time.time() >= self.soft_deadline:
+                break
 
-    def search_negascout_tt(self, board):
-        self.s__negascout_tt(board, self.aim_depth, -100000000, 100000000, first=False)
+        # an aborted first iteration still gives a better move than none
+        if best_move:
+            self.best_move = best_move
+        elif not is_legal_move(board, self.best_move):
+            self.best_move = next(board.gen_legal_moves(), NO_MOVE)
 
-    def s__negascout_tt(self, board, depth, alpha, beta, first=True):
+        print(f"info string aspiration fail low {self.fail_lows} fail high {self.fail_highs}",
+              flush=True)
+        self.evaluation = score
+        self.soft_deadline = self.hard_deadline = self.node_limit = None
+        return score
 
-        storage = 1
+    def take_back(self, board, root_depth):
+        """
+        take back the moves and null moves of an aborted search
 
-        if not first and tuple(board.pieces[0]+board.pieces[1]+[board.to_move]) in self.past_positions:
-            return 0
+        Args:
+            board (Board): board of the search
+            root_depth (int): length of the undo stack at the root
+        """
+        while len(board.undo_stack) > root_depth:
+            if board.undo_stack[-1][0]:
+                board.unmake_move()
+            else:
+                board.unmake_null_move()
 
-        tt_lookup = ttable.get(tuple(board.pieces[0]+board.pieces[1]+[board.to_move]))
-        if tt_lookup and tt_lookup[2] >= depth:
-            if tt_lookup[1] == 0:
-                return tt_lookup[0]
-            elif tt_lookup[1] == 1:
-                alpha = max(alpha, tt_lookup[0])
-            elif tt_lookup[1] == 2:
-                beta = min(beta, tt_lookup[0])
+    def report_iteration(self, board, depth, score, elapsed):
+        """
+        Send the info line of a completed iteration to the gui
 
-            if alpha >= beta:
-                return tt_lookup[0]
+        Args:
+            board (Board): root position
+            depth (int): depth of the iteration
+            score (int): score of the iteration
+            elapsed (float): time since the start of the search in seconds
+        """
+        pv = " ".join(san_from_move(move) for move in self.principal_variation(board))
+        print(f"info depth {depth} score {uci_score(score)} nodes {self.nodes} "
+              f"nps {int(self.nodes / max(elapsed, 0.001))} time {int(1000 * elapsed)} "
+              f"hashfull {self.ttable.hashfull()} pv {pv}", flush=True)
+
+    def aspiration_search(self, board, depth, last_score):
+        """
+        Search the root with a narrow window around the score of the last iteration
+
+        The window is widened geometrically on the failing side until the
+        score lies inside, the re-searches profit from the filled
+        transposition table.
+
+        Args:
+            board (Board): root position
+            depth (int): depth of the iteration
+            last_score (int): score of the last iteration
+
+        Returns:
+            int: score of the root
+        """
+        if depth == 1:
+            return self.s__negascout_tt(board, depth, -INFINITY, INFINITY)
+
+        delta = ASPIRATION_WINDOW
+        alpha = max(last_score - delta, -INFINITY)
+        beta = min(last_score + delta, INFINITY)
+        while True:
+            score = self.s__negascout_tt(board, depth, alpha, beta)
+            if score <= alpha and alpha > -INFINITY:
+                self.fail_lows += 1
+                alpha = max(score - delta, -INFINITY)
+            elif score >= beta and beta < INFINITY:
+                self.fail_highs += 1
+                beta = min(score + delta, INFINITY)
+            else:
+                return score
+            delta *= 2
+
+    def ponderhit(self):
+        """
+        The opponent played the expected move, continue the ponder search
+        with the clocks of the go command starting now
+        """
+        if self.pondering:
+            self.set_deadlines(*self.ponder_limits)
+            self.pondering = False
+
+    def search_negascout_tt(self, board):
+        self.ttable.new_search()
+        self.age_history()
+        self.nodes = 0
+        self.s__negascout_tt(board, self.aim_depth, -100000000, 100000000)
+
+    def probe_ttable(self, board, depth, alpha, beta, ply=0):
+        """
+        Look up the position in the transposition table
+
+        Returns:
+            tuple: (score or None if the entry can not cut off, hash move)
+        """
+        tt_lookup = self.ttable.probe(board.hash)
+        if tt_lookup is None:
+            return None, NO_MOVE
+        score, bound, tt_depth, tt_move = tt_lookup
+        score = score_from_tt(score, ply)
+        if tt_depth >= depth:
+            if (bound == EXACT or (bound == LOWER and score >= beta)
+                    or (bound == UPPER and score <= alpha)):
+                return score, tt_move
+        return None, tt_move
+
+    def s__negascout_tt(self, board, depth, alpha, beta, first=True, ply=0, allow_null=True):
+
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+
+        if not first and board.is_draw():
+            return 0
 
-        if depth == 0 or board.is_check_or_stalemate():
-            return self.quiescence(board, alpha, beta)
+        # no cutoffs at the root, the best move has to be searched
+        tt_score, tt_move = self.probe_ttable(board, depth, alpha, beta, ply)
+        if tt_score is not None and ply:
+            return tt_score
 
-        for move in sorted(board.gen_legal_moves(), key=lambda move: self.evaluator.eval_move(board, move)):
+        if depth <= 0:
+            return self.quiescence(board, alpha, beta, ply)
 
-            new_board = board.board_copy()
-            new_board = new_board.make_generated_move(move)
+        if (self.null_move_allowed(board, depth, ply, allow_null)
+                and self.null_move_cutoff(board, depth, beta, ply, self.s__negascout_tt)):
+            self.ttable.store(board.hash, score_to_tt(beta, ply), depth, LOWER)
+            return beta
 
-            current_eval = -self.__negascout(new_board, depth - 1, -alpha - 1, -alpha, False)
+        bound = UPPER
+        best_move = NO_MOVE
+        quiets_tried = []
+        in_check = depth >= LMR_MIN_DEPTH and board.in_check()
+        move_number = 0
+        for move_number, move in enumerate(MovePicker(board, tt_move, self.killers[ply],
+                                                      history=self.history[board.to_move]), 1):
+
+            board.make_generated_move(move)
+            reduction = self.late_move_reduction(board, depth, move, move_number, in_check)
+            current_eval = -self.s__negascout_tt(board, depth - 1 - reduction, -alpha - 1, -alpha, False, ply + 1)
+            if reduction and current_eval > alpha:
+                current_eval = -self.s__negascout_tt(board, depth - 1, -alpha - 1, -alpha, False, ply + 1)
             if current_eval > alpha and current_eval < beta:
-                current_eval = -self.__negascout(new_board, depth - 1, -beta, -current_eval, False)
+                current_eval = -self.s__negascout_tt(board, depth - 1, -beta, -current_eval, False, ply + 1)
+            board.unmake_move()
 
             if current_eval >= beta:
-                ttable[tuple(board.pieces[0]+board.pieces[1]+[board.to_move])] = (beta, 2, depth)
+                self.store_killer(move, ply)
+                self.update_history(board, move, depth, quiets_tried)
+                self.ttable.store(board.hash, score_to_tt(beta, ply), depth, LOWER, move)
+                if not ply:
+                    self.best_move = move
                 return current_eval
 
-
             if current_eval > alpha:
                 alpha = current_eval
-                storage = 0
-                if depth == self.aim_depth:
+                bound = EXACT
+                best_move = move
+                if not ply:
                     self.best_move = move
 
-            #if alpha >= beta:
-            #    break
+            if not move >> 14 & 1:
+                quiets_tried.append(move)
 
-        ttable[tuple(board.pieces[0]+board.pieces[1]+[board.to_move])] = (alpha, storage, depth)
+        if not move_number:
+            return self.terminal_score(board, ply)
+
+        self.ttable.store(board.hash, score_to_tt(alpha, ply), depth, bound, best_move)
 
         return alpha
 
+    def terminal_score(self, board, ply):
+        """
+        score of a position without legal moves for the color to move,
+        mates closer to the root score higher for the mating side
+
+        Returns:
+            int: mated or 0 for stalemate
+        """
+        if board.in_check():
+            return -MATE_SCORE + ply
+        return 0
+
+    def principal_variation(self, board):
+        """
+        Read the principal variation of the last search out of the transposition table
+
+        Args:
+            board (Board): root position of the search
+
+        Returns:
+            list: moves of the principal variation
+        """
+        pv = []
+        visited = set()
+        move = self.best_move
+        while move and board.hash not in visited and is_legal_move(board, move):
+            visited.add(board.hash)
+            pv.append(move)
+            board.make_generated_move(move)
+            tt_lookup = self.ttable.probe(board.hash)
+            move = tt_lookup[3] if tt_lookup else NO_MOVE
+        for _ in pv:
+            board.unmake_move()
+        return pv
+
     def search_negamax_tt(self, board):
+        self.ttable.new_search()
+        self.age_history()
+        self.nodes = 0
         self.__negamax_tt(board, self.aim_depth, -100000000, 100000000)
 
-    def __negamax_tt(self, board, depth, alpha, beta, first=True):
+    def __negamax_tt(self, board, depth, alpha, beta, first=True, ply=0, allow_null=True):
+
+        self.nodes += 1
 
-        if not first and tuple(board.pieces[0]+board.pieces[1]+[board.to_move]) in self.past_positions:
+        if not first and board.is_draw():
             return 0
 
         a = alpha
-        tt_lookup = ttable.get(tuple(board.pieces[0]+board.pieces[1]+[board.to_move]))
-        if tt_lookup and tt_lookup[2] >= depth:
-            if tt_lookup[1] == 0:
-                return tt_lookup[0]
-            elif tt_lookup[1] == 1:
-                alpha = max(alpha, tt_lookup[0])
-            elif tt_lookup[1] == 2:
-                beta = min(beta, tt_lookup[0])
-
-            if alpha >= beta:
-                return tt_lookup[0]
+        tt_score, tt_move = self.probe_ttable(board, depth, alpha, beta, ply)
+        if tt_score is not None and ply:
+            return tt_score
 
+        if depth <= 0:
+            return self.quiescence(board, alpha, beta, ply)
 
-        if depth ==0 or board.is_check_or_stalemate():
-            return self.quiescence(board, alpha, beta)
+        if (self.null_move_allowed(board, depth, ply, allow_null)
+                and self.null_move_cutoff(board, depth, beta, ply, self.__negamax_tt)):
+            self.ttable.store(board.hash, score_to_tt(beta, ply), depth, LOWER)
+            return beta
 
         val = -100000000
+        best_move = NO_MOVE
+
+        quiets_tried = []
+        for move in MovePicker(board, tt_move, self.killers[ply],
+                               history=self.history[board.to_move]):
 
-        for move in sorted(board.gen_legal_moves(), key=lambda move: self.evaluator.eval_move(board, move)):
+            board.make_generated_move(move)
+            current_eval = -self.__negamax_tt(board, depth - 1, -beta, -alpha, first=False, ply=ply + 1)
+            board.unmake_move()
 
-            new_board = board.board_copy()
-            new_board = new_board.make_generated_move(move)
-            val = max(val, -self.__negamax_tt(new_board, depth - 1, -beta, -alpha, first=False))
+            if current_eval > val:
+                val = current_eval
+                best_move = move
 
             if val > alpha:
                 alpha = val
-                if depth == self.aim_depth:
+                if not ply:
                     self.best_move = move
 
             if alpha >= beta:
+                self.store_killer(move, ply)
+                self.update_history(board, move, depth, quiets_tried)
                 break
 
+            if not move >> 14 & 1:
+                quiets_tried.append(move)
+
+        if not best_move:
+            return self.terminal_score(board, ply)
+
         if val <= a:
-            ttable[tuple(board.pieces[0]+board.pieces[1]+[board.to_move])] = (val, 2, depth)
+            self.ttable.store(board.hash, score_to_tt(val, ply), depth, UPPER, best_move)
         elif val >= beta:
-            ttable[tuple(board.pieces[0]+board.pieces[1]+[board.to_move])] = (val, 1, depth)
+            self.ttable.store(board.hash, score_to_tt(val, ply), depth, LOWER, best_move)
         else:
-            ttable[tuple(board.pieces[0]+board.pieces[1]+[board.to_move])] = (val, 0, depth)
+            self.ttable.store(board.hash, score_to_tt(val, ply), depth, EXACT, best_move)
 
         return val
 
@@ -202,30 +705,39 @@ class Searcher:
         Negascout search
         """
         print(f"info depth {self.aim_depth}")
+        self.nodes = 0
+        self.age_history()
         return self.__negascout(board, self.aim_depth, -10000000, 10000000)
 
-    def __negascout(self, board, depth, alpha, beta, first=True):
+    def __negascout(self, board, depth, alpha, beta, first=True, ply=0):
 
-        if not first and tuple(board.pieces[0]+board.pieces[1]+[board.to_move]) in self.past_positions:
+        self.nodes += 1
+
+        if not first and board.is_draw():
             return 0
 
-        if depth == 0 or board.is_check_or_stalemate():
-            return self.quiescence(board, alpha, beta)
-            #return (-1)**(1 - board.to_move) * self.evaluator.weighted_piece_scores(board)
+        if depth <= 0:
+            return self.quiescence(board, alpha, beta, ply)
         b = beta
         counter = 1
         current_eval = 0
-        for move in sorted(board.gen_legal_moves(), key=lambda move: self.evaluator.eval_move(board, move)):
+        quiets_tried = []
+        in_check = depth >= LMR_MIN_DEPTH and board.in_check()
+        for move in MovePicker(board, killers=self.killers[ply],
+                               history=self.history[board.to_move]):
 
             if counter == 1:
                 if depth == self.aim_depth:
                     self.best_move = move
 
-            new_board = board.board_copy()
-            new_board = new_board.make_generated_move(move)
-            current_eval = -self.__negascout(new_board, depth - 1, -b, -alpha, False)
+            board.make_generated_move(move)
+            reduction = self.late_move_reduction(board, depth, move, counter, in_check)
+            current_eval = -self.__negascout(board, depth - 1 - reduction, -b, -alpha, False, ply + 1)
+            if reduction and current_eval > alpha:
+                current_eval = -self.__negascout(board, depth - 1, -b, -alpha, False, ply + 1)
             if current_eval > alpha and current_eval < beta and counter > 1:
-                current_eval = -self.__negascout(new_board, depth - 1, -beta, -alpha, False)
+                current_eval = -self.__negascout(board, depth - 1, -beta, -alpha, False, ply + 1)
+            board.unmake_move()
 
             if current_eval > alpha:
                 alpha = current_eval
@@ -233,11 +745,18 @@ class Searcher:
                     self.best_move = move
 
             if alpha >= beta:
+                self.store_killer(move, ply)
+                self.update_history(board, move, depth, quiets_tried)
                 return alpha
 
+            if not move >> 14 & 1:
+                quiets_tried.append(move)
             b = alpha + 1
             counter += 1
 
+        if counter == 1:
+            return self.terminal_score(board, ply)
+
         return alpha
 
     def search_min_max(self, board):
@@ -250,15 +769,23 @@ class Searcher:
             evaluation = self.__min_max_min(board, self.aim_depth)
         return evaluation
 
+    def absolute_terminal_score(self, board):
+        """
+        terminal_score from white's view for the searches with absolute scores
+        """
+        return (-1)**(1 - board.to_move) * self.terminal_score(board, 0)
+
     def __min_max_max(self, board, depth):
         moves = board.gen_legal_moves()
-        if depth == 0 or board.is_checkmate() or board.is_stalemate():
+        if not board.has_any_legal_move():
+            return self.absolute_terminal_score(board)
+        if depth == 0:
             return self.evaluator.piece_scores(board)
         max_eval = -10000
         for move in moves:
-            new_board = board.board_copy()
-            new_board = new_board.make_generated_move(move)
-            current_eval = self.__min_max_min(new_board, depth - 1)
+            board.make_generated_move(move)
+            current_eval = self.__min_max_min(board, depth - 1)
+            board.unmake_move()
             if current_eval > max_eval:
                 max_eval = current_eval
                 if depth == self.aim_depth:
@@ -267,13 +794,15 @@ class Searcher:
 
     def __min_max_min(self, board, depth):
         moves = board.gen_legal_moves()
-        if depth == 0 or board.is_checkmate() or board.is_stalemate():
+        if not board.has_any_legal_move():
+            return self.absolute_terminal_score(board)
+        if depth == 0:
             return self.evaluator.piece_scores(board)
         min_eval = 10000
         for move in moves:
-            new_board = board.board_copy()
-            new_board = new_board.make_generated_move(move)
-            current_eval = self.__min_max_max(new_board, depth - 1)
+            board.make_generated_move(move)
+            current_eval = self.__min_max_max(board, depth - 1)
+            board.unmake_move()
             if current_eval < min_eval:
                 min_eval = current_eval
                 if depth == self.aim_depth:
@@ -292,14 +821,16 @@ class Searcher:
 
     def __alpha_beta_max(self, board, depth, alpha, beta):
         moves = board.gen_legal_moves()
-        if depth == 0 or board.is_check_or_stalemate():
+        if not board.has_any_legal_move():
+            return self.absolute_terminal_score(board)
+        if depth == 0:
             return self.evaluator.weighted_piece_scores(board)
         max_eval = alpha
         for move in moves:
-            new_board = board.board_copy()
-            new_board = new_board.make_generated_move(move)
-            current_eval = self.__alpha_beta_min(new_board, depth - 1,
+            board.make_generated_move(move)
+            current_eval = self.__alpha_beta_min(board, depth - 1,
                                                  max_eval, beta)
+            board.unmake_move()
             if current_eval > max_eval:
                 max_eval = current_eval
                 if depth == self.aim_depth:
@@ -311,14 +842,16 @@ class Searcher:
 
     def __alpha_beta_min(self, board, depth, alpha, beta):
         moves = board.gen_legal_moves()
-        if depth == 0 or board.is_check_or_stalemate():
+        if not board.has_any_legal_move():
+            return self.absolute_terminal_score(board)
+        if depth == 0:
             return self.evaluator.weighted_piece_scores(board)
         min_eval = beta
         for move in moves:
-            new_board = board.board_copy()
-            new_board = new_board.make_generated_move(move)
-            current_eval = self.__alpha_beta_max(new_board, depth - 1,
+            board.make_generated_move(move)
+            current_eval = self.__alpha_beta_max(board, depth - 1,
                                                  alpha, min_eval)
+            board.unmake_move()
             if current_eval < min_eval:
                 min_eval = current_eval
                 if depth == self.aim_depth:
@@ -349,10 +882,9 @@ class Searcher:
         test = self.nextGuess(alpha, beta, subtreeCount)
         betterCount = 0
         for move in board.gen_legal_moves():
-            new_board = board.board_copy()
-            new_board = new_board.make_generated_move(move)
-
+            board.make_generated_move(move)
             bestVal = -self.bns_alpha_beta(board, -test, -(test - 1))
+            board.unmake_move()
 
             if bestVal >= test:
                 betterCount = betterCount + 1
@@ -374,10 +906,9 @@ class Searcher:
             test = self.nextGuess(alpha, beta, subtreeCount)
             betterCount = 0
             for move in board.gen_legal_moves():
-                new_board = board.board_copy()
-                new_board = new_board.make_generated_move(move)
-
+                board.make_generated_move(move)
                 bestVal = -self.bns_alpha_beta(board, -test, -(test - 1))
+                board.unmake_move()
 
                 if bestVal >= test:
                     betterCount = betterCount + 1
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+"""
+Lazy SMP: the same iterative deepening search in several worker processes
+
+All workers search the root position and share their results through one
+transposition table in shared memory, so a worker finds the parts of the
+tree another worker already searched. Every other worker searches one ply
+deeper and the helpers add noise to their history table, so they try
+different moves first instead of repeating the same work. Processes are
+used instead of threads because of the GIL.
+"""
+
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+
+from .evaluation import Evaluator
+from .movegen import is_legal_move
+from .rootsplit import RootSplitter
+from .search import MAX_DEPTH, Searcher
+from .ttable import SharedTranspositionTable
+from .utils import NO_MOVE
+
+# seconds between two checks of the stop flag and the clock while waiting for the workers
+POLL_INTERVAL = 0.005
+# largest random history bonus of a helper, spreads the order of quiet moves
+HISTORY_NOISE = 64
+
+
+class HelperSearcher(Searcher):
+    """
+    Searcher of one worker process, sends every completed iteration to the main process
+    """
+
+    def __init__(self, evaluator, worker_id, results):
+        super().__init__(evaluator, manage_time=False, hash_size=1)
+        # attached with the first search
+        self.ttable = None
+        self.worker_id = worker_id
+        self.results = results
+        self.depth_offset = worker_id % 2
+        self.max_depth = MAX_DEPTH
+        self.random = random.Random(worker_id)
+
+    def age_history(self):
+        super().age_history()
+        if self.worker_id:
+            for color_history in self.history:
+                for index in range(4096):
+                    color_history[index] += self.random.randrange(HISTORY_NOISE)
+
+    def search_depth(self, depth):
+        """
+        Depth this worker searches in the iteration of the given depth
+        """
+        return min(depth + self.depth_offset, self.max_depth)
+
+    def aspiration_search(self, board, depth, last_score):
+        return super().aspiration_search(board, self.search_depth(depth), last_score)
+
+    def report_iteration(self, board, depth, score, elapsed):
+        self.results.put((self.worker_id, self.search_depth(depth), score, self.best_move, self.nodes))
+
+
+def worker_loop(worker_id, jobs, results, abort):
+    """
+    Run the searches sent by the main process until it sends None
+
+    A job is (board, limits, table name, table age, evaluator settings). After
+    every search (worker_id, None, score, best move, nodes) is sent.
+    """
+    # the info lines are sent by the main process
+    sys.stdout = open(os.devnull, 'w')
+    evaluator = Evaluator()
+    searcher = HelperSearcher(evaluator, worker_id, results)
+    searcher.stop_event = abort
+
+    for board, limits, table_name, age, settings in iter(jobs.get, None):
+        if searcher.ttable is None:
+            searcher.ttable = SharedTranspositionTable(name=table_name)
+        elif searcher.ttable.name != table_name:
+            searcher.ttable.attach(table_name)
+        evaluator.load_settings(settings)
+        # search_iter starts the generation of the main process
+        searcher.ttable.age = (age - 1) & 255
+        searcher.max_depth = limits['depth'] or MAX_DEPTH
+        searcher.search_iter(board, **limits)
+        results.put((worker_id, None, searcher.evaluation, searcher.best_move, searcher.nodes))
+
+    if searcher.ttable is not None:
+        searcher.ttable.close()
+
+
+class ParallelSearcher(Searcher):
+    """
+    Lazy SMP search in worker processes with the interface of Searcher
+
+    The worker processes are started once and wait for searches. The main
+    process keeps the clock, stops the workers and reports the deepest
+    iteration completed by any worker, whose best move is played.
+    Searches with only a depth limit are split at the root instead, which
+    gives the same result in every run.
+    """
+
+    def __init__(self, evaluator, threads=2, hash_size=16):
+        super().__init__(evaluator, manage_time=True, hash_size=1)
+        self.ttable = SharedTranspositionTable(hash_size)
+        self.context = multiprocessing.get_context('spawn')
+        self.abort = self.context.Event()
+        self.results = self.context.Queue()
+        self.workers = []
+        self.jobs = []
+        # started with the first fixed depth search
+        self.root_splitter = None
+        self.set_threads(threads)
+
+    def set_threads(self, threads):
+        """
+        Replace the worker processes
+
+        Args:
+            threads (int): number of worker processes
+        """
+        self.stop_workers()
+        for worker_id in range(threads):
+            jobs = self.context.Queue()
+            worker = self.context.Process(target=worker_loop, daemon=True,
+                                          args=(worker_id, jobs, self.results, self.abort))
+            worker.start()
+            self.jobs.append(jobs)
+            self.workers.append(worker)
+
+    def stop_workers(self):
+        """
+        Let the worker processes and the processes of the root splitting finish
+        """
+        for jobs in self.jobs:
+            jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.jobs = []
+        self.workers = []
+        if self.root_splitter is not None:
+            self.root_splitter.close()
+            self.root_splitter = None
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared transposition table
+        """
+        self.stop_workers()
+        self.ttable.close()
+
+    def search_iter(self, board, depth=None, movetime=None, wtime=None, btime=None,
+                    winc=0, binc=0, movestogo=None, nodes=None, infinite=False, ponder=False):
+        """
+        Lazy SMP iterative deepening search with the limits of Searcher.search_iter
+
+        The workers search without clock. They are stopped at the deadlines,
+        on stop or as soon as the first worker is done. The node limit is
+        split between the workers.
+
+        Returns:
+            int: score of the deepest completed iteration for the color to move
+        """
+        if depth and not (movetime or wtime or btime or nodes or infinite or ponder):
+            if self.root_splitter is None:
+                self.root_splitter = RootSplitter(self, len(self.workers))
+            return self.root_splitter.search(board, depth)
+
+        start_time = time.time()
+        self.pondering = ponder
+        if infinite or ponder:
+            self.soft_deadline = self.hard_deadline = None
+            self.ponder_limits = (board.board_copy(), movetime, wtime, btime, winc, binc, movestogo)
+        else:
+            self.set_deadlines(board, movetime, wtime, btime, winc, binc, movestogo)
+        self.ttable.new_search()
+        self.abort.clear()
+        self.best_move = NO_MOVE
+
+        limits = {'depth': depth, 'nodes': nodes and max(nodes // len(self.jobs), 1),
+                  'infinite': True}
+        settings = self.evaluator.settings()
+        for jobs in self.jobs:
+            jobs.put((board, limits, self.ttable.name, self.ttable.age, settings))
+
+        worker_nodes = [0] * len(self.jobs)
+        done = [False] * len(self.jobs)
+        best_depth = 0
+        best_move = NO_MOVE
+        score = 0
+        while not all(done):
+            if self.stop_event.is_set() or (self.hard_deadline and time.time() >= self.hard_deadline):
+                self.abort.set()
+            try:
+                worker_id, iteration, result, move, worker_nodes[worker_id] = \
+                    self.results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                # a crashed worker never reports
+                for worker_id, worker in enumerate(self.workers):
+                    done[worker_id] = done[worker_id] or not worker.is_alive()
+                continue
+            if iteration is None:
+                done[worker_id] = True
+                self.abort.set()
+            elif iteration > best_depth:
+                best_depth, score, best_move = iteration, result, move
+                self.best_move = move
+                self.nodes = sum(worker_nodes)
+                self.report_iteration(board, iteration, score, time.time() - start_time)
+                if self.soft_deadline and time.time() >= self.soft_deadline:
+                    self.abort.set()
+
+        self.nodes = sum(worker_nodes)
+        # an aborted first iteration still gives a better move than none
+        if best_move:
+            self.best_move = best_move
+        elif not is_legal_move(board, self.best_move):
+            self.best_move = next(board.gen_legal_moves(), NO_MOVE)
+
+        self.evaluation = score
+        self.soft_deadline = self.hard_deadline = self.node_limit = None
+        return score
@@ -1,9 +1,292 @@
 #!/usr/bin/env python3
 
-ttable = {}
+"""
+Fixed size transposition tables, one for a single search and one in shared
+memory for the processes of a parallel search
+"""
 
-def board_entry(board, evaluation, best_move, occurances):
+from array import array
+
+from .utils import NO_MOVE
+
+# bound of a stored score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# bytes per entry: key 8, score 4, depth 1, bound 1, move 2, age 1
+ENTRY_SIZE = 17
+
+
+class TranspositionTable:
+    """
+    Hash table of search results with a fixed size in MB
+
+    The entries are stored in parallel preallocated arrays and indexed by
+    the lower bits of the zobrist key. Every bucket has two slots, the
+    first keeps the deepest entry of the current search, the second is
+    always replaced.
+    """
+
+    def __init__(self, size_mb=16):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """
+        Allocate a new empty table
+
+        Args:
+            size_mb (int): size of the table in MB
+        """
+        self.size_mb = size_mb
+        entries = max(2, size_mb * 1024 * 1024 // ENTRY_SIZE)
+        # round number of buckets down to a power of two
+        buckets = 1 << ((entries // 2).bit_length() - 1)
+        self.mask = buckets - 1
+        self.size = 2 * buckets
+        self.clear()
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+        self.keys = array('Q', [0]) * self.size
+        self.scores = array('i', [0]) * self.size
+        self.depths = array('b', [0]) * self.size
+        self.bounds = array('B', [0]) * self.size
+        self.moves = array('H', [NO_MOVE]) * self.size
+        self.ages = array('B', [0]) * self.size
+        self.age = 0
+
+    def new_search(self):
+        """
+        Start a new generation, entries of older searches get replaced first
+        """
+        self.age = (self.age + 1) & 255
+
+    def probe(self, key):
+        """
+        Look up the entry of a position
+
+        Args:
+            key (int): zobrist hash of the position
+
+        Returns:
+            tuple: (score, bound, depth, move) or None if there is no entry
+        """
+        index = (key & self.mask) << 1
+        keys = self.keys
+        if keys[index] != key:
+            index += 1
+            if keys[index] != key:
+                return None
+        return self.scores[index], self.bounds[index], self.depths[index], self.moves[index]
+
+    def store(self, key, score, depth, bound, move=NO_MOVE):
+        """
+        Store the result of a search
+
+        Args:
+            key (int): zobrist hash of the position
+            score (int): score of the position
+            depth (int): depth of the search
+            bound (int): EXACT, LOWER or UPPER
+            move (int): best move found, NO_MOVE keeps a stored move
+        """
+        index = (key & self.mask) << 1
+        if not (self.keys[index] == key or self.ages[index] != self.age
+                or depth >= self.depths[index]):
+            index += 1
+
+        if self.keys[index] != key:
+            self.keys[index] = key
+            self.moves[index] = move
+        elif move:
+            self.moves[index] = move
+        # mate scores of the evaluator are floats
+        self.scores[index] = int(score)
+        self.depths[index] = depth
+        self.bounds[index] = bound
+        self.ages[index] = self.age
+
+    def hashfull(self):
+        """
+        Permille of entries used by the current search, sampled from the first 1000
+
+        Returns:
+            int: used entries per thousand
+        """
+        sample = min(1000, self.size)
+        used = sum(1 for index in range(sample)
+                   if self.keys[index] and self.ages[index] == self.age)
+        return used * 1000 // sample
+
+
+# bits of the packed entry of the shared table: move 16, score 24, depth 8,
+# bound 2 and age 8
+SCORE_SHIFT = 16
+DEPTH_SHIFT = 40
+BOUND_SHIFT = 48
+AGE_SHIFT = 50
+SCORE_OFFSET = 1 << 23
+# bytes per entry of the shared table: key xor data 8, data 8
+SHARED_ENTRY_SIZE = 16
+
+
+class SharedTranspositionTable:
+    """
+    Transposition table in shared memory, usable by several processes
+
+    An entry is two 64 bit words, the packed data and the key xor the
+    data. Processes read and write without locks, an entry written by two
+    processes at once does not pass the xor check and counts as empty.
+    Buckets and replacement are the same as in TranspositionTable. The
+    process that creates the table owns the memory, others attach to it
+    by name. multiprocessing.shared_memory needs Python 3.8, it is only
+    imported here so that single process searches also run on Python 3.7.
+    """
+
+    def __init__(self, size_mb=16, name=None):
+        self.memory = None
+        self.age = 0
+        if name is None:
+            self.resize(size_mb)
+        else:
+            self.attach(name)
+
+    def resize(self, size_mb):
+        """
+        Allocate new empty shared memory, attached processes have to attach again
+
+        Args:
+            size_mb (int): size of the table in MB
+        """
+        from multiprocessing import shared_memory
+
+        self.close()
+        self.size_mb = size_mb
+        entries = max(2, size_mb * 1024 * 1024 // SHARED_ENTRY_SIZE)
+        buckets = 1 << ((entries // 2).bit_length() - 1)
+        self.memory = shared_memory.SharedMemory(create=True, size=2 * buckets * SHARED_ENTRY_SIZE)
+        self.owner = True
+        self.table = self.memory.buf.cast('Q')
+        self.mask = buckets - 1
+        self.size = 2 * buckets
+        self.clear()
+
+    def attach(self, name):
+        """
+        Use the shared memory of a table created by another process
+
+        Args:
+            name (str): name of the shared memory
+        """
+        from multiprocessing import shared_memory
+
+        self.close()
+        self.memory = shared_memory.SharedMemory(name=name)
+        self.owner = False
+        self.table = self.memory.buf.cast('Q')
+        self.size = len(self.table) // 2
+        self.mask = self.size // 2 - 1
+        self.size_mb = self.size * SHARED_ENTRY_SIZE >> 20
+
+    @property
+    def name(self):
+        """
+        Name of the shared memory to attach other processes
+        """
+        return self.memory.name
+
+    def close(self):
+        """
+        Detach from the shared memory, the owner also frees it
+        """
+        if self.memory is None:
+            return
+        self.table.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+        self.memory = None
+
+    def clear(self):
+        """
+        Remove all entries of all processes
+        """
+        self.memory.buf[:] = bytes(len(self.memory.buf))
+        self.age = 0
+
+    def new_search(self):
+        """
+        Start a new generation, entries of older searches get replaced first
+        """
+        self.age = (self.age + 1) & 255
+
+    def probe(self, key):
+        """
+        Look up the entry of a position
+
+        Args:
+            key (int): zobrist hash of the position
+
+        Returns:
+            tuple: (score, bound, depth, move) or None if there is no entry
+        """
+        index = (key & self.mask) << 2
+        table = self.table
+        data = table[index + 1]
+        if table[index] ^ data != key:
+            data = table[index + 3]
+            if table[index + 2] ^ data != key:
+                return None
+        return ((data >> SCORE_SHIFT & 0xFFFFFF) - SCORE_OFFSET, data >> BOUND_SHIFT & 3,
+                (data >> DEPTH_SHIFT & 255 ^ 128) - 128, data & 0xFFFF)
+
+    def store(self, key, score, depth, bound, move=NO_MOVE):
+        """
+        Store the result of a search
+
+        Args:
+            key (int): zobrist hash of the position
+            score (int): score of the position
+            depth (int): depth of the search
+            bound (int): EXACT, LOWER or UPPER
+            move (int): best move found, NO_MOVE keeps a stored move
+        """
+        index = (key & self.mask) << 2
+        table = self.table
+        data = table[index + 1]
+        same_key = table[index] ^ data == key
+        if not (same_key or data >> AGE_SHIFT != self.age
+                or depth >= (data >> DEPTH_SHIFT & 255 ^ 128) - 128):
+            index += 2
+            data = table[index + 1]
+            same_key = table[index] ^ data == key
+
+        if not move and same_key:
+            move = data & 0xFFFF
+        score = min(max(int(score) + SCORE_OFFSET, 0), 0xFFFFFF)
+        data = (move | score << SCORE_SHIFT | (depth & 255) << DEPTH_SHIFT
+                | bound << BOUND_SHIFT | self.age << AGE_SHIFT)
+        table[index] = key ^ data
+        table[index + 1] = data
+
+    def hashfull(self):
+        """
+        Permille of entries used by the current search, sampled from the first 1000
+
+        Returns:
+            int: used entries per thousand
+        """
+        sample = min(1000, self.size)
+        used = sum(1 for index in range(1, 2 * sample, 2)
+                   if self.table[index] and self.table[index] >> AGE_SHIFT == self.age)
+        return used * 1000 // sample
+
+
+def board_entry(table, board, evaluation, depth, bound, best_move=NO_MOVE):
     """
-    make entry for position with evaluation, best move, occurances
+    make entry for position with evaluation, depth, bound and best move
     """
-    ttable[tuple(board.pieces[0]+board.pieces[1]+[board.to_move])] = (evaluation, best_move, occurances)
+    table.store(board.hash, evaluation, depth, bound, best_move)
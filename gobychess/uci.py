@@ -5,43 +5,103 @@ Basic uci implementation
 """
 
 import sys
-import time
+import threading
 
 from .board import Board
 from .evaluation import Evaluator
 from .search import Searcher
-from .ttable import ttable
+from .smp import ParallelSearcher
 from .utils import move_from_san, san_from_move
 
 
+def search_worker(searcher, board, limits):
+    """
+    Run the search and send the best move
+
+    In infinite and ponder mode the best move is only sent after stop or ponderhit.
+    """
+    searcher.search_iter(board, **limits)
+
+    while ((limits.get('infinite') or searcher.pondering)
+           and not searcher.stop_event.is_set()):
+        searcher.stop_event.wait(0.005)
+
+    pv = searcher.principal_variation(board)
+    if len(pv) > 1:
+        print(f'bestmove {san_from_move(searcher.best_move)} ponder {san_from_move(pv[1])}', flush=True)
+    else:
+        print(f'bestmove {san_from_move(searcher.best_move)}', flush=True)
+
+
+def new_searcher(evaluator, threads, hash_size):
+    """
+    Searcher for the number of threads, a Lazy SMP search for more than one
+
+    Args:
+        evaluator (Evaluator): evaluator of the searcher
+        threads (int): number of search processes
+        hash_size (int): size of the transposition table in MB
+    """
+    if threads > 1:
+        return ParallelSearcher(evaluator, threads=threads, hash_size=hash_size)
+    return Searcher(evaluator, aim_depth=4, manage_time=True, hash_size=hash_size)
+
+
 def main():
 
     sys.setrecursionlimit(10**6)
+    # the search runs in a thread, give it room for the deep recursion
+    threading.stack_size(64 * 1024 * 1024)
 
     board = Board()
 
     evaluator = Evaluator()
-    searcher = Searcher(evaluator, aim_depth=4, manage_time=True)
+    threads = 1
+    hash_size = 16
+    searcher = new_searcher(evaluator, threads, hash_size)
+    search_thread = None
+
+    def stop_search():
+        nonlocal search_thread
+        if search_thread is not None:
+            searcher.stop_event.set()
+            search_thread.join()
+            search_thread = None
 
     while True:
         command = input()
 
         if command == 'quit':
+            stop_search()
+            if isinstance(searcher, ParallelSearcher):
+                searcher.close()
             break
 
+        elif command == 'stop':
+            stop_search()
+
+        elif command == 'ponderhit':
+            searcher.ponderhit()
+
         elif command == 'uci':
             print("id name GobyChess")
             print("id author Tom Magorsch")
             print("option name evalpath type string")
+            print("option name Hash type spin default 16 min 1 max 4096")
+            print("option name EvalCache type spin default 4 min 1 max 1024")
+            print("option name Threads type spin default 1 min 1 max 128")
             print("uciok")
 
         elif command == 'isready':
-            print("readyok")
+            print("readyok", flush=True)
 
         elif command == 'ucinewgame':
+            stop_search()
             board.reset_board()
+            searcher.clear()
 
         elif command.startswith('position'):
+            stop_search()
             words = command.split(' ')
 
             moves_position = command.find('moves')
@@ -65,54 +125,47 @@ def main():
             else:
                 moves = []
 
-            searcher.past_positions = set()
+            # the board keeps the hashes of the game moves to find repetitions
             for move in moves:
-                board.make_generated_move(move_from_san(move))
-                searcher.past_positions.add(tuple(board.pieces[0]+board.pieces[1]+[board.to_move]))
+                board.make_generated_move(move_from_san(move, board))
 
         elif command.startswith('go'):
 
             _, *params = command.split()
-
-            parameters = params[::2]
-            values = params[1::2]
-
-            for parameter, value in zip(parameters, values):
-                if parameter == 'wtime':
-                    searcher.wtime = int(value)
-                elif parameter == 'btime':
-                    searcher.btime = int(value)
-                elif parameter == 'winc':
-                    searcher.winc = int(value)
-                elif parameter == 'binc':
-                    searcher.binc = int(value)
-                elif parameter == 'depth':
-                    searcher.aim_depth = int(value)
-                    searcher.manage_time = False
-                elif parameter == 'movetime':
-                    pass
-
-            searcher.update_depth(board.to_move, board.fullmove_counter)
-
-            start = time.time()
-            evaluation = searcher.search_negascout(board)
-            end = time.time()
-            #print("scout ", end - start)
-
-            print(f'bestmove {san_from_move(searcher.best_move)}')
-
-            #start = time.time()
-            #evaluation = searcher.search_iter(board)
-            #end = time.time()
-            #print("info calctime ", end - start)
-
-            #print(f'bestmove {san_from_move(searcher.best_move)}')
-
+            params = iter(params)
+
+            limits = {}
+            for parameter in params:
+                if parameter in ('wtime', 'btime', 'winc', 'binc', 'movestogo',
+                                 'depth', 'nodes', 'movetime'):
+                    limits[parameter] = int(next(params))
+                elif parameter in ('infinite', 'ponder'):
+                    limits[parameter] = True
+
+            stop_search()
+            searcher.stop_event.clear()
+            search_thread = threading.Thread(target=search_worker,
+                                             args=(searcher, board.board_copy(), limits))
+            search_thread.start()
 
         elif command.startswith('setoption'):
+            stop_search()
             _, *params = command.split()
             if params[1] == 'evalpath':
                 searcher.evaluator.load_tables(params[3] + "_square.csv", params[3] + "_piece.csv")
+            elif params[1] == 'Hash':
+                hash_size = int(params[3])
+                searcher.ttable.resize(hash_size)
+            elif params[1] == 'Threads':
+                threads = int(params[3])
+                if isinstance(searcher, ParallelSearcher) and threads > 1:
+                    searcher.set_threads(threads)
+                else:
+                    if isinstance(searcher, ParallelSearcher):
+                        searcher.close()
+                    searcher = new_searcher(evaluator, threads, hash_size)
+            elif params[1] == 'EvalCache':
+                searcher.evaluator.cache.resize(int(params[3]))
         else:
             pass
 
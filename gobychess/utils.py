@@ -2,6 +2,81 @@
 
 from textwrap import wrap
 
+# castling rights bits of Board.castling
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+
+# moves are packed into 16 bit ints:
+# bits 0-5 square from, bits 6-11 square to, bits 12-15 flags
+QUIET = 0
+DOUBLE_PAWN_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EN_PASSANT = 5
+# promotions are PROMOTION | (piecetype - 1), promotion captures add CAPTURE
+PROMOTION = 8
+
+# square from and square to are never equal, so 0 is no valid move
+NO_MOVE = 0
+
+
+def encode_move(square_from, square_to, flags=QUIET):
+    """
+    Pack a move into a 16 bit int
+
+    Args:
+        square_from (int): index of the square the piece is coming from
+        square_to (int): index of the square the piece is going to
+        flags (int): move flags (QUIET, CAPTURE, PROMOTION, ...)
+
+    Returns:
+        int: packed move
+    """
+    if not 0 <= square_from <= 63 or not 0 <= square_to <= 63:
+        raise IndexError("Square outside the Board")
+    return square_from | square_to << 6 | flags << 12
+
+
+def move_from(move):
+    """
+    get index of the square the move is coming from
+    """
+    return move & 63
+
+
+def move_to(move):
+    """
+    get index of the square the move is going to
+    """
+    return move >> 6 & 63
+
+
+def move_flags(move):
+    """
+    get flags of a move
+    """
+    return move >> 12
+
+
+def move_promotion(move):
+    """
+    get piecetype a move promotes to, 0 if the move is no promotion
+    """
+    if move & PROMOTION << 12:
+        return (move >> 12 & 3) + 1
+    return 0
+
+
+def is_capture(move):
+    """
+    check if move captures a piece (including en passant)
+    """
+    return move & CAPTURE << 12 != 0
+
+
 def gen_ones(bb):
     """
     Generator for getting all the ones in a bitboard
@@ -142,9 +217,9 @@ def perft(current_board, depth):
     if not depth:
         return 1
     for move in current_board.gen_legal_moves():
-        new_board = current_board.board_copy()
-        new_board = new_board.make_generated_move(move)
-        number_moves += perft(new_board, depth - 1)
+        current_board.make_generated_move(move)
+        number_moves += perft(current_board, depth - 1)
+        current_board.unmake_move()
     return number_moves
 
 
@@ -166,9 +241,14 @@ def promotion_from_piecetype(piecetype):
 
 def san_from_move(move):
     """
-    Get san string from move tuple
+    Get san string from packed move
     """
-    square_from, square_to, promotion = move
+    if move == NO_MOVE:
+        return "0000"
+
+    square_from = move & 63
+    square_to = move >> 6 & 63
+    promotion = move_promotion(move)
 
     string = ""
 
@@ -189,16 +269,36 @@ def san_from_move(move):
     return string
 
 
-def move_from_san(san):
+def move_from_san(san, board):
     """
-    Get move tuple from san
+    Get packed move from san, the flags are set according to the position
+
+    Args:
+        san (string): move in the form e2e4 or e7e8q
+        board (Board): position the move is played in
+
+    Returns:
+        int: packed move
     """
     from_square = index_of_square(san[0:2])
     to_square = index_of_square(san[2:4])
 
+    flags = QUIET
+    piece = board.mailbox[from_square]
+    if piece is not None:
+        piece %= 6
+    if board.mailbox[to_square] is not None:
+        flags = CAPTURE
+    elif piece == 0 and get_bit(board.en_passant, to_square):
+        flags = EN_PASSANT
+    elif piece == 0 and abs(from_square - to_square) == 16:
+        flags = DOUBLE_PAWN_PUSH
+    elif piece == 5 and to_square - from_square == 2:
+        flags = KING_CASTLE
+    elif piece == 5 and from_square - to_square == 2:
+        flags = QUEEN_CASTLE
+
     if len(san) == 5:
-        promotion = promotion_from_char(san[4])
-    else:
-        promotion = None
+        flags |= PROMOTION | (promotion_from_char(san[4]) - 1)
 
-    return (from_square, to_square, promotion)
+    return encode_move(from_square, to_square, flags)
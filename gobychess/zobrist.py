@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+"""
+Random keys for zobrist hashing of positions
+"""
+
+import random
+
+from .utils import reverse_bit_scan, unset_bit
+
+# fixed seed so hashes are reproducible between runs
+_generator = random.Random(0x60B7C4E5)
+
+# indexed by 6 * color + piecetype like Board.bitboards
+piece_keys = [[_generator.getrandbits(64) for _ in range(64)]
+              for _ in range(12)]
+
+# keys of the pawns only, zero for other pieces
+pawn_keys = [piece_keys[piece] if piece % 6 == 0 else [0] * 64 for piece in range(12)]
+
+to_move_key = _generator.getrandbits(64)
+
+# one key per castling right, combined for every value of the 4 bit mask
+_castling_right_keys = [_generator.getrandbits(64) for _ in range(4)]
+castling_keys = []
+for _mask in range(16):
+    _key = 0
+    for _bit in range(4):
+        if _mask & (1 << _bit):
+            _key ^= _castling_right_keys[_bit]
+    castling_keys.append(_key)
+
+en_passant_keys = [_generator.getrandbits(64) for _ in range(64)]
+
+
+def zobrist_hash(board):
+    """
+    Calculate the zobrist hash of a position from scratch
+
+    Args:
+        board (Board): board with position to hash
+
+    Returns:
+        int: 64 bit hash of pieces, side to move, castling rights and en passant
+    """
+    key = 0
+    for piece in range(12):
+        bitboard = board.bitboards[piece]
+        while bitboard:
+            square = reverse_bit_scan(bitboard)
+            key ^= piece_keys[piece][square]
+            bitboard = unset_bit(bitboard, square)
+
+    if board.to_move:
+        key ^= to_move_key
+
+    key ^= castling_keys[board.castling]
+
+    if board.en_passant:
+        key ^= en_passant_keys[reverse_bit_scan(board.en_passant)]
+
+    return key
+
+
+def pawn_hash(board):
+    """
+    Calculate the zobrist hash of the pawns of a position from scratch
+
+    Args:
+        board (Board): board with position to hash
+
+    Returns:
+        int: 64 bit hash of the pawns
+    """
+    key = 0
+    for piece in (0, 6):
+        bitboard = board.bitboards[piece]
+        while bitboard:
+            square = reverse_bit_scan(bitboard)
+            key ^= piece_keys[piece][square]
+            bitboard = unset_bit(bitboard, square)
+    return key
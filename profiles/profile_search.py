@@ -19,3 +19,8 @@ evaluator = Evaluator()
 s = Searcher(evaluator, aim_depth=3)
 
 cProfile.run('evaluation = s.search_negascout(board)')
+
+print(f"eval cache hits {evaluator.cache.hits} misses {evaluator.cache.misses} "
+      f"hit rate {evaluator.cache.hit_rate():.1%}")
+print(f"pawn table hits {evaluator.pawn_table.hits} misses {evaluator.pawn_table.misses} "
+      f"hit rate {evaluator.pawn_table.hit_rate():.1%}")
@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
 from gobychess.uci import main
 
-main()
+# search processes are spawned and import this script again
+if __name__ == '__main__':
+    main()
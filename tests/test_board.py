@@ -3,8 +3,12 @@
 import unittest
 
 from gobychess.board import Board
-from gobychess.utils import (bitboard_of_index, bitboard_of_square,
-                             index_of_square, print_bitboard, move_from_san)
+from gobychess.psqt import psqt_score
+from gobychess.zobrist import zobrist_hash
+from gobychess.utils import (BLACK_QUEENSIDE, CAPTURE, DOUBLE_PAWN_PUSH, EN_PASSANT,
+                             KING_CASTLE, PROMOTION, QUEEN_CASTLE, bitboard_of_index,
+                             bitboard_of_square, encode_move, index_of_square,
+                             print_bitboard, move_from_san, san_from_move)
 
 import pytest
 
@@ -21,6 +25,7 @@ class BoardTests(unittest.TestCase):
         self.assertEqual(self.board.castling_rights['white queenside'], 0)
         self.assertEqual(self.board.castling_rights['black kingside'], 0)
         self.assertEqual(self.board.castling_rights['black queenside'], 1)
+        self.assertEqual(self.board.castling, BLACK_QUEENSIDE)
         self.assertEqual(self.board.en_passant, 0)
         self.assertEqual(self.board.halfmove_clock, 2)
         self.assertEqual(self.board.fullmove_counter, 10)
@@ -51,15 +56,15 @@ class BoardTests(unittest.TestCase):
                          bitboard_of_square('f1'))
 
     def test_in_check_after_move(self):
-        self.assertEqual(self.board.in_check_after_move((52, 51, None)), False)
-        self.assertEqual(self.board.in_check_after_move((52, 53, None)), True)
-        self.assertEqual(self.board.in_check_after_move((60, 59, None)), False)
-        self.assertEqual(self.board.in_check_after_move((60, 51, None)), True)
+        self.assertEqual(self.board.in_check_after_move(encode_move(52, 51)), False)
+        self.assertEqual(self.board.in_check_after_move(encode_move(52, 53)), True)
+        self.assertEqual(self.board.in_check_after_move(encode_move(60, 59)), False)
+        self.assertEqual(self.board.in_check_after_move(encode_move(60, 51)), True)
 
     def test_make_moves(self):
         test_board = Board()
         test_board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
-        test_board.make_generated_move((index_of_square('e2'), index_of_square('e4'), None))
+        test_board.make_generated_move(move_from_san('e2e4', test_board))
         self.assertEqual(test_board.to_move, 0)
         self.assertEqual(test_board.piece_on(28), None)
         self.assertEqual(test_board.piece_on(52), 0)
@@ -70,66 +75,266 @@ class BoardTests(unittest.TestCase):
 
         test_board = Board()
         test_board.from_fen("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8")
-        test_board.make_generated_move((index_of_square('a2'), index_of_square('a3'), None))
-        test_board.make_generated_move((index_of_square('f2'), index_of_square('h1'), None))
+        test_board.make_generated_move(move_from_san('a2a3', test_board))
+        test_board.make_generated_move(move_from_san('f2h1', test_board))
 
     def test_in_check(self):
         test_board = Board()
         test_board.from_fen("r3k2N/ppp1q1pp/5n2/3Pp3/Q1Bn2b1/2P5/PP1P1bPP/RNB2K1R b q - 2 10")
         self.assertEqual(test_board.in_check(), True)
-        test_board.make_generated_move((index_of_square('c7'), index_of_square('c6'), None))
+        test_board.make_generated_move(move_from_san('c7c6', test_board))
         self.assertEqual(test_board.in_check(), False)
-        test_board.make_generated_move((index_of_square('c4'), index_of_square('b3'), None))
+        test_board.make_generated_move(move_from_san('c4b3', test_board))
         self.assertEqual(test_board.in_check(), False)
-        test_board.make_generated_move((index_of_square('g4'), index_of_square('e2'), None))
+        test_board.make_generated_move(move_from_san('g4e2', test_board))
         self.assertEqual(test_board.in_check(), True)
 
     def test_is_checkmate(self):
         test_board = Board()
         test_board.from_fen("r3k2N/ppp1q1pp/5n2/3Pp3/Q1Bn2b1/2P5/PP1P1bPP/RNB2K1R b q - 2 10")
         self.assertEqual(test_board.is_checkmate(), False)
-        test_board.make_generated_move((index_of_square('c7'), index_of_square('c6'), None))
+        test_board.make_generated_move(move_from_san('c7c6', test_board))
         self.assertEqual(test_board.is_checkmate(), False)
-        test_board.make_generated_move((index_of_square('c4'), index_of_square('b3'), None))
-        test_board.make_generated_move((index_of_square('f6'), index_of_square('e4'), None))
-        test_board.make_generated_move((index_of_square('a2'), index_of_square('a3'), None))
-        test_board.make_generated_move((index_of_square('g4'), index_of_square('e2'), None))
+        test_board.make_generated_move(move_from_san('c4b3', test_board))
+        test_board.make_generated_move(move_from_san('f6e4', test_board))
+        test_board.make_generated_move(move_from_san('a2a3', test_board))
+        test_board.make_generated_move(move_from_san('g4e2', test_board))
         self.assertEqual(test_board.is_checkmate(), True)
         test_board.from_fen("r1bqkbnr/1ppp1ppp/p1n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w KQkq - 0 4")
         self.assertEqual(test_board.is_checkmate(), False)
-        test_board.make_generated_move((index_of_square('f3'), index_of_square('f7'), None))
+        test_board.make_generated_move(move_from_san('f3f7', test_board))
         self.assertEqual(test_board.is_checkmate(), True)
 
     def test_is_stalemate(self):
         test_board = Board()
         test_board.from_fen("8/8/8/8/3k4/q7/2K5/8 w - - 0 1")
         self.assertEqual(test_board.is_stalemate(), False)
-        test_board.make_generated_move((index_of_square('c2'), index_of_square('b1'), None))
+        test_board.make_generated_move(move_from_san('c2b1', test_board))
         self.assertEqual(test_board.is_stalemate(), False)
-        test_board.make_generated_move((index_of_square('d4'), index_of_square('c3'), None))
+        test_board.make_generated_move(move_from_san('d4c3', test_board))
         self.assertEqual(test_board.is_stalemate(), True)
 
+    def test_has_any_legal_move(self):
+        test_board = Board()
+        test_board.from_fen("8/8/8/8/8/2k5/q7/1K6 w - - 0 1")
+        self.assertTrue(test_board.has_any_legal_move())
+        test_board.from_fen("8/8/8/8/8/2k5/1q6/K7 w - - 0 1")
+        self.assertFalse(test_board.has_any_legal_move())
+        # only a pinned piece could move
+        test_board.from_fen("k7/8/8/8/8/8/8/KB5r w - - 0 1")
+        self.assertTrue(test_board.has_any_legal_move())
+        test_board.from_fen("kr6/8/8/8/8/8/1r6/KB5r w - - 0 1")
+        self.assertFalse(test_board.has_any_legal_move())
+
     def test_make_move(self):
         test_board = Board()
         test_board.from_fen("r3k2N/ppp1q1pp/5n2/3Pp3/Q1Bn2b1/2P5/PP1P1bPP/RNB2K1R b q - 2 10")
         with pytest.raises(IndexError):
-            test_board.make_move((60, 68, None))
+            test_board.make_move(encode_move(60, 68))
+        with pytest.raises(IndexError):
+            test_board.make_move(1 << 16)
         with pytest.raises(ValueError):
-            test_board.make_move((index_of_square('f7'), index_of_square('d7'), None))
+            test_board.make_move(move_from_san('f7d7', test_board))
         with pytest.raises(ValueError):
-            test_board.make_move((index_of_square('e8'), index_of_square('d7'), None))
+            test_board.make_move(move_from_san('e8d7', test_board))
         with pytest.raises(ValueError):
-            test_board.make_move((index_of_square('f6'), index_of_square('e4'), None))
+            test_board.make_move(move_from_san('f6e4', test_board))
         with pytest.raises(ValueError):
-            test_board.make_move((index_of_square('e8'), index_of_square('g8'), None))
-        test_board.make_move((index_of_square('c7'), index_of_square('c6'), None))
+            test_board.make_move(move_from_san('e8g8', test_board))
+        test_board.make_move(move_from_san('c7c6', test_board))
         with pytest.raises(ValueError):
-            test_board.make_move((index_of_square('a1'), index_of_square('a3'), None))
+            test_board.make_move(move_from_san('a1a3', test_board))
 
     def test_move_from_san(self):
-        self.assertEqual(move_from_san('e1e2'), (4, 12, None))
-        self.assertEqual(move_from_san('c4b5'), (26, 33, None))
-        self.assertEqual(move_from_san('e7e8q'), (52, 60, 4))
-        self.assertEqual(move_from_san('d7d8r'), (51, 59, 3))
-        self.assertEqual(move_from_san('c7c8b'), (50, 58, 2))
-        self.assertEqual(move_from_san('b7b8n'), (49, 57, 1))
+        test_board = Board()
+        test_board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        self.assertEqual(move_from_san('g1f3', test_board), encode_move(6, 21))
+        self.assertEqual(move_from_san('e2e4', test_board), encode_move(12, 28, DOUBLE_PAWN_PUSH))
+        test_board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1")
+        self.assertEqual(move_from_san('e1g1', test_board), encode_move(4, 6, KING_CASTLE))
+        self.assertEqual(move_from_san('e1c1', test_board), encode_move(4, 2, QUEEN_CASTLE))
+        self.assertEqual(move_from_san('f3f6', test_board), encode_move(21, 45, CAPTURE))
+        test_board.from_fen("rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3")
+        self.assertEqual(move_from_san('e5f6', test_board), encode_move(36, 45, EN_PASSANT))
+        test_board.from_fen("rnbq2nr/ppp1kPpp/8/8/1b6/8/PPPP1PPP/RNBQKBNR w KQ - 1 5")
+        self.assertEqual(move_from_san('f7f8n', test_board), encode_move(53, 61, PROMOTION))
+        self.assertEqual(move_from_san('f7g8q', test_board),
+                         encode_move(53, 62, PROMOTION | CAPTURE | 3))
+
+    def test_san_from_move(self):
+        fens = ["r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+                "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"]
+        for fen in fens:
+            self.board.from_fen(fen)
+            for move in self.board.gen_legal_moves():
+                self.assertEqual(move_from_san(san_from_move(move), self.board), move)
+        self.assertEqual(san_from_move(encode_move(52, 60, PROMOTION | 3)), 'e7e8q')
+
+    def test_hash(self):
+        test_board = Board()
+        test_board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        start_hash = test_board.hash
+        for move in ['g1f3', 'g8f6', 'f3g1', 'f6g8']:
+            test_board.make_generated_move(move_from_san(move, test_board))
+        self.assertEqual(test_board.hash, start_hash)
+
+        test_board.make_generated_move(move_from_san('e2e4', test_board))
+        self.assertNotEqual(test_board.hash, start_hash)
+        self.assertEqual(test_board.hash, zobrist_hash(test_board))
+
+    def test_hash_incremental(self):
+        fens = ["r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+                "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"]
+        for fen in fens:
+            self.board.from_fen(fen)
+            for move in self.board.gen_legal_moves():
+                new_board = self.board.board_copy().make_generated_move(move)
+                self.assertEqual(new_board.hash, zobrist_hash(new_board))
+                for reply in new_board.gen_legal_moves():
+                    reply_board = new_board.board_copy().make_generated_move(reply)
+                    self.assertEqual(reply_board.hash, zobrist_hash(reply_board))
+
+    def test_score_incremental(self):
+        fens = ["r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+                "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"]
+        for fen in fens:
+            self.board.from_fen(fen)
+            score = (self.board.score, self.board.eg_score, self.board.phase)
+            self.assertEqual(score, psqt_score(self.board))
+            for move in self.board.gen_legal_moves():
+                self.board.make_generated_move(move)
+                self.assertEqual((self.board.score, self.board.eg_score, self.board.phase),
+                                 psqt_score(self.board))
+                for reply in self.board.gen_legal_moves():
+                    self.board.make_generated_move(reply)
+                    self.assertEqual((self.board.score, self.board.eg_score, self.board.phase),
+                                     psqt_score(self.board))
+                    self.board.unmake_move()
+                self.board.unmake_move()
+                self.assertEqual((self.board.score, self.board.eg_score, self.board.phase), score)
+
+    def test_unmake_move(self):
+        fens = ["r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+                "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"]
+        for fen in fens:
+            self.board.from_fen(fen)
+            reference = self.board.board_copy()
+            for move in self.board.gen_legal_moves():
+                self.board.make_generated_move(move)
+                self.board.unmake_move()
+                self.assertEqual(self.board.pieces, reference.pieces)
+                self.assertEqual(self.board.all_pieces, reference.all_pieces)
+                self.assertEqual(self.board.all_pieces_color, reference.all_pieces_color)
+                self.assertEqual(self.board.castling_rights, reference.castling_rights)
+                self.assertEqual(self.board.en_passant, reference.en_passant)
+                self.assertEqual(self.board.halfmove_clock, reference.halfmove_clock)
+                self.assertEqual(self.board.fullmove_counter, reference.fullmove_counter)
+                self.assertEqual(self.board.to_move, reference.to_move)
+                self.assertEqual(self.board.hash, reference.hash)
+            self.assertEqual(self.board.undo_stack, [])
+
+    def test_null_move(self):
+        self.board.from_fen("rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3")
+        reference = self.board.board_copy()
+        self.board.make_null_move()
+        self.assertEqual(self.board.to_move, 0)
+        self.assertEqual(self.board.en_passant, 0)
+        self.assertEqual(self.board.hash, zobrist_hash(self.board))
+        self.assertEqual(self.board.halfmove_clock, reference.halfmove_clock + 1)
+        self.board.make_generated_move(move_from_san('g8f6', self.board))
+        self.board.unmake_move()
+        self.board.unmake_null_move()
+        self.assertEqual(self.board.to_move, reference.to_move)
+        self.assertEqual(self.board.en_passant, reference.en_passant)
+        self.assertEqual(self.board.halfmove_clock, reference.halfmove_clock)
+        self.assertEqual(self.board.hash, reference.hash)
+        self.assertEqual(self.board.undo_stack, [])
+
+    def test_halfmove_clock(self):
+        test_board = Board()
+        test_board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        test_board.make_generated_move(move_from_san('g1f3', test_board))
+        test_board.make_generated_move(move_from_san('g8f6', test_board))
+        self.assertEqual(test_board.halfmove_clock, 2)
+        test_board.make_generated_move(move_from_san('e2e4', test_board))
+        self.assertEqual(test_board.halfmove_clock, 0)
+        test_board.unmake_move()
+        self.assertEqual(test_board.halfmove_clock, 2)
+
+    def test_to_fen(self):
+        fens = ["rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+                "8/8/8/8/8/2k5/1q6/K7 w - - 0 1",
+                "rnbqkbnr/pp1ppppp/8/2pP4/8/8/PPP1PPPP/RNBQKBNR b Kq c6 3 12"]
+        test_board = Board()
+        for fen in fens:
+            test_board.from_fen(fen)
+            self.assertEqual(test_board.to_fen(), fen)
+
+    def test_repetition(self):
+        test_board = Board()
+        test_board.reset_board()
+        shuffle = ['g1f3', 'g8f6', 'f3g1', 'f6g8']
+        for move in shuffle:
+            self.assertFalse(test_board.is_repetition())
+            test_board.make_generated_move(move_from_san(move, test_board))
+        self.assertTrue(test_board.is_repetition())
+        self.assertEqual(len(test_board.hash_history), 4)
+        test_board.unmake_move()
+        self.assertFalse(test_board.is_repetition())
+        self.assertEqual(len(test_board.hash_history), 3)
+
+        # a pawn move in between can not be reached back over
+        test_board.reset_board()
+        for move in ['g1f3', 'g8f6', 'f3g1', 'f6g8', 'e2e3', 'e7e6']:
+            test_board.make_generated_move(move_from_san(move, test_board))
+        for move in shuffle:
+            test_board.make_generated_move(move_from_san(move, test_board))
+        self.assertTrue(test_board.is_repetition())
+        self.assertEqual(test_board.halfmove_clock, 4)
+        # neither over a null move
+        test_board.unmake_move()
+        test_board.make_null_move()
+        test_board.make_null_move()
+        self.assertFalse(test_board.is_repetition())
+        test_board.unmake_null_move()
+        test_board.unmake_null_move()
+        self.assertEqual(len(test_board.hash_history), 9)
+
+    def test_fifty_move_draw(self):
+        test_board = Board()
+        test_board.from_fen("k7/8/8/8/8/8/8/KQ6 w - - 99 80")
+        self.assertFalse(test_board.is_draw())
+        test_board.make_generated_move(move_from_san('b1b2', test_board))
+        self.assertTrue(test_board.is_draw())
+        test_board.unmake_move()
+        # the null move counts for the fifty move rule
+        test_board.make_null_move()
+        self.assertTrue(test_board.is_draw())
+        test_board.unmake_null_move()
+        self.assertEqual(test_board.halfmove_clock, 99)
+        # mate with the hundredth halfmove is no draw
+        test_board.from_fen("k7/8/1K6/8/8/8/8/7Q w - - 99 80")
+        test_board.make_generated_move(move_from_san('h1h8', test_board))
+        self.assertEqual(test_board.halfmove_clock, 100)
+        self.assertFalse(test_board.is_draw())
+
+    def test_mailbox(self):
+        fens = ["r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+                "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"]
+        for fen in fens:
+            self.board.from_fen(fen)
+            mailbox = self.board.mailbox[:]
+            for move in self.board.gen_legal_moves():
+                self.board.make_generated_move(move)
+                for square in range(64):
+                    pieces = [piece for piece in range(12)
+                              if self.board.bitboards[piece] & (1 << square)]
+                    self.assertEqual(self.board.mailbox[square], next(iter(pieces), None))
+                self.board.unmake_move()
+                self.assertEqual(self.board.mailbox, mailbox)
@@ -1,13 +1,65 @@
 #!/usr/bin/env python3
 
 
+import os
+import tempfile
 import unittest
 
 from gobychess.board import Board
-#from gobychess.evaluation import piece_scores
+from gobychess.utils import move_from_san
+from gobychess.evaluation import Evaluator
 
 
 class EvalTest(unittest.TestCase):
     def test_piece_scores(self):
         test_board = Board()
         test_board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+
+    def test_weighted_piece_scores(self):
+        test_board = Board()
+        test_board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        evaluator = Evaluator(debug=True)
+        self.assertEqual(evaluator.weighted_piece_scores(test_board), 0)
+        test_board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN1 w Qkq - 0 1")
+        self.assertLess(evaluator.weighted_piece_scores(test_board), -400)
+
+        # a score that was not updated is caught in debug mode
+        test_board.score += 1
+        with self.assertRaises(AssertionError):
+            evaluator.weighted_piece_scores(test_board)
+        test_board.score -= 1
+        self.assertEqual(evaluator.weighted_piece_scores(test_board),
+                         (22 * test_board.score + 2 * test_board.eg_score) // 24)
+
+    def test_tapered(self):
+        test_board = Board()
+        evaluator = Evaluator(debug=True)
+        test_board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        self.assertEqual(test_board.phase, 24)
+        # in pawn endings the king belongs into the center, not the corner
+        test_board.from_fen("4k3/4p3/8/8/8/8/4P3/7K w - - 0 1")
+        self.assertEqual(test_board.phase, 0)
+        corner = evaluator.weighted_piece_scores(test_board)
+        test_board.from_fen("4k3/4p3/8/8/4K3/8/4P3/8 w - - 0 1")
+        self.assertGreater(evaluator.weighted_piece_scores(test_board), corner)
+
+        # promotions add to the phase
+        test_board.from_fen("4k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+        test_board.make_generated_move(move_from_san('a7a8q', test_board))
+        self.assertEqual(test_board.phase, 4)
+        evaluator.weighted_piece_scores(test_board)
+
+    def test_load_tables(self):
+        evaluator = Evaluator()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tables.csv')
+            evaluator.save_tables(path)
+            loaded = Evaluator()
+            loaded.piece_score = []
+            loaded.load_tables(path)
+        self.assertEqual(loaded.piece_score, evaluator.piece_score)
+        self.assertEqual(loaded.eg_piece_score, evaluator.eg_piece_score)
+        self.assertEqual([list(table) for table in evaluator.square_score_table],
+                         loaded.square_score_table)
+        self.assertEqual([list(table) for table in evaluator.eg_square_score_table],
+                         loaded.eg_square_score_table)
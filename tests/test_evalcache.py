@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from gobychess.board import Board
+from gobychess.evalcache import ENTRY_SIZE, EvalCache
+from gobychess.evaluation import Evaluator
+
+
+class EvalCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = EvalCache(1)
+
+    def test_size(self):
+        self.assertLessEqual(self.cache.size * ENTRY_SIZE, 1024 * 1024)
+        self.assertGreater(self.cache.size * ENTRY_SIZE, 512 * 1024)
+        self.assertEqual(self.cache.size, self.cache.mask + 1)
+
+    def test_store_probe(self):
+        key = 12345
+        self.assertEqual(self.cache.probe(key), None)
+        self.cache.store(key, -250)
+        self.assertEqual(self.cache.probe(key), -250)
+        # an entry with the same index replaces the old one
+        self.cache.store(key + self.cache.size, 30)
+        self.assertEqual(self.cache.probe(key), None)
+        self.assertEqual(self.cache.probe(key + self.cache.size), 30)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+        self.assertEqual(self.cache.hit_rate(), 0.5)
+        self.cache.clear()
+        self.assertEqual(self.cache.probe(key + self.cache.size), None)
+
+    def test_evaluator(self):
+        board = Board()
+        board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1")
+        evaluator = Evaluator(debug=True, cache_size=1)
+        score = evaluator.weighted_piece_scores(board)
+        self.assertEqual(evaluator.weighted_piece_scores(board), score)
+        self.assertEqual(evaluator.cache.hits, 1)
+        self.assertEqual(score, evaluator.static_score(board))
+
+    def test_settings(self):
+        evaluator = Evaluator(cache_size=1)
+        other = Evaluator(cache_size=2)
+        other.cache.store(12345, 30)
+        other.load_settings(evaluator.settings())
+        self.assertEqual(other.cache.size_mb, 1)
+        self.assertEqual(other.cache.size, evaluator.cache.size)
+        self.assertEqual(other.cache.probe(12345), None)
+        self.assertEqual(other.settings(), evaluator.settings())
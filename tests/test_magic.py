@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import random
+import unittest
+
+import gobychess.magic as magic
+import gobychess.movegen as mvg
+
+
+class MagicTests(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(42)
+        self.occupancies = [0, (1 << 64) - 1]
+        self.occupancies += [generator.getrandbits(64) & generator.getrandbits(64)
+                             for _ in range(40)]
+
+    def test_rook_sliding(self):
+        for square in range(64):
+            for occupancy in self.occupancies:
+                self.assertEqual(magic.rook_sliding(square, occupancy),
+                                 mvg.rook_sliding_rays(square, occupancy))
+
+    def test_bishop_sliding(self):
+        for square in range(64):
+            for occupancy in self.occupancies:
+                self.assertEqual(magic.bishop_sliding(square, occupancy),
+                                 mvg.bishop_sliding_rays(square, occupancy))
+
+    def test_build_table(self):
+        masks, shifts, offsets, attacks = magic.build_table(magic.ROOK_DIRECTIONS,
+                                                            magic.ROOK_MAGICS)
+        self.assertEqual(masks, magic.rook_masks)
+        self.assertEqual(offsets, magic.rook_offsets)
+        self.assertEqual(attacks, magic.rook_attacks)
+
+    def test_load_tables(self):
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'magic.marshal')
+            built = magic.load_tables(path)
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(magic.load_tables(path), built)
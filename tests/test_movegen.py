@@ -4,7 +4,8 @@ import unittest
 
 from gobychess.board import Board
 import gobychess.movegen as mvg
-from gobychess.utils import bitboard_of_square, index_of_square, bitboard_from_squares, print_bitboard
+from gobychess.utils import (bitboard_of_square, index_of_square, bitboard_from_squares,
+                             move_from_san, print_bitboard)
 
 
 class MovegenTests(unittest.TestCase):
@@ -91,23 +92,27 @@ class MovegenTests(unittest.TestCase):
 
     def test_gen_knight_moves(self):
         black_moves = len(list(mvg.gen_knight_moves(self.board.pieces[0][1],
-                                                    self.board.all_pieces_color[0])))
+                                                    self.board.all_pieces_color[0],
+                                                    self.board.all_pieces_color[1])))
 
         self.assertEqual(black_moves, 13)
 
         white_moves = len(list(mvg.gen_knight_moves(self.board.pieces[1][1],
-                                                    self.board.all_pieces_color[1])))
+                                                    self.board.all_pieces_color[1],
+                                                    self.board.all_pieces_color[0])))
 
         self.assertEqual(white_moves, 3)
 
     def test_gen_king_moves(self):
         black_moves = len(list(mvg.gen_king_moves(self.board.pieces[0][5],
-                                                  self.board.all_pieces_color[0])))
+                                                  self.board.all_pieces_color[0],
+                                                  self.board.all_pieces_color[1])))
 
         self.assertEqual(black_moves, 4)
 
         white_moves = len(list(mvg.gen_king_moves(self.board.pieces[1][5],
-                                                  self.board.all_pieces_color[1])))
+                                                  self.board.all_pieces_color[1],
+                                                  self.board.all_pieces_color[0])))
 
         self.assertEqual(white_moves, 4)
 
@@ -123,22 +128,22 @@ class MovegenTests(unittest.TestCase):
 
     def test_check_piece_move(self):
         self.board.to_move = 1
-        self.assertEqual(mvg.check_piece_move((8, 16, None), self.board), True)
-        self.assertEqual(mvg.check_piece_move((8, 24, None), self.board), False)
-        self.assertEqual(mvg.check_piece_move((9, 25, None), self.board), True)
-        self.assertEqual(mvg.check_piece_move((26, 33, None), self.board), True)
-        self.assertEqual(mvg.check_piece_move((26, 53, None), self.board), False)
-        self.assertEqual(mvg.check_piece_move((7, 6, None), self.board), True)
-        self.assertEqual(mvg.check_piece_move((7, 8, None), self.board), False)
+        self.assertEqual(mvg.check_piece_move(move_from_san('a2a3', self.board), self.board), True)
+        self.assertEqual(mvg.check_piece_move(move_from_san('a2a4', self.board), self.board), False)
+        self.assertEqual(mvg.check_piece_move(move_from_san('b2b4', self.board), self.board), True)
+        self.assertEqual(mvg.check_piece_move(move_from_san('c4b5', self.board), self.board), True)
+        self.assertEqual(mvg.check_piece_move(move_from_san('c4f7', self.board), self.board), False)
+        self.assertEqual(mvg.check_piece_move(move_from_san('h1g1', self.board), self.board), True)
+        self.assertEqual(mvg.check_piece_move(move_from_san('h1a2', self.board), self.board), False)
 
         self.board.to_move = 0
-        self.assertEqual(mvg.check_piece_move((55, 47, None), self.board), False)
-        self.assertEqual(mvg.check_piece_move((55, 39, None), self.board), False)
-        self.assertEqual(mvg.check_piece_move((55, 32, None), self.board), False)
-        self.assertEqual(mvg.check_piece_move((56, 59, None), self.board), False)
-        self.assertEqual(mvg.check_piece_move((56, 53, None), self.board), False)
-        self.assertEqual(mvg.check_piece_move((60, 59, None), self.board), True)
-        self.assertEqual(mvg.check_piece_move((60, 52, None), self.board), False)
+        self.assertEqual(mvg.check_piece_move(move_from_san('h7h6', self.board), self.board), False)
+        self.assertEqual(mvg.check_piece_move(move_from_san('h7h5', self.board), self.board), False)
+        self.assertEqual(mvg.check_piece_move(move_from_san('h7a5', self.board), self.board), False)
+        self.assertEqual(mvg.check_piece_move(move_from_san('a8d8', self.board), self.board), False)
+        self.assertEqual(mvg.check_piece_move(move_from_san('a8f7', self.board), self.board), False)
+        self.assertEqual(mvg.check_piece_move(move_from_san('e8d8', self.board), self.board), True)
+        self.assertEqual(mvg.check_piece_move(move_from_san('e8e7', self.board), self.board), False)
 
     def test_in_check(self):
         self.assertEqual(self.board.in_check(), True)
@@ -163,3 +168,20 @@ class MovegenTests(unittest.TestCase):
         self.assertEqual(len(list(test_board.gen_quiet_moves())), 1)
         test_board.from_fen("rnbq2nr/ppp1kPpp/8/8/1b6/8/PPPP1PPP/RNBQKBNR w KQ - 1 5")
         self.assertEqual(len(list(test_board.gen_quiet_moves())), 4)
+
+    def test_generate_legal_moves(self):
+        fens = ["r3k2N/ppp1q1pp/5n2/3Pp3/Q1Bn2b1/2P5/PP1P1bPP/RNB2K1R b q - 2 10",
+                "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+                "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 1 1",
+                "8/8/8/KPp4r/8/8/8/7k w - c6 0 2",
+                "8/8/8/8/k2Pp2Q/8/8/3K4 b - d3 0 1",
+                "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"]
+        for fen in fens:
+            self.board.from_fen(fen)
+            pseudo_legal = [move for move in mvg.generate_moves(self.board)
+                            if not self.board.in_check_after_move(move)]
+            self.assertEqual(sorted(mvg.generate_legal_moves(self.board)), sorted(pseudo_legal))
+            pseudo_legal = [move for move in mvg.generate_quiet_moves(self.board)
+                            if not self.board.in_check_after_move(move)]
+            self.assertEqual(sorted(mvg.generate_legal_moves(self.board, quiets=False)),
+                             sorted(pseudo_legal))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from gobychess.board import Board
+import gobychess.movegen as mvg
+from gobychess.movepick import MovePicker
+from gobychess.utils import NO_MOVE, encode_move, is_capture, move_from_san
+
+
+class MovePickerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.board = Board()
+        self.fens = ["r3k2N/ppp1q1pp/5n2/3Pp3/Q1Bn2b1/2P5/PP1P1bPP/RNB2K1R b q - 2 10",
+                     "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1",
+                     "8/8/8/KPp4r/8/8/8/7k w - c6 0 2",
+                     "8/8/8/8/k2Pp2Q/8/8/3K4 b - d3 0 1",
+                     "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"]
+
+    def test_is_legal_move(self):
+        for fen in self.fens:
+            self.board.from_fen(fen)
+            legal = {move for move in range(1 << 16) if mvg.is_legal_move(self.board, move)}
+            self.assertEqual(legal, set(mvg.generate_legal_moves(self.board)))
+
+    def test_all_moves(self):
+        for fen in self.fens:
+            self.board.from_fen(fen)
+            legal = sorted(mvg.generate_legal_moves(self.board))
+            killers = [move for move in legal if not is_capture(move)][-2:]
+            for tt_move in [NO_MOVE, legal[0], legal[-1], encode_move(0, 63)]:
+                picked = list(MovePicker(self.board, tt_move, killers))
+                self.assertEqual(sorted(picked), legal)
+                if tt_move in legal:
+                    self.assertEqual(picked[0], tt_move)
+
+            captures = sorted(mvg.generate_legal_moves(self.board, quiets=False))
+            self.assertEqual(sorted(MovePicker(self.board, quiets=False)), captures)
+
+    def test_order(self):
+        self.board.from_fen(self.fens[1])
+        killer = move_from_san('a2a3', self.board)
+        picked = list(MovePicker(self.board, killers=[killer, NO_MOVE]))
+        number_good = picked.index(killer)
+        self.assertTrue(all(is_capture(move) for move in picked[:number_good]))
+        # bishop takes bishop is the most valuable capture
+        self.assertEqual(picked[0], move_from_san('e2a6', self.board))
+        # captures losing material come last, ordered by the exchange
+        losing = [move_from_san(move, self.board) for move in ['e5f7', 'e5d7', 'e5g6', 'f3h3', 'f3f6']]
+        self.assertEqual(picked[-5:], losing)
+        # they are the only captures after the good ones
+        later_captures = [index for index, move in enumerate(picked)
+                          if index >= number_good and is_capture(move)]
+        self.assertEqual(later_captures, list(range(len(picked) - 5, len(picked))))
+
+        captures = list(MovePicker(self.board, quiets=False, losing_captures=False))
+        self.assertEqual(captures, picked[:number_good])
+
+    def test_see(self):
+        positions = [("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1", 'e1e5', 100),
+                     ("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1", 'd3e5', -220),
+                     ("4k3/3p4/4p3/3q4/4Q3/8/8/4K3 w - - 0 1", 'e4d5', 0),
+                     ("3r2k1/8/8/3p4/8/8/3R4/3RK3 w - - 0 1", 'd2d5', 100),
+                     ("3q2k1/8/8/3p4/8/8/3R4/3RK3 w - - 0 1", 'd2d5', 100),
+                     ("3r2k1/3r4/8/3p4/8/8/3R4/3RK3 w - - 0 1", 'd2d5', -400),
+                     ("4k3/8/8/3p4/4K3/8/8/8 w - - 0 1", 'e4d5', 100),
+                     ("8/8/8/KPp4r/8/8/8/7k w - c6 0 2", 'b5c6', 100),
+                     ("1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1", 'a7b8q', 1120)]
+        for fen, move, score in positions:
+            self.board.from_fen(fen)
+            self.assertEqual(mvg.see(self.board, move_from_san(move, self.board)), score)
+
+    def test_history_order(self):
+        self.board.from_fen(self.fens[1])
+        history = [0] * 4096
+        best = move_from_san('a2a4', self.board)
+        second = move_from_san('e1d1', self.board)
+        history[best & 4095] = 100
+        history[second & 4095] = 50
+        history[move_from_san('g2g3', self.board) & 4095] = -50
+        picked = [move for move in MovePicker(self.board, history=history) if not is_capture(move)]
+        self.assertEqual(picked[:2], [best, second])
+        self.assertEqual(picked[-1], move_from_san('g2g3', self.board))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from gobychess.board import Board
+from gobychess.pawns import PawnTable, pawn_structure
+from gobychess.utils import move_from_san
+from gobychess.zobrist import pawn_hash
+
+
+class PawnTests(unittest.TestCase):
+
+    def setUp(self):
+        self.board = Board()
+
+    def structure(self, fen):
+        self.board.from_fen(fen)
+        return pawn_structure(self.board.bitboards[6], self.board.bitboards[0])
+
+    def test_pawn_structure(self):
+        # symmetric structures are equal
+        self.assertEqual(self.structure("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"), (0, 0))
+        self.assertEqual(self.structure("4k3/pp6/8/8/8/8/PP6/4K3 w - - 0 1"), (0, 0))
+        # doubled and isolated, only the front pawn is passed
+        self.assertEqual(self.structure("4k3/8/8/8/8/P7/P7/4K3 w - - 0 1"), (-20, -30))
+        # passed c4, backward d3 and isolated black e5
+        self.assertEqual(self.structure("4k3/8/8/4p3/2P5/3P4/8/4K3 w - - 0 1"), (17, 40))
+        # passed pawns get more valuable closer to promotion
+        self.assertEqual(self.structure("4k3/P7/8/8/8/8/8/4K3 w - - 0 1"), (60, 135))
+        self.assertEqual(self.structure("4k3/8/8/8/8/8/p7/4K3 w - - 0 1"), (-60, -135))
+
+    def test_pawn_hash(self):
+        self.board.from_fen("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1")
+        key = self.board.pawn_hash
+        for move in self.board.gen_legal_moves():
+            self.board.make_generated_move(move)
+            self.assertEqual(self.board.pawn_hash, pawn_hash(self.board))
+            for reply in self.board.gen_legal_moves():
+                self.board.make_generated_move(reply)
+                self.assertEqual(self.board.pawn_hash, pawn_hash(self.board))
+                self.board.unmake_move()
+            self.board.unmake_move()
+        self.assertEqual(self.board.pawn_hash, key)
+        # pieces do not change the pawn hash
+        self.board.make_generated_move(move_from_san('f3g1', self.board))
+        self.assertEqual(self.board.pawn_hash, key)
+
+    def test_pawn_table(self):
+        table = PawnTable(1)
+        self.board.from_fen("4k3/8/8/4p3/2P5/3P4/8/4K3 w - - 0 1")
+        self.assertEqual(table.probe(self.board), (17, 40))
+        self.assertEqual(table.probe(self.board), (17, 40))
+        self.assertEqual((table.hits, table.misses), (1, 1))
+        self.board.make_generated_move(move_from_san('e1f2', self.board))
+        self.assertEqual(table.probe(self.board), (17, 40))
+        self.assertEqual(table.hit_rate(), 2 / 3)
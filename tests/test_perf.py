@@ -19,23 +19,23 @@ class PerftTests(unittest.TestCase):
         if not depth:
             return 1
         for move in current_board.gen_legal_moves():
-            new_board = current_board.board_copy()
-            new_board = new_board.make_generated_move(move)
-            number_moves += self._perft(new_board, depth - 1)
+            current_board.make_generated_move(move)
+            number_moves += self._perft(current_board, depth - 1)
+            current_board.unmake_move()
         return number_moves
 
     def test_perft(self):
         self.assertEqual(self._perft(self.board, 1), 20)
         self.assertEqual(self._perft(self.board, 2), 400)
         self.assertEqual(self._perft(self.board, 3), 8902)
-        # self.assertEqual(self._perft(self.board, 4), 197_281)
+        self.assertEqual(self._perft(self.board, 4), 197_281)
         # self.assertEqual(self._perft(self.board, 5), 4_865_609)
 
     def test_perft_pos2(self):
         self.board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1")
         self.assertEqual(self._perft(self.board, 1), 48)
         self.assertEqual(self._perft(self.board, 2), 2039)
-        # self.assertEqual(self._perft(self.board, 3), 97_862)
+        self.assertEqual(self._perft(self.board, 3), 97_862)
         # self.assertEqual(self._perft(self.board, 4), 4_085_603)
 
     def test_perft_pos3(self):
@@ -43,7 +43,7 @@ class PerftTests(unittest.TestCase):
         self.assertEqual(self._perft(self.board, 1), 14)
         self.assertEqual(self._perft(self.board, 2), 191)
         self.assertEqual(self._perft(self.board, 3), 2812)
-        # self.assertEqual(self._perft(self.board, 4), 43_238)
+        self.assertEqual(self._perft(self.board, 4), 43_238)
         # self.assertEqual(self._perft(self.board, 5), 674_624)
         # self.assertEqual(self._perft(self.board, 6), 11_030_083)
 
@@ -67,7 +67,7 @@ class PerftTests(unittest.TestCase):
         self.board.from_fen("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10")
         self.assertEqual(self._perft(self.board, 1), 46)
         self.assertEqual(self._perft(self.board, 2), 2079)
-        # self.assertEqual(self._perft(self.board, 3), 89_890)
+        self.assertEqual(self._perft(self.board, 3), 89_890)
         # self.assertEqual(self._perft(self.board, 4), 3_894_594)
 
     def test_perft_pos7(self):
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import contextlib
+import io
+import unittest
+
+from gobychess.board import Board
+from gobychess.evaluation import Evaluator
+from gobychess.rootsplit import RootSplitter, decode_board, encode_board
+from gobychess.search import MATE_SCORE, Searcher
+from gobychess.utils import move_from_san
+
+
+class RootSplitterTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.searcher = Searcher(Evaluator(), manage_time=False, hash_size=1)
+        cls.splitter = RootSplitter(cls.searcher, workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.splitter.close()
+
+    def setUp(self):
+        self.board = Board()
+        self.board.from_fen("r1bqkbnr/1ppp1ppp/p1n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w KQkq - 0 4")
+
+    def search(self, depth):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            score = self.splitter.search(self.board, depth)
+        return score, output.getvalue()
+
+    def test_mate(self):
+        score, output = self.search(3)
+        self.assertEqual(self.searcher.best_move, move_from_san('f3f7', self.board))
+        self.assertEqual(score, MATE_SCORE - 1)
+        self.assertIn("info depth 3 score mate 1", output)
+        self.assertEqual(self.board.undo_stack, [])
+
+    def test_deterministic(self):
+        self.board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1")
+        results = []
+        for workers in (2, 1, 2):
+            self.splitter.close()
+            self.splitter = type(self).splitter = RootSplitter(self.searcher, workers)
+            score, _ = self.search(4)
+            results.append((score, self.searcher.best_move, self.searcher.nodes))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    def test_hash_size(self):
+        # the pool processes follow the size of the transposition table
+        self.board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1")
+        self.searcher.ttable.resize(2)
+        try:
+            results = [(self.search(3)[0], self.searcher.best_move, self.searcher.nodes)
+                       for _ in range(2)]
+        finally:
+            self.searcher.ttable.resize(1)
+        self.assertEqual(results[0], results[1])
+
+    def test_no_moves(self):
+        self.board.from_fen("8/8/8/8/8/2k5/1q6/K7 w - - 0 1")
+        score, _ = self.search(3)
+        self.assertEqual(score, -MATE_SCORE)
+        self.assertEqual(self.searcher.best_move, 0)
+
+    def test_encode_board(self):
+        for move in ['b1c3', 'g8e7', 'c3b1', 'e7g8']:
+            self.board.make_generated_move(move_from_san(move, self.board))
+        board = decode_board(encode_board(self.board))
+        self.assertEqual(board.hash, self.board.hash)
+        self.assertEqual(board.to_fen(), self.board.to_fen())
+        self.assertTrue(board.is_repetition())
+
+
+if __name__ == '__main__':
+    unittest.main()
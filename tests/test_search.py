@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+import contextlib
+import io
+import threading
+import time
+import unittest
+
+from gobychess.board import Board
+from gobychess.evaluation import Evaluator
+import gobychess.movegen as mvg
+from gobychess.search import MATE_BOUND, MATE_SCORE, MAX_PLY, Searcher, uci_score
+from gobychess.utils import NO_MOVE, move_from_san
+
+
+class SearchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.board = Board()
+        self.board.from_fen("r1bqkbnr/1ppp1ppp/p1n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w KQkq - 0 4")
+        self.searcher = Searcher(Evaluator(), aim_depth=3, manage_time=False, hash_size=1)
+
+    def test_search_negascout_tt(self):
+        self.searcher.search_negascout_tt(self.board)
+        mate = move_from_san('f3f7', self.board)
+        self.assertEqual(self.searcher.best_move, mate)
+        self.assertEqual(self.searcher.ttable.probe(self.board.hash)[3], mate)
+
+    def test_principal_variation(self):
+        self.board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1")
+        reference = self.board.board_copy()
+        self.searcher.search_negascout_tt(self.board)
+        pv = self.searcher.principal_variation(self.board)
+        self.assertEqual(pv[0], self.searcher.best_move)
+        self.assertGreaterEqual(len(pv), 2)
+        for move in pv:
+            self.assertTrue(mvg.is_legal_move(self.board, move))
+            self.board.make_generated_move(move)
+        for _ in pv:
+            self.board.unmake_move()
+        self.assertEqual(self.board.hash, reference.hash)
+
+    def test_search_iter(self):
+        self.searcher.search_iter(self.board, depth=2)
+        self.assertEqual(self.searcher.best_move, move_from_san('f3f7', self.board))
+
+    def test_search_iter_limits(self):
+        self.board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1")
+        reference = self.board.board_copy()
+
+        self.searcher.search_iter(self.board, nodes=2000)
+        self.assertEqual(self.searcher.nodes, 2000)
+        self.assertTrue(mvg.is_legal_move(self.board, self.searcher.best_move))
+        self.assertEqual(self.board.hash, reference.hash)
+        self.assertEqual(self.board.undo_stack, [])
+
+        start = time.time()
+        self.searcher.search_iter(self.board, movetime=200)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertTrue(mvg.is_legal_move(self.board, self.searcher.best_move))
+        self.assertEqual(self.board.pieces, reference.pieces)
+
+    def test_stop(self):
+        timer = threading.Timer(0.2, self.searcher.stop_event.set)
+        timer.start()
+        start = time.time()
+        self.searcher.search_iter(self.board, infinite=True)
+        timer.join()
+        self.assertLess(time.time() - start, 1)
+        self.assertTrue(mvg.is_legal_move(self.board, self.searcher.best_move))
+
+    def test_ponderhit(self):
+        self.searcher.ponder_limits = (self.board, 100, None, None, 0, 0, None)
+        self.searcher.pondering = True
+        start = time.time()
+        self.searcher.ponderhit()
+        self.assertFalse(self.searcher.pondering)
+        self.assertAlmostEqual(self.searcher.hard_deadline - start, 0.07, delta=0.02)
+
+    def test_aspiration_search(self):
+        self.board.from_fen("r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+        self.searcher.aim_depth = 3
+        score = self.searcher.s__negascout_tt(self.board, 3, -100000000, 100000000)
+        for last_score in [score - 1000, score + 1000]:
+            searcher = Searcher(Evaluator(), hash_size=1)
+            searcher.aim_depth = 3
+            self.assertEqual(searcher.aspiration_search(self.board, 3, last_score), score)
+            self.assertEqual(searcher.fail_lows + searcher.fail_highs, 5)
+
+    def test_history(self):
+        move = move_from_san('b1c3', self.board)
+        tried = move_from_san('a2a3', self.board)
+        for _ in range(1000):
+            self.searcher.update_history(self.board, move, 10, [tried])
+        history = self.searcher.history[self.board.to_move]
+        self.assertTrue(0 < history[move & 4095] <= 16384)
+        self.assertTrue(-16384 <= history[tried & 4095] < 0)
+        # captures are ordered by material and do not change the history
+        self.searcher.update_history(self.board, move_from_san('f3f7', self.board), 10)
+        self.assertEqual(history[move_from_san('f3f7', self.board) & 4095], 0)
+
+        self.searcher.store_killer(move, 3)
+        score = history[move & 4095]
+        self.searcher.age_history()
+        self.assertEqual(history[move & 4095], score // 2)
+        self.assertEqual(self.searcher.killers[3], [0, 0])
+
+    def test_null_move(self):
+        self.assertTrue(self.searcher.null_move_allowed(self.board, 3, 1, True))
+        self.assertFalse(self.searcher.null_move_allowed(self.board, 3, 1, False))
+        self.assertFalse(self.searcher.null_move_allowed(self.board, 3, 0, True))
+        self.assertFalse(self.searcher.null_move_allowed(self.board, 2, 1, True))
+        # pawn ending
+        self.board.from_fen("8/5pk1/8/4P3/8/8/5PK1/8 w - - 0 1")
+        self.assertFalse(self.searcher.null_move_allowed(self.board, 3, 1, True))
+        # in check
+        self.board.from_fen("4k3/8/8/8/8/8/4r3/R3K3 w - - 0 1")
+        self.assertFalse(self.searcher.null_move_allowed(self.board, 3, 1, True))
+
+        # mate scores of null move cutoffs are stored relative to the node
+        self.board.from_fen("r1bqkbnr/1ppp1ppp/p1n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w KQkq - 0 4")
+        self.searcher.null_move_cutoff = lambda *args: True
+        beta = MATE_SCORE - 10
+        self.assertEqual(self.searcher.s__negascout_tt(self.board, 4, beta - 1, beta, False, 3), beta)
+        self.assertEqual(self.searcher.ttable.probe(self.board.hash)[0], beta + 3)
+        del self.searcher.null_move_cutoff
+
+        # aborts inside null move subtrees restore the position
+        self.board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 1 1")
+        reference = self.board.board_copy()
+        for nodes in range(500, 5000, 373):
+            self.searcher.search_iter(self.board, nodes=nodes)
+            self.assertEqual(self.board.hash, reference.hash)
+            self.assertEqual(self.board.to_move, reference.to_move)
+            self.assertEqual(self.board.undo_stack, [])
+
+    def test_late_move_reduction(self):
+        quiet = move_from_san('b1c3', self.board)
+        self.board.make_generated_move(quiet)
+        self.assertGreater(self.searcher.late_move_reduction(self.board, 6, quiet, 10, False), 0)
+        self.assertEqual(self.searcher.late_move_reduction(self.board, 6, quiet, 2, False), 0)
+        self.assertEqual(self.searcher.late_move_reduction(self.board, 2, quiet, 10, False), 0)
+        self.assertEqual(self.searcher.late_move_reduction(self.board, 6, quiet, 10, True), 0)
+        self.assertLessEqual(self.searcher.late_move_reduction(self.board, 3, quiet, 60, False), 1)
+        self.board.unmake_move()
+        # captures and checks are searched with full depth
+        capture = move_from_san('f3f7', self.board)
+        self.board.make_generated_move(capture)
+        self.assertEqual(self.searcher.late_move_reduction(self.board, 6, capture, 10, False), 0)
+        self.board.unmake_move()
+        self.board.from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 0 1")
+        check = move_from_san('a1a8', self.board)
+        self.board.make_generated_move(check)
+        self.assertEqual(self.searcher.late_move_reduction(self.board, 6, check, 10, False), 0)
+
+    def test_fifty_move_rule(self):
+        # every move of white draws by the fifty move rule
+        self.board.from_fen("k7/8/8/8/8/8/8/KQ6 w - - 99 80")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.searcher.search_iter(self.board, depth=3), 0)
+        self.board.from_fen("k7/8/8/8/8/8/8/KQ6 w - - 0 80")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertGreater(self.searcher.search_iter(self.board, depth=3), 500)
+
+    def test_terminal_scores(self):
+        # mate in two moves, three plies from the root: Qf5 Kb8 Qf8#
+        self.board.from_fen("k7/8/1K6/8/8/8/8/1Q6 w - - 0 1")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            score = self.searcher.search_iter(self.board, depth=5)
+        self.assertEqual(score, MATE_SCORE - 3)
+        self.assertIn("score mate 2", output.getvalue())
+        self.assertEqual(uci_score(-MATE_SCORE + 4), "mate -2")
+
+        # stalemate scores 0 at any ply
+        self.board.from_fen("7k/5Q2/8/8/8/8/8/K7 b - - 0 1")
+        self.assertEqual(self.searcher.terminal_score(self.board, 3), 0)
+        # being mated three plies from the root scores -MATE_SCORE + 3
+        self.board.from_fen("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1")
+        self.assertEqual(self.searcher.terminal_score(self.board, 3), -MATE_SCORE + 3)
+
+    def test_quiescence_checks(self):
+        # the evasions of a repeated position are not searched
+        self.board.from_fen("7k/8/8/8/8/8/8/K6R b - - 0 1")
+        for move in ('h8g8', 'h1g1', 'g8h8', 'g1h1'):
+            self.board.make_generated_move(move_from_san(move, self.board))
+        self.assertEqual(self.searcher.quiescence(self.board, -MATE_SCORE, MATE_SCORE, 4), 0)
+        # no evasions are searched at the ply limit, so no mate is found
+        self.board.from_fen("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1")
+        score = self.searcher.quiescence(self.board, -MATE_SCORE, MATE_SCORE, MAX_PLY)
+        self.assertGreater(score, -MATE_BOUND)
+
+    def test_terminal_root(self):
+        self.board.reset_board()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.searcher.search_iter(self.board, depth=2)
+        self.assertNotEqual(self.searcher.best_move, NO_MOVE)
+        # no move of an earlier search is kept without legal moves
+        for fen, expected in (("7k/8/6Q1/8/8/8/8/K7 b - - 0 1", 0),
+                              ("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1", -MATE_SCORE)):
+            self.board.from_fen(fen)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                score = self.searcher.search_iter(self.board)
+            self.assertEqual(score, expected)
+            self.assertEqual(self.searcher.best_move, NO_MOVE)
+            self.assertNotIn("info depth 2", output.getvalue())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import contextlib
+import io
+import unittest
+
+from gobychess.board import Board
+from gobychess.evaluation import Evaluator
+from gobychess.search import MATE_SCORE
+from gobychess.smp import ParallelSearcher
+from gobychess.utils import NO_MOVE, move_from_san
+
+
+class ParallelSearcherTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.searcher = ParallelSearcher(Evaluator(), threads=2, hash_size=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.searcher.close()
+
+    def setUp(self):
+        self.board = Board()
+        self.board.from_fen("r1bqkbnr/1ppp1ppp/p1n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w KQkq - 0 4")
+
+    def search(self, **limits):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            score = self.searcher.search_iter(self.board, **limits)
+        return score, output.getvalue()
+
+    def test_depth(self):
+        score, output = self.search(depth=3)
+        # scholar's mate
+        self.assertEqual(self.searcher.best_move, move_from_san('f3f7', self.board))
+        self.assertGreater(score, 40000)
+        self.assertIn("info depth 3 score mate 1", output)
+        self.assertGreater(self.searcher.nodes, 0)
+        self.assertEqual(self.board.undo_stack, [])
+
+    def test_limits(self):
+        self.board.reset_board()
+        self.search(nodes=2000)
+        self.assertIn(self.searcher.best_move, list(self.board.gen_legal_moves()))
+        self.assertLess(self.searcher.nodes, 2000 + 2 * 1024)
+
+    def test_no_moves(self):
+        self.search(movetime=200)
+        self.assertNotEqual(self.searcher.best_move, NO_MOVE)
+        # the workers and the main process forget the move of the last search
+        self.board.from_fen("8/8/8/8/8/2k5/1q6/K7 w - - 0 1")
+        score, _ = self.search(movetime=1000)
+        self.assertEqual(score, -MATE_SCORE)
+        self.assertEqual(self.searcher.best_move, NO_MOVE)
+
+    def test_threads(self):
+        self.searcher.set_threads(3)
+        self.assertEqual(len(self.searcher.workers), 3)
+        self.search(depth=2)
+        self.searcher.set_threads(2)
+        self.assertEqual(len(self.searcher.workers), 2)
+        # workers attach to a resized table and follow the evaluation cache size
+        self.searcher.ttable.resize(2)
+        self.searcher.evaluator.cache.resize(2)
+        score, _ = self.search(depth=3)
+        self.assertGreater(score, 40000)
+
+
+if __name__ == '__main__':
+    unittest.main()
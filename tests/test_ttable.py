@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from gobychess.ttable import (ENTRY_SIZE, EXACT, LOWER, UPPER, SharedTranspositionTable,
+                              TranspositionTable)
+from gobychess.utils import NO_MOVE, encode_move
+
+
+class TranspositionTableTests(unittest.TestCase):
+
+    def setUp(self):
+        self.table = TranspositionTable(1)
+        # keys in the same bucket
+        self.keys = [5 + i * (self.table.mask + 1) for i in range(1, 4)]
+
+    def test_size(self):
+        self.assertLessEqual(self.table.size * ENTRY_SIZE, 1024 * 1024)
+        self.assertEqual(self.table.size, 2 * (self.table.mask + 1))
+        self.table.resize(4)
+        self.assertLessEqual(self.table.size * ENTRY_SIZE, 4 * 1024 * 1024)
+        self.assertGreater(self.table.size * ENTRY_SIZE, 2 * 1024 * 1024)
+
+    def test_store_probe(self):
+        move = encode_move(12, 28)
+        self.assertEqual(self.table.probe(self.keys[0]), None)
+        self.table.store(self.keys[0], -150, 3, LOWER, move)
+        self.assertEqual(self.table.probe(self.keys[0]), (-150, LOWER, 3, move))
+        # a store without move keeps the move of the position
+        self.table.store(self.keys[0], 20, 4, EXACT)
+        self.assertEqual(self.table.probe(self.keys[0]), (20, EXACT, 4, move))
+        self.table.clear()
+        self.assertEqual(self.table.probe(self.keys[0]), None)
+
+    def test_replacement(self):
+        self.table.store(self.keys[0], 1, 5, EXACT)
+        self.table.store(self.keys[1], 2, 2, UPPER)
+        self.table.store(self.keys[2], 3, 1, UPPER)
+        # deeper entry stays, the always replace slot is overwritten
+        self.assertEqual(self.table.probe(self.keys[0]), (1, EXACT, 5, NO_MOVE))
+        self.assertEqual(self.table.probe(self.keys[1]), None)
+        self.assertEqual(self.table.probe(self.keys[2]), (3, UPPER, 1, NO_MOVE))
+        # entries of older searches get replaced by shallower ones
+        self.table.new_search()
+        self.table.store(self.keys[1], 2, 2, UPPER)
+        self.assertEqual(self.table.probe(self.keys[0]), None)
+        self.assertEqual(self.table.probe(self.keys[1]), (2, UPPER, 2, NO_MOVE))
+
+    def test_hashfull(self):
+        self.assertEqual(self.table.hashfull(), 0)
+        for key in range(1, 251):
+            self.table.store(key, 0, 1, EXACT)
+        self.assertEqual(self.table.hashfull(), 250)
+        self.table.new_search()
+        self.assertEqual(self.table.hashfull(), 0)
+
+
+class SharedTranspositionTableTests(TranspositionTableTests):
+
+    def setUp(self):
+        self.table = SharedTranspositionTable(1)
+        self.keys = [5 + i * (self.table.mask + 1) for i in range(1, 4)]
+
+    def tearDown(self):
+        self.table.close()
+
+    def test_size(self):
+        self.assertEqual(self.table.size, 2 * (self.table.mask + 1))
+        self.assertEqual(len(self.table.table), 2 * self.table.size)
+        self.table.resize(4)
+        self.assertEqual(self.table.size * 16, 4 * 1024 * 1024)
+
+    def test_packing(self):
+        move = encode_move(52, 60, 8)
+        for score, depth in [(-49990, 1), (49990, 40), (0, 0), (-7, -1)]:
+            self.table.store(self.keys[0], score, depth, UPPER, move)
+            self.assertEqual(self.table.probe(self.keys[0]), (score, UPPER, depth, move))
+
+    def test_attach(self):
+        self.table.store(self.keys[0], 12, 3, EXACT)
+        other = SharedTranspositionTable(name=self.table.name)
+        self.assertEqual(other.probe(self.keys[0]), (12, EXACT, 3, NO_MOVE))
+        other.store(self.keys[1], -4, 6, LOWER)
+        self.assertEqual(self.table.probe(self.keys[1]), (-4, LOWER, 6, NO_MOVE))
+        other.close()
+        self.assertEqual(self.table.probe(self.keys[1]), (-4, LOWER, 6, NO_MOVE))
+
+    def test_torn_entry(self):
+        self.table.store(self.keys[0], 12, 3, EXACT)
+        index = (self.keys[0] & self.table.mask) << 2
+        # data of another position written without its key
+        self.table.table[index + 1] ^= 1 << 20
+        self.assertEqual(self.table.probe(self.keys[0]), None)
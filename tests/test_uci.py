@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import os
+import queue
+import subprocess
+import sys
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class UciTests(unittest.TestCase):
+
+    def setUp(self):
+        # started like goby.sh does
+        self.engine = subprocess.Popen([sys.executable, 'run.py'], cwd=ROOT, text=True,
+                                       stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+        # lines are read in a thread, so a hanging engine fails the test
+        self.lines = queue.Queue()
+        threading.Thread(target=lambda: [self.lines.put(line) for line in self.engine.stdout],
+                         daemon=True).start()
+
+    def tearDown(self):
+        if self.engine.poll() is None:
+            self.engine.kill()
+            self.engine.wait()
+        self.engine.stderr.close()
+
+    def send(self, *commands):
+        self.engine.stdin.write("".join(command + "\n" for command in commands))
+        self.engine.stdin.flush()
+
+    def read_until(self, prefix):
+        """
+        lines of the engine up to the first one starting with prefix
+        """
+        lines = []
+        while not lines or not lines[-1].startswith(prefix):
+            try:
+                lines.append(self.lines.get(timeout=30).strip())
+            except queue.Empty:
+                self.fail(f"no {prefix} from the engine")
+        return lines
+
+    def test_threads(self):
+        self.send("uci", "setoption name Threads value 2", "isready")
+        self.read_until("readyok")
+
+        self.send("position startpos moves e2e4", "go movetime 1000")
+        lines = self.read_until("bestmove")
+        self.assertTrue(any(line.startswith("info depth") for line in lines))
+
+        # fixed depth searches are split at the root
+        self.send("position startpos", "go depth 3")
+        lines = self.read_until("bestmove")
+        self.assertTrue(lines[-2].startswith("info depth 3"))
+
+        self.send("quit")
+        self.assertEqual(self.engine.wait(timeout=60), 0)
+        self.assertNotIn("Traceback", self.engine.stderr.read())
+
+
+if __name__ == '__main__':
+    unittest.main()